@@ -13,4 +13,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from recipe import events  # noqa: E402, needs the apps loaded
+
+
+async def application(scope, receive, send):
+    """Serve the event streams, and everything else with Django."""
+    if scope['type'] == 'http' and scope['path'] == events.PATH:
+        return await events.events_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -45,23 +45,28 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
-    'rest_framework.authtoken',
     'drf_spectacular',
     'core',
     'user',
     'recipe',
+    'benchmark',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
+    'core.middleware.CsrfViewMiddleware',
+    'core.middleware.AuthenticationMiddleware',
+    'core.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Requests under these paths authenticate with tokens, the session, CSRF,
+# authentication and messages middleware skip them.
+TOKEN_API_PATHS = ['/api/']
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -82,6 +87,14 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'app.wsgi.application'
 
+# Build the URL resolver and import views when the WSGI app is loaded, and
+# open connections in each worker before it accepts requests.
+WSGI_WARMUP = bool(int(os.environ.get('WSGI_WARMUP', 1)))
+WARMUP_PATHS = [
+    '/api/recipe/recipes/',
+    '/api/user/me/',
+]
+
 
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
@@ -93,6 +106,12 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Seconds before giving up on connecting, so requests and health
+        # checks fail instead of hanging while the database is away.
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
 }
 
@@ -116,6 +135,41 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing, PASSWORD_HASHER picks the hasher of new passwords.
+# Hashes made by the others are still accepted and replaced on login.
+# https://docs.djangoproject.com/en/3.2/topics/auth/passwords/
+
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'core.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'core.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'core.hashers.TunedBCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 320000)
+)
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 102400)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 8)
+)
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+
+# At most PASSWORD_VERIFY_CONCURRENCY passwords are hashed at a time per
+# process, by default one per request thread of the worker; logins beyond
+# it are refused with a 503.
+AUTHENTICATION_BACKENDS = ['user.backends.PooledModelBackend']
+PASSWORD_VERIFY_CONCURRENCY = int(os.environ.get(
+    'PASSWORD_VERIFY_CONCURRENCY', os.environ.get('SERVER_THREADS', 1),
+))
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -146,10 +200,135 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
 
+TEST_RUNNER = 'core.test_runner.FastTestRunner'
+
+# Wire formats of the API by name, API_FORMATS picks the enabled ones, the
+# first being the default. Clients choose with Accept and Content-Type.
+API_FORMAT_CLASSES = {
+    'json': (
+        'core.renderers.ORJSONRenderer',
+        'core.renderers.ORJSONParser',
+    ),
+    'msgpack': (
+        'core.renderers.MessagePackRenderer',
+        'core.renderers.MessagePackParser',
+    ),
+    'browsable': ('rest_framework.renderers.BrowsableAPIRenderer', None),
+}
+API_FORMATS = os.environ.get('API_FORMATS', 'json,msgpack,browsable').split(',')
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': [
+        API_FORMAT_CLASSES[name][0] for name in API_FORMATS
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        API_FORMAT_CLASSES[name][1] for name in API_FORMATS
+        if API_FORMAT_CLASSES[name][1]
+    ] + [
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'core.authentication.ExpiringTokenAuthentication',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.UserBucketThrottle',
+        'core.throttling.IPBucketThrottle',
+        'core.throttling.ScopedBucketThrottle',
+    ],
+    # The proxy replaces X-Forwarded-For with the address of the client,
+    # see proxy/default.conf.tpl, so throttles key on that address.
+    'NUM_PROXIES': 1,
+}
+
+# API tokens expire AUTH_TOKEN_TTL seconds after they are issued, a user
+# keeps at most AUTH_TOKEN_MAX_PER_USER of them (one per device) and
+# invalid tokens are remembered for AUTH_TOKEN_REVOCATION_CACHE seconds.
+AUTH_TOKEN_TTL = int(os.environ.get('AUTH_TOKEN_TTL', 7 * 24 * 3600))
+AUTH_TOKEN_MAX_PER_USER = int(os.environ.get('AUTH_TOKEN_MAX_PER_USER', 10))
+AUTH_TOKEN_REVOCATION_CACHE = int(
+    os.environ.get('AUTH_TOKEN_REVOCATION_CACHE', 300)
+)
+
+# Token bucket rates by scope, 'N/period' allows bursts of N requests
+# refilled over the period. Scopes without a rate are not throttled, and
+# THROTTLE_ENABLED=0 throttles none, e.g. for load tests.
+THROTTLE_RATES = {
+    'user': os.environ.get('THROTTLE_USER_RATE', '600/min'),
+    'ip': os.environ.get('THROTTLE_IP_RATE', '1200/min'),
+    'login': os.environ.get('THROTTLE_LOGIN_RATE', '20/min'),
+    'login-account': os.environ.get('THROTTLE_LOGIN_ACCOUNT_RATE', '10/min'),
+    'recipe-upload': os.environ.get('THROTTLE_UPLOAD_RATE', '30/min'),
+    'recipe-bulk': os.environ.get('THROTTLE_BULK_RATE', '30/min'),
+}
+if not bool(int(os.environ.get('THROTTLE_ENABLED', 1))):
+    THROTTLE_RATES = {}
+# 'auto' shares buckets between workers through the uWSGI cache named
+# THROTTLE_UWSGI_CACHE when running under uWSGI, 'local' keeps them in
+# process memory.
+THROTTLE_STORE = os.environ.get('THROTTLE_STORE', 'auto')
+THROTTLE_UWSGI_CACHE = 'throttle'
+
+# Each worker keeps the tag and ingredient index of the recipes of the
+# RECIPE_INDEX_MAX_USERS most recently active users, see recipe.index.
+# Similar recipes weigh shared ingredients and tags by
+# RECIPE_SIMILARITY_WEIGHTS.
+RECIPE_INDEX_MAX_USERS = int(os.environ.get('RECIPE_INDEX_MAX_USERS', 200))
+RECIPE_SIMILARITY_WEIGHTS = {
+    'tags': float(os.environ.get('RECIPE_SIMILARITY_TAG_WEIGHT', 1)),
+    'ingredients': float(
+        os.environ.get('RECIPE_SIMILARITY_INGREDIENT_WEIGHT', 2)
+    ),
+}
+
+# Recipe details are cached for RECIPE_CACHE_TIMEOUT seconds in the cache
+# named by RECIPE_CACHE, if any, see recipe.cache.
+RECIPE_CACHE = os.environ.get('RECIPE_CACHE', '')
+RECIPE_CACHE_TIMEOUT = int(os.environ.get('RECIPE_CACHE_TIMEOUT', 300))
+
+# Changes are kept SYNC_RETENTION seconds for the sync API, clients that
+# last synced earlier get everything again.
+SYNC_RETENTION = int(os.environ.get('SYNC_RETENTION', 30 * 24 * 3600))
+
+# Event streams check the change log every EVENTS_POLL_INTERVAL seconds,
+# send a heartbeat after EVENTS_HEARTBEAT idle seconds and buffer at most
+# EVENTS_BUFFER events per client.
+EVENTS_POLL_INTERVAL = float(os.environ.get('EVENTS_POLL_INTERVAL', 1))
+EVENTS_HEARTBEAT = float(os.environ.get('EVENTS_HEARTBEAT', 15))
+EVENTS_BUFFER = int(os.environ.get('EVENTS_BUFFER', 100))
+
+# Responses of at least COMPRESSION_MIN_SIZE bytes, and streamed ones, are
+# compressed with the first of COMPRESSION_ENCODINGS the client accepts,
+# br and zstd only when their packages are installed. COMPRESSION_LEVELS
+# sets the level of each encoding by content type, 'text/*' standing for
+# the other text types; types missing or set to None are sent as is.
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_ENCODINGS = os.environ.get(
+    'COMPRESSION_ENCODINGS', 'br,zstd,gzip',
+).split(',')
+COMPRESSION_LEVELS = {
+    'application/json': {'br': 4, 'zstd': 3, 'gzip': 6},
+    'application/msgpack': {'br': 4, 'zstd': 3, 'gzip': 6},
+    'application/javascript': {'br': 5, 'zstd': 6, 'gzip': 6},
+    'text/event-stream': None,
+    'text/*': {'br': 5, 'zstd': 6, 'gzip': 6},
 }
 
 SPECTACULAR_SETTINGS = {
     'COMPONENT_SPLIT_REQUEST': True,
+    # The schema views are imported lazily and not part of the schema.
+    'SERVE_INCLUDE_SCHEMA': False,
 }
+
+# Written by the build_schema command at deploy time.
+API_SCHEMA_FILE = os.environ.get(
+    'API_SCHEMA_FILE',
+    os.path.join(STATIC_ROOT, 'schema', 'openapi.json'),
+)
+
+# Readiness probe, results are reused for HEALTH_CHECK_CACHE_SECONDS
+HEALTH_CHECK_TIMEOUT = float(os.environ.get('HEALTH_CHECK_TIMEOUT', 2))
+HEALTH_CHECK_CACHE_SECONDS = float(
+    os.environ.get('HEALTH_CHECK_CACHE_SECONDS', 5)
+)
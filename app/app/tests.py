@@ -1,9 +1,11 @@
 """
 Sample tests
 """
-from django.test import SimpleTestCase
+from unittest.mock import MagicMock, patch
 
-from app import calc
+from django.test import SimpleTestCase, override_settings
+
+from app import calc, warmup
 
 
 class CalcTests(SimpleTestCase):
@@ -20,3 +22,27 @@ class CalcTests(SimpleTestCase):
         res = calc.subtract(10, 15)
 
         self.assertEqual(res, 5)
+
+
+class WarmupTests(SimpleTestCase):
+    """Test warming up a WSGI process."""
+
+    @override_settings(WARMUP_PATHS=['/api/recipe/recipes/', '/missing/'])
+    def test_preload(self):
+        """Test preloading resolves paths and warns about unknown ones."""
+        with self.assertLogs('app.warmup', 'WARNING') as logs:
+            warmup.preload()
+
+        self.assertIn('/missing/', logs.output[0])
+
+    @patch('app.warmup.connections')
+    def test_connect(self, patched_connections):
+        """Test connect reopens every database connection."""
+        connection = MagicMock()
+        patched_connections.__iter__.return_value = ['default']
+        patched_connections.__getitem__.return_value = connection
+
+        warmup.connect()
+
+        patched_connections.close_all.assert_called_once()
+        connection.ensure_connection.assert_called_once()
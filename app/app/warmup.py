@@ -0,0 +1,43 @@
+"""
+Warm up a WSGI process before it accepts traffic.
+
+preload() runs where the app is loaded. Under uWSGI without lazy-apps
+that is the master, so everything it builds is shared copy-on-write by
+the forked workers. connect() runs in every worker after the fork and
+opens the connections the first requests would otherwise wait for.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.urls import Resolver404, get_resolver, resolve
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """Import the views and build the URL resolver of the app."""
+    # Populating the reverse lookups imports every URLconf and view.
+    get_resolver().reverse_dict
+    for path in settings.WARMUP_PATHS:
+        try:
+            resolve(path)
+        except Resolver404:
+            logger.warning('Warm up path %s does not resolve', path)
+
+
+def connect():
+    """Open database and cache connections of this process."""
+    # Connections must never be shared with the process we forked from.
+    connections.close_all()
+    for alias in connections:
+        try:
+            connections[alias].ensure_connection()
+        except Exception:
+            logger.exception('Could not connect to database %s', alias)
+    for alias in settings.CACHES:
+        try:
+            caches[alias].get('warmup')
+        except Exception:
+            logger.exception('Could not reach cache %s', alias)
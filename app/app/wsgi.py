@@ -9,8 +9,24 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
 application = get_wsgi_application()
+
+if settings.WSGI_WARMUP:
+    from app import warmup
+
+    warmup.preload()
+    try:
+        import uwsgi
+        from uwsgidecorators import postfork
+    except ImportError:
+        uwsgi = None
+    if uwsgi is not None and uwsgi.worker_id() == 0:
+        # Loaded in the master, connect in each worker once forked.
+        postfork(warmup.connect)
+    else:
+        warmup.connect()
@@ -0,0 +1,102 @@
+"""
+Clients driving the API in-process or against a running server.
+
+Both return a (status_code, body, queries) tuple for every request, where
+queries is the number of SQL queries run, or None when it is unknown.
+"""
+import json
+import urllib.error
+import urllib.request
+import uuid
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+
+
+class InProcessClient:
+    """Call the Django app directly, counting the queries of each request."""
+
+    def __init__(self):
+        self.client = APIClient()
+
+    def authenticate(self, token):
+        """Send the token with every following request."""
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def request(self, method, path, data=None, files=None):
+        """Perform a request and return status, parsed body and queries."""
+        kwargs = {}
+        if files:
+            kwargs = {'data': dict(data or {}, **files), 'format': 'multipart'}
+        elif data is not None:
+            kwargs = {'data': data, 'format': 'json'}
+        # The query log is bounded, start each request from an empty one.
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            res = getattr(self.client, method.lower())(path, **kwargs)
+        try:
+            body = res.json()
+        except (ValueError, TypeError):
+            body = None
+        return res.status_code, body, len(queries)
+
+
+class HTTPClient:
+    """Call a running server over HTTP. Query counts are not available."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.headers = {}
+
+    def authenticate(self, token):
+        """Send the token with every following request."""
+        self.headers['Authorization'] = f'Token {token}'
+
+    def _multipart(self, data, files):
+        """Encode form fields and files as multipart/form-data."""
+        boundary = uuid.uuid4().hex
+        parts = []
+        for name, value in (data or {}).items():
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; '
+                f'name="{name}"\r\n\r\n{value}\r\n'.encode()
+            )
+        for name, fileobj in files.items():
+            fileobj.seek(0)
+            parts.append(
+                f'--{boundary}\r\nContent-Disposition: form-data; '
+                f'name="{name}"; filename="{fileobj.name}"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n'.encode()
+                + fileobj.read() + b'\r\n'
+            )
+        parts.append(f'--{boundary}--\r\n'.encode())
+        return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+    def request(self, method, path, data=None, files=None):
+        """Perform a request and return status, parsed body and None."""
+        headers = dict(self.headers)
+        body = None
+        if files:
+            body, headers['Content-Type'] = self._multipart(data, files)
+        elif data is not None:
+            body = json.dumps(data).encode()
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=body,
+            headers=headers,
+            method=method.upper(),
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as res:
+                status, raw = res.status, res.read()
+        except urllib.error.HTTPError as exc:
+            status, raw = exc.code, exc.read()
+        try:
+            parsed = json.loads(raw) if raw else None
+        except ValueError:
+            parsed = None
+        return status, parsed, None
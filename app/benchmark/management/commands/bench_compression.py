@@ -0,0 +1,71 @@
+"""
+Django command to benchmark the response compression.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import renderers
+from core.middleware import CODECS
+
+from benchmark.seed import recipe_list_data
+
+
+LEVELS = {
+    'gzip': (1, 6, 9),
+    'br': (1, 4, 5, 6, 11),
+    'zstd': (1, 3, 6, 12, 19),
+}
+
+BODIES = {
+    'json': renderers.ORJSONRenderer,
+    'msgpack': renderers.MessagePackRenderer,
+}
+
+
+class Command(BaseCommand):
+    """Django command to compare encodings and levels on a recipe list."""
+
+    help = (
+        'Compress the JSON and MessagePack list of a user with many recipes '
+        'with each available encoding and level, and report the CPU time '
+        'against the bytes saved. The recipes are created in a transaction '
+        'rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        data = recipe_list_data(
+            'bench-compression@example.com', options['recipes'],
+        )
+        self.stdout.write(f'{len(data)} recipes')
+        for body_name, renderer_class in BODIES.items():
+            body = renderer_class().render(data)
+            self.stdout.write(f'\n{body_name}: {len(body)} bytes')
+            self.stdout.write(
+                f'{"encoding":10} {"ms":>8} {"bytes":>10} {"ratio":>6} '
+                f'{"MB/s":>7} {"ms/MB saved":>12}'
+            )
+            for name, codec in CODECS.items():
+                for level in LEVELS[name]:
+                    self.report(f'{name}-{level}', codec, level, body,
+                                options['repeat'])
+
+    def report(self, label, codec, level, body, repeat):
+        """Write the best CPU time and the size of one encoding."""
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.process_time()
+            compressed = codec.compress(body, level)
+            best = min(best, time.process_time() - start)
+        saved = (len(body) - len(compressed)) / 1e6
+        self.stdout.write(
+            f'{label:10} {best * 1000:8.1f} {len(compressed):10} '
+            f'{len(body) / len(compressed):6.1f} '
+            f'{len(body) / 1e6 / best:7.0f} '
+            f'{best * 1000 / saved:12.1f}'
+        )
@@ -0,0 +1,87 @@
+"""
+Django command to benchmark password verification.
+"""
+import os
+import time
+from concurrent import futures
+
+from django.conf import settings
+from django.contrib.auth.hashers import get_hasher
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from user import backends
+
+
+PASSWORD = 'benchpass123'
+
+
+class Command(BaseCommand):
+    """Django command to benchmark logins per second."""
+
+    help = (
+        'Measure logins per second per core for each configured password '
+        'hasher, serially and from concurrent clients within the hashing '
+        'bound, counting the logins it refuses.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20)
+        parser.add_argument('--clients', type=int, default=8,
+                            help='Concurrent logins.')
+        parser.add_argument('--hasher', action='append',
+                            choices=sorted(settings.PASSWORD_HASHER_CLASSES),
+                            help='Hasher to measure, defaults to all.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        self.stdout.write(
+            f'{"hasher":8} {"ms/login":>9} {"logins/s/core":>14} '
+            f'{"bound logins/s":>15} {"refused":>8}  '
+            f'({settings.PASSWORD_VERIFY_CONCURRENCY} at a time, '
+            f'{os.cpu_count()} cpus)'
+        )
+        for name in options['hasher'] or settings.PASSWORD_HASHER_CLASSES:
+            path = settings.PASSWORD_HASHER_CLASSES[name]
+            with override_settings(PASSWORD_HASHERS=[path]):
+                try:
+                    encoded = get_hasher('default').encode(
+                        PASSWORD, get_hasher('default').salt(),
+                    )
+                except ValueError as exc:
+                    self.stdout.write(f'{name:8} unavailable: {exc}')
+                    continue
+                serial = self.measure_serial(encoded, options['logins'])
+                bound, refused = self.measure_bound(
+                    encoded, options['logins'], options['clients'],
+                )
+            self.stdout.write(
+                f'{name:8} {serial * 1000:9.1f} {1 / serial:14.1f} '
+                f'{bound:15.1f} {refused:8}'
+            )
+
+    def measure_serial(self, encoded, logins):
+        """Return the seconds one verification takes on one core."""
+        start = time.process_time()
+        for _ in range(logins):
+            backends._verify(PASSWORD, encoded)
+        return (time.process_time() - start) / logins
+
+    def measure_bound(self, encoded, logins, clients):
+        """
+        Return the logins verified per second with clients concurrent
+        logins, and the number refused.
+        """
+        def login(_):
+            try:
+                backends.verify_password(PASSWORD, encoded)
+            except backends.LoginUnavailable:
+                return False
+            return True
+
+        start = time.perf_counter()
+        with futures.ThreadPoolExecutor(max_workers=clients) as executor:
+            verified = sum(executor.map(login, range(logins)))
+        return (
+            verified / (time.perf_counter() - start), logins - verified,
+        )
@@ -0,0 +1,102 @@
+"""
+Django command to benchmark the middleware of API and admin requests.
+"""
+import gc
+import time
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.test.utils import override_settings
+from django.utils.module_loading import import_string
+
+from core.middleware import BrowserOnlyMixin
+
+
+PATHS = {
+    'api': '/api/health/live/',
+    'admin': '/admin/login/',
+}
+
+
+def django_middleware():
+    """Return MIDDLEWARE with Django's classes instead of the lean ones."""
+    paths = []
+    for path in settings.MIDDLEWARE:
+        middleware = import_string(path)
+        if issubclass(middleware, BrowserOnlyMixin):
+            base = middleware.__bases__[1]
+            path = f'{base.__module__}.{base.__qualname__}'
+        paths.append(path)
+    return paths
+
+
+class Command(BaseCommand):
+    """Django command to compare the lean and Django middleware."""
+
+    help = (
+        'Time requests to an API path and an admin page through the '
+        'configured middleware and through the Django middleware it '
+        'replaces, and report the time per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        arrangements = {
+            'django': django_middleware(),
+            'lean': settings.MIDDLEWARE,
+        }
+        self.stdout.write(f'{"path":6} {"middleware":10} {"us/request":>10}')
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            handlers = {
+                label: self.load(middleware)
+                for label, middleware in arrangements.items()
+            }
+            for name, path in PATHS.items():
+                best = self.measure(
+                    handlers, path, options['requests'], options['repeat'],
+                )
+                baseline = best['django']
+                for label, seconds in best.items():
+                    self.stdout.write(
+                        f'{name:6} {label:10} {seconds * 1e6:10.1f} '
+                        f'({(baseline - seconds) * 1e6:+.1f} us saved)'
+                    )
+
+    def load(self, middleware):
+        """Return a request handler through middleware."""
+        with override_settings(MIDDLEWARE=middleware):
+            handler = BaseHandler()
+            handler.load_middleware()
+        return handler
+
+    def measure(self, handlers, path, requests, repeat):
+        """
+        Return the best time per request to path through each handler,
+        taking turns so that they share the noise of the machine.
+        """
+        factory = RequestFactory()
+        best = dict.fromkeys(handlers, float('inf'))
+        for handler in handlers.values():
+            response = handler.get_response(factory.get(path))  # warm up
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+        for _ in range(repeat):
+            for label, handler in handlers.items():
+                batch = [factory.get(path) for _ in range(requests)]
+                gc.collect()
+                gc.disable()
+                try:
+                    start = time.perf_counter()
+                    for request in batch:
+                        handler.get_response(request)
+                    seconds = (time.perf_counter() - start) / requests
+                finally:
+                    gc.enable()
+                best[label] = min(best[label], seconds)
+        return best
@@ -0,0 +1,55 @@
+"""
+Django command to benchmark the API renderers.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+
+from benchmark.seed import recipe_list_data
+
+
+RENDERERS = {
+    'drf-json': JSONRenderer,
+    'orjson': renderers.ORJSONRenderer,
+    'msgpack': renderers.MessagePackRenderer,
+}
+
+
+class Command(BaseCommand):
+    """Django command to compare renderers on a large recipe list."""
+
+    help = (
+        'Render the list of a user with many recipes with each renderer and '
+        'report the time and payload size. The recipes are created in a '
+        'transaction rolled back at the end.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        data = recipe_list_data(
+            'bench-renderers@example.com', options['recipes'],
+        )
+
+        self.stdout.write(f'{len(data)} recipes')
+        self.stdout.write(f'{"renderer":10} {"ms":>8} {"bytes":>10}')
+        baseline = None
+        for name, renderer_class in RENDERERS.items():
+            renderer = renderer_class()
+            best = float('inf')
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                body = renderer.render(data)
+                best = min(best, time.perf_counter() - start)
+            baseline = baseline or best
+            self.stdout.write(
+                f'{name:10} {best * 1000:8.1f} {len(body):10} '
+                f'({baseline / best:.1f}x)'
+            )
@@ -0,0 +1,147 @@
+"""
+Django command to benchmark the recipe API.
+"""
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+
+from benchmark import report, seed
+from benchmark.clients import HTTPClient, InProcessClient
+from benchmark.runner import run_scenario
+from benchmark.scenarios import SCENARIOS
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the API."""
+
+    help = (
+        'Run benchmark scenarios in-process or against a running server '
+        'and report throughput, latency percentiles and queries per request. '
+        'In-process runs are not throttled; start servers under test with '
+        'THROTTLE_ENABLED=0.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', choices=sorted(SCENARIOS),
+            help='Scenario to run, may be repeated. Defaults to all.',
+        )
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help='Parallel clients, only with --url.')
+        parser.add_argument('--users', type=int, default=1,
+                            help='Seeded users to spread requests over.')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server, e.g. http://localhost:8000. '
+                 'Without it the app is driven in-process.',
+        )
+        parser.add_argument(
+            '--test-db', action='store_true',
+            help='Run in-process against a throwaway database seeded with '
+                 '--users users of --recipes recipes.',
+        )
+        parser.add_argument('--recipes', type=int, default=100,
+                            help='Recipes per user seeded with --test-db.')
+        parser.add_argument('--output', help='Write the JSON report here.')
+        parser.add_argument('--compare',
+                            help='JSON report of a previous run to compare.')
+        parser.add_argument('--metric', default='p95_ms')
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help='Allowed regression in percent.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['url'] and options['test_db']:
+            raise CommandError('--test-db only applies to in-process runs.')
+        if not options['url'] and options['concurrency'] != 1:
+            raise CommandError('--concurrency requires --url.')
+
+        if options['test_db']:
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                with tempfile.TemporaryDirectory() as media, \
+                        override_settings(MEDIA_ROOT=media):
+                    seed.seed(
+                        users=options['users'],
+                        recipes_per_user=options['recipes'],
+                        random_seed=options['seed'],
+                    )
+                    results = self.run_all(options)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        else:
+            results = self.run_all(options)
+
+        self.stdout.write(report.format_table(results))
+        current = report.build_report(results, {
+            key: options[key]
+            for key in ('requests', 'warmup', 'concurrency', 'users', 'url')
+        })
+        if options['output']:
+            report.write_report(current, options['output'])
+        if options['compare']:
+            self.compare(report.load_report(options['compare']), current,
+                         options['metric'], options['threshold'])
+
+    def run_all(self, options):
+        """Run each requested scenario and return the summaries."""
+        if options['url']:
+            def make_client():
+                return HTTPClient(options['url'])
+        else:
+            make_client = InProcessClient
+            # The in-process client sends requests to 'testserver', and
+            # throttles would refuse the logins and requests of the run.
+            overrides = override_settings(
+                ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ['testserver'],
+                THROTTLE_RATES={},
+            )
+            with overrides:
+                return self._run_all(options, make_client)
+        return self._run_all(options, make_client)
+
+    def _run_all(self, options, make_client):
+        """Run the scenarios with clients from make_client."""
+        emails = [
+            seed.EMAIL_TEMPLATE.format(index=n)
+            for n in range(options['users'])
+        ]
+        results = {}
+        for name in options['scenario'] or list(SCENARIOS):
+            self.stdout.write(f'Running {name}...')
+            samples = run_scenario(
+                name,
+                make_client,
+                emails,
+                requests=options['requests'],
+                warmup=options['warmup'],
+                concurrency=options['concurrency'],
+                random_seed=options['seed'],
+            )
+            results[name] = report.summarize(samples)
+        return results
+
+    def compare(self, baseline, current, metric, threshold):
+        """Print the comparison and exit non-zero on a regression."""
+        self.stdout.write(
+            f'\n{metric}: {baseline.get("revision")} -> '
+            f'{current.get("revision")}'
+        )
+        regressed = False
+        for name, before, after, change, worse in report.compare(
+            baseline, current, metric, threshold,
+        ):
+            change = '-' if change is None else f'{change:+.1f}%'
+            flag = '  REGRESSION' if worse else ''
+            self.stdout.write(f'{name:14} {before} -> {after} {change}{flag}')
+            regressed = regressed or worse
+        if regressed:
+            sys.exit(1)
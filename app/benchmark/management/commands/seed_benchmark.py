@@ -0,0 +1,50 @@
+"""
+Django command to seed the database with benchmark data.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from benchmark import seed
+
+
+class Command(BaseCommand):
+    """Django command to seed benchmark data."""
+
+    help = 'Create users, recipes, tags and ingredients for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10)
+        parser.add_argument('--recipes', type=int, default=100,
+                            help='Recipes per user.')
+        parser.add_argument('--tags', type=int, default=20,
+                            help='Tags per user.')
+        parser.add_argument('--ingredients', type=int, default=50,
+                            help='Ingredients per user.')
+        parser.add_argument('--tags-per-recipe', type=int, default=3)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--distribution', choices=seed.DISTRIBUTIONS,
+                            default='uniform')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--first-user', type=int, default=0,
+                            help='Index of the first user email.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        start = time.perf_counter()
+        users = seed.seed(
+            users=options['users'],
+            recipes_per_user=options['recipes'],
+            tags_per_user=options['tags'],
+            ingredients_per_user=options['ingredients'],
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            distribution=options['distribution'],
+            random_seed=options['seed'],
+            first_user=options['first_user'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(users)} users in '
+            f'{time.perf_counter() - start:.1f}s, '
+            f'password {seed.PASSWORD!r}'
+        ))
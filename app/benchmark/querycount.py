@@ -0,0 +1,91 @@
+"""
+Query count regression guards for API endpoints.
+
+Tests measure an endpoint against a small dataset, grow the dataset and
+measure again. The two counts must be equal (no per-row queries) and
+match the count recorded in query_baseline.json. Run the tests with
+UPDATE_QUERY_BASELINE=1 to record new counts after an intended change.
+"""
+import json
+import os
+from pathlib import Path
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+BASELINE_FILE = Path(__file__).with_name('query_baseline.json')
+
+
+def load_baseline():
+    """Return the recorded query counts by endpoint name."""
+    if not BASELINE_FILE.exists():
+        return {}
+    with open(BASELINE_FILE) as fileobj:
+        return json.load(fileobj)
+
+
+def update_baseline(name, count):
+    """Record the query count of an endpoint."""
+    baseline = load_baseline()
+    baseline[name] = count
+    with open(BASELINE_FILE, 'w') as fileobj:
+        json.dump(baseline, fileobj, indent=2, sort_keys=True)
+        fileobj.write('\n')
+
+
+def _format_queries(captured):
+    """Return the SQL of captured queries, one numbered line each."""
+    return '\n'.join(
+        f'  {n}. {query["sql"]}'
+        for n, query in enumerate(captured.captured_queries, 1)
+    )
+
+
+class QueryCountMixin:
+    """TestCase mixin asserting endpoint query counts do not grow."""
+
+    def count_queries(self, request):
+        """Call request and return the captured queries and response."""
+        with CaptureQueriesContext(connection) as captured:
+            res = request()
+        self.assertLess(
+            res.status_code, 400,
+            f'Request failed with {res.status_code}: {res.content[:200]}',
+        )
+        return captured
+
+    def assertQueryCountStable(self, name, request, grow):
+        """
+        Assert request runs the same number of queries before and after
+        grow() adds rows, and that the number matches the baseline.
+        """
+        # Warm up so one-off work, like creating a token, is not counted.
+        self.count_queries(request)
+        small = self.count_queries(request)
+        grow()
+        large = self.count_queries(request)
+
+        self.assertEqual(
+            len(small), len(large),
+            f'{name}: query count depends on row count, '
+            f'{len(small)} queries on the small dataset and {len(large)} '
+            f'on the large one.\nLarge dataset queries:\n'
+            f'{_format_queries(large)}',
+        )
+
+        if os.environ.get('UPDATE_QUERY_BASELINE'):
+            update_baseline(name, len(large))
+            return
+        expected = load_baseline().get(name)
+        self.assertIsNotNone(
+            expected,
+            f'{name}: no baseline recorded, run the tests with '
+            f'UPDATE_QUERY_BASELINE=1 to record {len(large)} queries.',
+        )
+        self.assertEqual(
+            len(large), expected,
+            f'{name}: {len(large)} queries, baseline is {expected} '
+            f'({len(large) - expected:+d}). Run with UPDATE_QUERY_BASELINE=1 '
+            f'if the change is intended.\nQueries:\n{_format_queries(large)}',
+        )
@@ -0,0 +1,123 @@
+"""
+Summarize benchmark measurements and compare runs.
+"""
+import json
+import math
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+
+def percentile(values, pct):
+    """Return the pct percentile of values using the nearest-rank method."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Return throughput, latency percentiles and queries of samples."""
+    if not samples:
+        return {'requests': 0}
+    latencies = [(end - start) * 1000 for start, end, _, _ in samples]
+    window = max(end for _, end, _, _ in samples) - \
+        min(start for start, _, _, _ in samples)
+    queries = [q for _, _, _, q in samples if q is not None]
+    errors = sum(1 for _, _, status, _ in samples if status >= 400)
+
+    return {
+        'requests': len(samples),
+        'errors': errors,
+        'throughput': round(len(samples) / window, 2) if window else None,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'queries_per_request': (
+            round(sum(queries) / len(queries), 2) if queries else None
+        ),
+    }
+
+
+def git_revision():
+    """Return the current git commit, or None outside a checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results, settings):
+    """Return a JSON serializable report of scenario results."""
+    return {
+        'revision': git_revision(),
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'settings': settings,
+        'scenarios': results,
+    }
+
+
+def load_report(path):
+    """Read a report written by write_report."""
+    with open(path) as fileobj:
+        return json.load(fileobj)
+
+
+def write_report(report, path):
+    """Write the report as JSON."""
+    with open(path, 'w') as fileobj:
+        json.dump(report, fileobj, indent=2, sort_keys=True)
+
+
+def compare(baseline, current, metric='p95_ms', threshold=10.0):
+    """
+    Compare metric between two reports, returning one row per scenario
+    as (scenario, before, after, change percent, regressed).
+    """
+    rows = []
+    for name, result in current['scenarios'].items():
+        before = baseline['scenarios'].get(name, {}).get(metric)
+        after = result.get(metric)
+        if not before or after is None:
+            rows.append((name, before, after, None, False))
+            continue
+        change = (after - before) / before * 100
+        if metric == 'throughput':
+            regressed = change < -threshold
+        else:
+            regressed = change > threshold
+        rows.append((name, before, after, round(change, 1), regressed))
+    return rows
+
+
+COLUMNS = (
+    'requests', 'errors', 'throughput', 'p50_ms', 'p95_ms', 'p99_ms',
+    'queries_per_request',
+)
+
+
+def format_table(results):
+    """Format scenario results as a plain text table."""
+    header = ['scenario'] + list(COLUMNS)
+    rows = [
+        [name] + [
+            '-' if result.get(col) is None else str(result[col])
+            for col in COLUMNS
+        ]
+        for name, result in results.items()
+    ]
+    widths = [
+        max(len(row[i]) for row in [header] + rows)
+        for i in range(len(header))
+    ]
+    lines = [
+        '  '.join(cell.ljust(width) for cell, width in zip(row, widths))
+        for row in [header] + rows
+    ]
+    return '\n'.join(lines)
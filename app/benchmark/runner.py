@@ -0,0 +1,77 @@
+"""
+Run benchmark scenarios and collect per-request measurements.
+"""
+import random
+import threading
+import time
+
+from django.db import connections
+
+from benchmark.scenarios import SCENARIOS, Context
+
+
+def _worker(make_client, email, scenario, requests, warmup, rnd, out):
+    """Send warmup + requests requests and append measurements to out."""
+    client = make_client()
+    ctx = Context(client, email)
+    for n in range(warmup + requests):
+        method, path, data, files = scenario(ctx, rnd)
+        start = time.perf_counter()
+        status, _, queries = client.request(method, path, data, files)
+        end = time.perf_counter()
+        if n >= warmup:
+            out.append((start, end, status, queries))
+
+
+def _threaded_worker(*args):
+    """Run a worker in its own thread and release its connections."""
+    try:
+        _worker(*args)
+    finally:
+        connections.close_all()
+
+
+def run_scenario(
+    name,
+    make_client,
+    emails,
+    requests=100,
+    warmup=10,
+    concurrency=1,
+    random_seed=42,
+):
+    """
+    Run the named scenario with concurrency parallel clients, each logged
+    in as one of emails in turn, and return the list of measurements as
+    (start, end, status, queries) tuples.
+    """
+    scenario = SCENARIOS[name]
+    samples = []
+    per_worker = max(requests // concurrency, 1)
+    args = [
+        (
+            make_client,
+            emails[n % len(emails)],
+            scenario,
+            per_worker,
+            warmup,
+            random.Random(random_seed + n),
+            samples,
+        )
+        for n in range(concurrency)
+    ]
+    if concurrency == 1:
+        # Run in the calling thread so in-process clients share its
+        # database connection and transaction.
+        _worker(*args[0])
+    else:
+        threads = [
+            threading.Thread(target=_threaded_worker, args=worker_args)
+            for worker_args in args
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    return samples
@@ -0,0 +1,125 @@
+"""
+Benchmark scenarios for the recipe API.
+
+A scenario is a function taking the client and a random generator and
+returning the (method, path, data, files) of the next request to send.
+"""
+import io
+from decimal import Decimal
+
+from PIL import Image
+
+from django.urls import reverse
+
+from benchmark import seed
+
+
+def _image():
+    """Return a small in-memory JPEG."""
+    fileobj = io.BytesIO()
+    Image.new('RGB', (64, 64), color='orange').save(fileobj, format='JPEG')
+    fileobj.seek(0)
+    fileobj.name = 'bench.jpg'
+    return fileobj
+
+
+class Context:
+    """Ids of the benchmark user's objects, loaded through the API."""
+
+    def __init__(self, client, email):
+        self.client = client
+        self.email = email
+        status, body, _ = client.request(
+            'POST',
+            reverse('user:token'),
+            data={'email': email, 'password': seed.PASSWORD},
+        )
+        if status != 200:
+            raise RuntimeError(f'Could not log in as {email}: {body}')
+        client.authenticate(body['token'])
+        _, recipes, _ = client.request('GET', reverse('recipe:recipe-list'))
+        _, tags, _ = client.request('GET', reverse('recipe:tag-list'))
+        _, ingredients, _ = client.request(
+            'GET', reverse('recipe:ingredient-list'),
+        )
+        self.recipe_ids = [recipe['id'] for recipe in recipes]
+        self.tag_ids = [tag['id'] for tag in tags]
+        self.ingredient_ids = [obj['id'] for obj in ingredients]
+        if not self.recipe_ids:
+            raise RuntimeError(f'{email} has no recipes, seed data first')
+
+
+def recipe_list(ctx, rnd):
+    """List all recipes."""
+    return 'GET', reverse('recipe:recipe-list'), None, None
+
+
+def recipe_list_normalized(ctx, rnd):
+    """List all recipes with side-loaded tags and ingredients."""
+    path = reverse('recipe:recipe-list') + '?format=normalized'
+    return 'GET', path, None, None
+
+
+def recipe_filter(ctx, rnd):
+    """List recipes filtered by tags and ingredients."""
+    tags = rnd.sample(ctx.tag_ids, min(2, len(ctx.tag_ids)))
+    ingredients = rnd.sample(
+        ctx.ingredient_ids, min(2, len(ctx.ingredient_ids)),
+    )
+    path = reverse('recipe:recipe-list') + '?tags={}&ingredients={}'.format(
+        ','.join(map(str, tags)),
+        ','.join(map(str, ingredients)),
+    )
+    return 'GET', path, None, None
+
+
+def recipe_detail(ctx, rnd):
+    """Retrieve a single recipe."""
+    recipe_id = rnd.choice(ctx.recipe_ids)
+    return 'GET', reverse('recipe:recipe-detail', args=[recipe_id]), None, None
+
+
+def recipe_multi_get(ctx, rnd):
+    """Get the details of up to 50 recipes at once."""
+    ids = rnd.sample(ctx.recipe_ids, min(50, len(ctx.recipe_ids)))
+    path = reverse('recipe:recipe-list') + '?ids=' + ','.join(map(str, ids))
+    return 'GET', path, None, None
+
+
+def recipe_create(ctx, rnd):
+    """Create a recipe with new and existing tags and ingredients."""
+    data = {
+        'title': 'Benchmark recipe',
+        'time_minutes': rnd.randint(5, 120),
+        'price': str(Decimal(rnd.randint(100, 5000)) / 100),
+        'tags': [{'name': f'tag-{rnd.randint(0, 30)}'} for _ in range(3)],
+        'ingredients': [
+            {'name': f'ingredient-{rnd.randint(0, 80)}'} for _ in range(5)
+        ],
+    }
+    return 'POST', reverse('recipe:recipe-list'), data, None
+
+
+def upload_image(ctx, rnd):
+    """Upload an image to a recipe."""
+    recipe_id = rnd.choice(ctx.recipe_ids)
+    path = reverse('recipe:recipe-upload-image', args=[recipe_id])
+    return 'POST', path, None, {'image': _image()}
+
+
+def token(ctx, rnd):
+    """Obtain an auth token with email and password."""
+    data = {'email': ctx.email, 'password': seed.PASSWORD}
+    return 'POST', reverse('user:token'), data, None
+
+
+SCENARIOS = {
+    'list': recipe_list,
+    'list-normalized': recipe_list_normalized,
+    'filter': recipe_filter,
+    'detail': recipe_detail,
+    'multi-get': recipe_multi_get,
+    'create': recipe_create,
+    'upload-image': upload_image,
+    'token': token,
+}
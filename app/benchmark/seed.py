@@ -0,0 +1,206 @@
+"""
+Seed the database with a reproducible benchmark dataset.
+"""
+import random
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from recipe.serializers import RecipeSerializer
+
+
+PASSWORD = 'benchpass123'
+EMAIL_TEMPLATE = 'bench-{index}@example.com'
+DISTRIBUTIONS = ('uniform', 'zipf')
+
+
+def _picker(rnd, population, distribution):
+    """Return a function choosing k distinct items from population."""
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f'Unknown distribution {distribution!r}')
+    if not population:
+        return lambda k: []
+    if distribution == 'zipf':
+        # A few popular tags/ingredients, as in real recipe collections.
+        weights = [1 / rank for rank in range(1, len(population) + 1)]
+    else:
+        weights = None
+
+    def pick(k):
+        k = min(k, len(population))
+        chosen = {}
+        while len(chosen) < k:
+            item = rnd.choices(population, weights=weights)[0]
+            chosen[item.pk] = item
+        return list(chosen.values())
+
+    return pick
+
+
+def _links(recipes, field, pick, per_recipe, rnd):
+    """Build the M2M through rows linking recipes to picked objects."""
+    through = getattr(Recipe, field).through
+    target = through._meta.get_field(field[:-1]).attname
+    rows = []
+    for recipe in recipes:
+        for obj in pick(rnd.randint(0, per_recipe)):
+            rows.append(through(recipe_id=recipe.pk, **{target: obj.pk}))
+    return rows
+
+
+def seed_user(
+    user,
+    recipes=100,
+    tags=20,
+    ingredients=50,
+    tags_per_recipe=3,
+    ingredients_per_recipe=8,
+    distribution='uniform',
+    rnd=None,
+    batch_size=1000,
+):
+    """Add recipes, tags and ingredients to an existing user."""
+    rnd = rnd or random.Random(user.pk)
+    first_tag = Tag.objects.filter(user=user).count()
+    first_ingredient = Ingredient.objects.filter(user=user).count()
+    first_recipe = Recipe.objects.filter(user=user).count()
+    new_tags = Tag.objects.bulk_create(
+        [
+            Tag(user=user, name=f'tag-{n}')
+            for n in range(first_tag, first_tag + tags)
+        ],
+        batch_size=batch_size,
+    )
+    new_ingredients = Ingredient.objects.bulk_create(
+        [
+            Ingredient(user=user, name=f'ingredient-{n}')
+            for n in range(first_ingredient, first_ingredient + ingredients)
+        ],
+        batch_size=batch_size,
+    )
+    new_recipes = Recipe.objects.bulk_create(
+        [
+            Recipe(
+                user=user,
+                title=f'Recipe {n}',
+                description=f'Benchmark recipe {n}',
+                time_minutes=rnd.randint(5, 180),
+                price=Decimal(rnd.randint(100, 5000)) / 100,
+                link=f'https://example.com/recipe/{n}',
+            )
+            for n in range(first_recipe, first_recipe + recipes)
+        ],
+        batch_size=batch_size,
+    )
+    # bulk_create does not set primary keys on every backend.
+    if any(obj.pk is None for obj in new_tags + new_ingredients + new_recipes):
+        new_tags = Tag.objects.filter(user=user).order_by('id')[first_tag:]
+        new_ingredients = Ingredient.objects.filter(
+            user=user,
+        ).order_by('id')[first_ingredient:]
+        new_recipes = Recipe.objects.filter(
+            user=user,
+        ).order_by('id')[first_recipe:]
+    tags = list(Tag.objects.filter(user=user).order_by('id'))
+    ingredients = list(Ingredient.objects.filter(user=user).order_by('id'))
+
+    Recipe.tags.through.objects.bulk_create(
+        _links(
+            new_recipes, 'tags', _picker(rnd, tags, distribution),
+            tags_per_recipe, rnd,
+        ),
+        batch_size=batch_size,
+    )
+    Recipe.ingredients.through.objects.bulk_create(
+        _links(
+            new_recipes, 'ingredients',
+            _picker(rnd, ingredients, distribution),
+            ingredients_per_recipe, rnd,
+        ),
+        batch_size=batch_size,
+    )
+
+    return new_recipes
+
+
+@transaction.atomic
+def seed(
+    users=10,
+    recipes_per_user=100,
+    tags_per_user=20,
+    ingredients_per_user=50,
+    tags_per_recipe=3,
+    ingredients_per_recipe=8,
+    distribution='uniform',
+    random_seed=42,
+    batch_size=1000,
+    first_user=0,
+):
+    """
+    Create users owning recipes, tags and ingredients.
+
+    Each recipe gets between 0 and tags_per_recipe tags and between 0 and
+    ingredients_per_recipe ingredients chosen with the given distribution.
+    The same arguments always produce the same dataset.
+    """
+    rnd = random.Random(random_seed)
+    password = make_password(PASSWORD)
+    user_model = get_user_model()
+
+    created = user_model.objects.bulk_create(
+        [
+            user_model(
+                email=EMAIL_TEMPLATE.format(index=index),
+                name=f'Bench user {index}',
+                password=password,
+            )
+            for index in range(first_user, first_user + users)
+        ],
+        batch_size=batch_size,
+    )
+    # bulk_create does not set primary keys on every backend.
+    created = list(
+        user_model.objects.filter(
+            email__in=[user.email for user in created],
+        ).order_by('id')
+    )
+
+    for user in created:
+        seed_user(
+            user,
+            recipes=recipes_per_user,
+            tags=tags_per_user,
+            ingredients=ingredients_per_user,
+            tags_per_recipe=tags_per_recipe,
+            ingredients_per_recipe=ingredients_per_recipe,
+            distribution=distribution,
+            rnd=rnd,
+            batch_size=batch_size,
+        )
+
+    return created
+
+
+def recipe_list_data(email, recipes):
+    """
+    Return the serialized list of a user with this many recipes, created
+    in a transaction rolled back before returning.
+    """
+    with transaction.atomic():
+        user = get_user_model().objects.create_user(email=email)
+        seed_user(user, recipes=recipes)
+        data = RecipeSerializer(
+            Recipe.objects.filter(user=user).prefetch_related(
+                'tags', 'ingredients',
+            ),
+            many=True,
+        ).data
+        transaction.set_rollback(True)
+    return data
@@ -0,0 +1,126 @@
+"""
+Tests for the benchmark suite.
+"""
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from core import throttling
+from core.models import Recipe, Tag
+
+from benchmark import report, seed
+from benchmark.clients import InProcessClient
+from benchmark.runner import run_scenario
+from benchmark.scenarios import SCENARIOS
+
+
+class SeedTests(TestCase):
+    """Test seeding benchmark data."""
+
+    def test_seed_counts(self):
+        """Test the seeder creates the requested number of objects."""
+        seed.seed(users=2, recipes_per_user=5, tags_per_user=4,
+                  ingredients_per_user=6)
+
+        self.assertEqual(get_user_model().objects.count(), 2)
+        self.assertEqual(Recipe.objects.count(), 10)
+        self.assertEqual(Tag.objects.count(), 8)
+        for recipe in Recipe.objects.all():
+            self.assertLessEqual(recipe.tags.count(), 3)
+            self.assertEqual(recipe.tags.exclude(user=recipe.user).count(), 0)
+
+    def test_seed_reproducible(self):
+        """Test the same seed produces the same links."""
+        def links():
+            return sorted(
+                (recipe.title, tag.name)
+                for recipe in Recipe.objects.all()
+                for tag in recipe.tags.all()
+            )
+
+        seed.seed(users=1, recipes_per_user=5, distribution='zipf')
+        first = links()
+        Recipe.objects.all().delete()
+        get_user_model().objects.all().delete()
+        seed.seed(users=1, recipes_per_user=5, distribution='zipf')
+
+        self.assertEqual(first, links())
+
+
+class RunnerTests(TestCase):
+    """Test running scenarios in-process."""
+
+    def setUp(self):
+        seed.seed(users=1, recipes_per_user=5)
+        self.emails = [seed.EMAIL_TEMPLATE.format(index=0)]
+
+    def test_run_all_scenarios(self):
+        """Test every scenario succeeds and reports query counts."""
+        with tempfile.TemporaryDirectory() as media, \
+                override_settings(MEDIA_ROOT=media):
+            for name in SCENARIOS:
+                samples = run_scenario(name, InProcessClient, self.emails,
+                                       requests=3, warmup=1)
+                summary = report.summarize(samples)
+
+                self.assertEqual(summary['requests'], 3, name)
+                self.assertEqual(summary['errors'], 0, name)
+                self.assertGreater(summary['queries_per_request'], 0, name)
+
+    def test_command_not_throttled(self):
+        """Test the benchmark command runs with the API throttled."""
+        throttling.get_store().clear()
+        self.addCleanup(throttling.get_store().clear)
+        rates = dict.fromkeys(('user', 'ip', 'login', 'login-account'),
+                              '1/min')
+        out = StringIO()
+
+        with override_settings(THROTTLE_RATES=rates):
+            call_command(
+                'run_benchmark', '--requests', '3', '--warmup', '0',
+                '--scenario', 'token', '--scenario', 'detail',
+                '--scenario', 'list', stdout=out,
+            )
+
+        self.assertIn('detail', out.getvalue())
+
+
+class ReportTests(SimpleTestCase):
+    """Test summarizing and comparing results."""
+
+    def test_percentile(self):
+        """Test nearest-rank percentiles."""
+        values = list(range(1, 101))
+
+        self.assertEqual(report.percentile(values, 50), 50)
+        self.assertEqual(report.percentile(values, 99), 99)
+        self.assertEqual(report.percentile([7], 95), 7)
+        self.assertIsNone(report.percentile([], 50))
+
+    def test_summarize(self):
+        """Test throughput and latency from samples."""
+        samples = [(0.0, 0.01, 200, 3), (0.5, 0.52, 200, 3),
+                   (0.9, 1.0, 500, 5)]
+
+        summary = report.summarize(samples)
+
+        self.assertEqual(summary['requests'], 3)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(summary['throughput'], 3.0)
+        self.assertEqual(summary['p99_ms'], 100.0)
+        self.assertAlmostEqual(summary['queries_per_request'], 3.67)
+
+    def test_compare_flags_regression(self):
+        """Test a slower p95 beyond the threshold is a regression."""
+        baseline = {'scenarios': {'list': {'p95_ms': 10.0},
+                                  'detail': {'p95_ms': 5.0}}}
+        current = {'scenarios': {'list': {'p95_ms': 12.0},
+                                 'detail': {'p95_ms': 5.1}}}
+
+        rows = {row[0]: row for row in report.compare(baseline, current)}
+
+        self.assertTrue(rows['list'][4])
+        self.assertFalse(rows['detail'][4])
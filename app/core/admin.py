@@ -48,3 +48,18 @@ admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Recipe)
 admin.site.register(models.Tag)
 admin.site.register(models.Ingredient)
+
+
+class AuthTokenAdmin(admin.ModelAdmin):
+    """Define the admin pages for auth tokens."""
+    list_display = ['prefix', 'user', 'device', 'created', 'expires']
+    list_select_related = ['user']
+    search_fields = ['prefix', 'user__email']
+    fields = ['user', 'device', 'prefix', 'created', 'expires']
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(models.AuthToken, AuthTokenAdmin)
@@ -0,0 +1,111 @@
+"""
+Authentication with expiring, revocable API tokens.
+
+Tokens look like '<prefix>.<secret>'. The prefix is stored in clear with
+a unique index and finds the row in one indexed query, the secret is
+stored as a sha256 digest and compared in constant time. Prefixes that
+were revoked, expired or never existed are remembered in process memory
+for a while, so clients retrying a dead token cost no query.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.models import AuthToken
+
+
+class RevocationList:
+    """Token prefixes known to be invalid, forgotten after a timeout."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self.prefixes = OrderedDict()
+        self.lock = threading.Lock()
+
+    def add(self, prefix):
+        """Remember prefix as invalid for AUTH_TOKEN_REVOCATION_CACHE."""
+        until = time.monotonic() + settings.AUTH_TOKEN_REVOCATION_CACHE
+        with self.lock:
+            self.prefixes.pop(prefix, None)
+            self.prefixes[prefix] = until
+            if len(self.prefixes) > self.max_keys:
+                self.prefixes.popitem(last=False)
+
+    def __contains__(self, prefix):
+        with self.lock:
+            until = self.prefixes.get(prefix)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self.prefixes[prefix]
+                return False
+            return True
+
+    def clear(self):
+        """Forget all prefixes."""
+        with self.lock:
+            self.prefixes.clear()
+
+
+revoked = RevocationList()
+
+
+def split_key(key):
+    """Return the prefix and secret of a token key, None if malformed."""
+    prefix, sep, secret = key.partition('.')
+    if not sep or len(prefix) != AuthToken.PREFIX_LENGTH or not secret:
+        return None
+    return prefix, secret
+
+
+def revoke_tokens(tokens):
+    """Delete the tokens of a queryset and remember their prefixes."""
+    prefixes = list(tokens.values_list('prefix', flat=True))
+    tokens.delete()
+    for prefix in prefixes:
+        revoked.add(prefix)
+    return len(prefixes)
+
+
+class ExpiringTokenAuthentication(TokenAuthentication):
+    """
+    Token authentication against hashed, expiring AuthToken rows.
+
+    Clients send 'Authorization: Token <key>' as with DRF's tokens.
+    """
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        parts = split_key(key)
+        if parts is None:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        prefix, secret = parts
+        if prefix in revoked:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        try:
+            token = AuthToken.objects.select_related('user').get(
+                prefix=prefix,
+            )
+        except AuthToken.DoesNotExist:
+            revoked.add(prefix)
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.matches(secret):
+            # Do not remember the prefix, the real token must keep working.
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+        if token.is_expired:
+            revoked.add(prefix)
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.'),
+            )
+
+        return token.user, token
@@ -0,0 +1,154 @@
+"""
+Readiness checks for the service dependencies.
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent import futures
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.db.migrations.executor import MigrationExecutor
+
+
+def check_database(alias='default'):
+    """Check the database accepts connections and answers a query."""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Ends with the connection, closed below.
+                cursor.execute('SET statement_timeout = %s', [
+                    int(settings.HEALTH_CHECK_TIMEOUT * 1000),
+                ])
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+    finally:
+        connection.close()
+
+
+def check_migrations(alias='default'):
+    """Check there are no unapplied migrations."""
+    try:
+        executor = MigrationExecutor(connections[alias])
+        targets = executor.loader.graph.leaf_nodes()
+        plan = executor.migration_plan(targets)
+    finally:
+        connections[alias].close()
+    if plan:
+        pending = ', '.join(f'{m.app_label}.{m.name}' for m, _ in plan)
+        raise RuntimeError(f'Unapplied migrations: {pending}')
+
+
+def check_media():
+    """Check the media volume is writable."""
+    with tempfile.NamedTemporaryFile(
+        dir=settings.MEDIA_ROOT,
+        prefix='.health-',
+    ) as tmp:
+        tmp.write(b'ok')
+        tmp.flush()
+        os.fsync(tmp.fileno())
+
+
+def check_cache():
+    """Check every configured cache backend can store and return a value."""
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        key = f'health-check:{uuid.uuid4().hex}'
+        cache.set(key, 1, timeout=5)
+        value = cache.get(key)
+        cache.delete(key)
+        if value != 1:
+            raise RuntimeError(f'Cache {alias!r} did not return stored value')
+
+
+CHECKS = {
+    'database': check_database,
+    'migrations': check_migrations,
+    'media': check_media,
+    'cache': check_cache,
+}
+
+_executor = futures.ThreadPoolExecutor(
+    max_workers=len(CHECKS),
+    thread_name_prefix='health-check',
+)
+_lock = threading.Lock()
+_cached = {'expires': 0.0, 'result': None}
+# The running future of each check, a check still hanging from an earlier
+# probe is awaited again instead of taking another worker.
+_running = {}
+_running_lock = threading.Lock()
+
+
+def _timed(func):
+    """Run a check and return its outcome with the time it took."""
+    start = time.perf_counter()
+    try:
+        func()
+        error = None
+    except Exception as exc:
+        error = f'{exc.__class__.__name__}: {exc}'
+    latency = (time.perf_counter() - start) * 1000
+    return error, latency
+
+
+def _submit(func):
+    """Return the future of a check, started unless one is running."""
+    with _running_lock:
+        future = _running.get(func)
+        if future is None or future.done():
+            future = _running[func] = _executor.submit(_timed, func)
+        return future
+
+
+def run_checks(timeout=None):
+    """Run all checks concurrently and return the result of each."""
+    if timeout is None:
+        timeout = settings.HEALTH_CHECK_TIMEOUT
+    start = time.perf_counter()
+    pending = {name: _submit(func) for name, func in CHECKS.items()}
+    results = {}
+    for name, future in pending.items():
+        remaining = max(timeout - (time.perf_counter() - start), 0)
+        try:
+            error, latency = future.result(timeout=remaining)
+        except futures.TimeoutError:
+            error = f'Timed out after {timeout}s'
+            latency = timeout * 1000
+        results[name] = {'ok': error is None, 'latency_ms': round(latency, 2)}
+        if error is not None:
+            results[name]['error'] = error
+
+    return results
+
+
+def readiness():
+    """
+    Return the readiness report, reusing a recent one so probes
+    hitting every worker do not turn into database load.
+    """
+    with _lock:
+        now = time.monotonic()
+        if _cached['result'] is not None and now < _cached['expires']:
+            return dict(_cached['result'], cached=True)
+        checks = run_checks()
+        result = {
+            'ready': all(check['ok'] for check in checks.values()),
+            'checks': checks,
+        }
+        _cached['result'] = result
+        _cached['expires'] = now + settings.HEALTH_CHECK_CACHE_SECONDS
+
+    return dict(result, cached=False)
+
+
+def reset_cache():
+    """Forget the cached readiness report."""
+    with _lock:
+        _cached['result'] = None
+        _cached['expires'] = 0.0
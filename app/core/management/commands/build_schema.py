@@ -0,0 +1,20 @@
+"""
+Django command to build the OpenAPI schema at deploy time.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import schema
+
+
+class Command(BaseCommand):
+    """Django command to write the API schema file."""
+
+    help = 'Generate the OpenAPI schema once and write it to API_SCHEMA_FILE.'
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        schema.write_schema_file(schema.generate_schema())
+        self.stdout.write(self.style.SUCCESS(
+            f'Schema written to {settings.API_SCHEMA_FILE}'
+        ))
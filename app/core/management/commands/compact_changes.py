@@ -0,0 +1,68 @@
+"""
+Django command to compact the change log of the sync API.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from core.models import Change
+
+
+# Changes of transactions in flight when a sync token was issued can be a
+# little older than the token.
+SLACK = timedelta(hours=1)
+
+
+def superseded():
+    """Return the changes of objects changed again later."""
+    return Change.objects.filter(Exists(Change.objects.filter(
+        user=OuterRef('user'),
+        kind=OuterRef('kind'),
+        object_id=OuterRef('object_id'),
+        seq__gt=OuterRef('seq'),
+    )))
+
+
+class Command(BaseCommand):
+    """Django command to compact the change log in batches."""
+
+    help = (
+        'Delete the changes of objects changed again later and the changes '
+        'older than SYNC_RETENTION, a batch at a time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options['batch_size']
+        cutoff = timezone.now() - SLACK - timedelta(
+            seconds=settings.SYNC_RETENTION,
+        )
+        expired = 0
+        while True:
+            ids = list(Change.objects.filter(created__lt=cutoff).values_list(
+                'id', flat=True,
+            )[:batch_size])
+            if not ids:
+                break
+            expired += Change.objects.filter(id__in=ids).delete()[0]
+
+        compacted = 0
+        last = 0
+        while True:
+            ids = list(Change.objects.filter(id__gt=last).order_by(
+                'id',
+            ).values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            last = ids[-1]
+            compacted += superseded().filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {expired} expired and {compacted} superseded changes.'
+        ))
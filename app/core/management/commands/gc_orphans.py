@@ -0,0 +1,116 @@
+"""
+Django command to remove tags and ingredients no recipe uses.
+"""
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from core.models import Recipe, Tag, Ingredient, User
+from recipe.sync import record_changes
+
+
+def orphans(model):
+    """Return the rows of model no live recipe refers to."""
+    through = getattr(Recipe, model._meta.model_name + 's').through
+    used = through.objects.filter(
+        **{f'{model._meta.model_name}_id': OuterRef('pk')},
+        recipe__deleted_at__isnull=True,
+    )
+    return model.objects.filter(~Exists(used))
+
+
+class Command(BaseCommand):
+    """Django command to collect orphaned tags and ingredients."""
+
+    help = (
+        'Delete, or archive with --archive, the tags and ingredients no '
+        'recipe refers to. The tables are scanned in chunks of ids, each '
+        'checked with one anti-join query. Removals are logged to the '
+        'change log of their users for the sync API.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--user', help='Only collect rows of this email.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count orphans without changing anything.')
+        parser.add_argument('--archive', action='store_true',
+                            help='Mark orphans as deleted instead, they are '
+                                 'removed by purge_deleted.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(email=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f'No user {options["user"]}.')
+
+        verb = 'would remove' if options['dry_run'] else (
+            'archived' if options['archive'] else 'deleted'
+        )
+        for label, model in (('tags', Tag), ('ingredients', Ingredient)):
+            start = time.perf_counter()
+            scanned, found = self.collect(model, user, options)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{label}: scanned {scanned}, {verb} {found} in '
+                f'{elapsed:.2f}s ({scanned / max(elapsed, 1e-9):.0f} rows/s)'
+            )
+
+    def collect(self, model, user, options):
+        """Collect the orphans of model, return rows scanned and found."""
+        rows = model.objects.all()
+        if user is not None:
+            rows = rows.filter(user=user)
+        scanned = found = 0
+        last = 0
+        while True:
+            ids = list(rows.filter(id__gt=last).order_by('id').values_list(
+                'id', flat=True,
+            )[:options['chunk_size']])
+            if not ids:
+                return scanned, found
+            last = ids[-1]
+            scanned += len(ids)
+            chunk = orphans(model).filter(id__in=ids)
+            if options['dry_run']:
+                found += chunk.count()
+                continue
+            with transaction.atomic():
+                locked = self.lock(chunk)
+                # Links committed while waiting for the locks count, so
+                # the orphans are checked again before removing them.
+                owners = dict(orphans(model).filter(
+                    id__in=locked,
+                ).values_list('id', 'user_id'))
+                removed = model.all_objects.filter(id__in=list(owners))
+                if options['archive']:
+                    removed.soft_delete()
+                else:
+                    removed.delete()
+                found += len(owners)
+                self.record(model, list(owners), owners)
+
+    def lock(self, chunk):
+        """
+        Lock the rows of chunk and return their ids, recipes linking one
+        of them from then on wait for the transaction.
+        """
+        return list(chunk.select_for_update(of=('self',)).values_list(
+            'id', flat=True,
+        ))
+
+    def record(self, model, removed, owners):
+        """Log the removal of rows to the change log of their users."""
+        by_user = defaultdict(list)
+        for pk in removed:
+            by_user[owners[pk]].append(pk)
+        users = User.objects.in_bulk(list(by_user))
+        kind = model._meta.model_name + 's'
+        for user_id, ids in by_user.items():
+            record_changes(users[user_id], **{kind: ids})
@@ -0,0 +1,32 @@
+"""
+Django command to delete expired auth tokens.
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    """Django command to delete expired auth tokens in batches."""
+
+    help = 'Delete expired auth tokens, a batch at a time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        now = timezone.now()
+        total = 0
+        while True:
+            ids = list(AuthToken.objects.filter(expires__lte=now).values_list(
+                'id', flat=True,
+            )[:options['batch_size']])
+            if not ids:
+                break
+            total += AuthToken.objects.filter(id__in=ids).delete()[0]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Deleted {total} expired tokens.'
+        ))
@@ -0,0 +1,106 @@
+"""
+Django command to measure the import cost of starting a worker.
+"""
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+SCRIPT = (
+    'import time; start = time.perf_counter(); '
+    'import {module}; '
+    'from django.urls import resolve; '
+    '[resolve(path) for path in {paths!r}]; '
+    'print(time.perf_counter() - start)'
+)
+
+
+def parse_importtime(output):
+    """Return (module, self us, cumulative us) rows of -X importtime output."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(self_us), int(cumulative)))
+    return rows
+
+
+def group_by_package(rows):
+    """Return the total self time of each top level package."""
+    totals = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split('.')[0]] += self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+class Command(BaseCommand):
+    """Django command to profile worker start up."""
+
+    help = (
+        'Import the WSGI application in a fresh interpreter and report '
+        'the import cost per module and per package.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', default='app.wsgi',
+                            help='Module a worker imports on start up.')
+        parser.add_argument(
+            '--path', action='append', default=[],
+            help='Resolve this URL path after the import, as the first '
+                 'request would. May be repeated.',
+        )
+        parser.add_argument(
+            '--warmup', action='store_true',
+            help='Include the warm up done when the WSGI module is loaded, '
+                 'which connects to the database.',
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs to take the fastest wall time of.')
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+        if not options['warmup']:
+            env['WSGI_WARMUP'] = '0'
+        walls = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            proc = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c',
+                 SCRIPT.format(
+                     module=options['module'], paths=options['path'],
+                 )],
+                capture_output=True, text=True, env=env,
+            )
+            if proc.returncode:
+                raise CommandError(proc.stderr.strip().splitlines()[-1])
+            walls.append((
+                float(proc.stdout.strip().splitlines()[-1]),
+                time.perf_counter() - start,
+            ))
+            rows = parse_importtime(proc.stderr)
+
+        top = options['top']
+        import_wall, process_wall = min(walls)
+        self.stdout.write(
+            f'{options["module"]}: import {import_wall * 1000:.1f}ms, '
+            f'process {process_wall * 1000:.1f}ms, {len(rows)} modules\n'
+        )
+        self.stdout.write('Packages by self time:')
+        for name, self_us in group_by_package(rows)[:top]:
+            self.stdout.write(f'  {self_us / 1000:9.1f}ms  {name}')
+        self.stdout.write('\nModules by self time:')
+        for name, self_us, cumulative in sorted(
+            rows, key=lambda row: row[1], reverse=True,
+        )[:top]:
+            self.stdout.write(
+                f'  {self_us / 1000:9.1f}ms  '
+                f'({cumulative / 1000:.1f}ms cumulative)  {name}'
+            )
@@ -0,0 +1,269 @@
+"""
+Middleware of the API.
+
+CompressionMiddleware compresses responses with gzip, or brotli and zstd
+when their packages are installed, picking the encoding with the
+Accept-Encoding header. Bodies smaller than COMPRESSION_MIN_SIZE are sent
+as is, streamed ones are compressed chunk by chunk.
+
+A compressed response is a different representation, so its ETag gets the
+encoding as a suffix, '"<tag>-gzip"'. The suffix is removed from the
+If-Match and If-None-Match headers before the views compare them with
+their own tags.
+
+The session, CSRF, authentication and messages middleware only serve the
+admin, the API authenticates with tokens. Their subclasses here pass the
+requests under TOKEN_API_PATHS straight through.
+"""
+import gzip
+import re
+import zlib
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import csrf
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+class GzipCodec:
+    """gzip, from the standard library."""
+    name = 'gzip'
+
+    def compress(self, data, level):
+        # No timestamp, the same body always gives the same bytes.
+        return gzip.compress(data, level, mtime=0)
+
+    def compressor(self, level):
+        return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class BrotliCompressor:
+    """Streaming brotli with the interface of zlib compressors."""
+
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+class BrotliCodec:
+    """brotli, needs the brotli package."""
+    name = 'br'
+
+    def compress(self, data, level):
+        return brotli.compress(data, quality=level)
+
+    def compressor(self, level):
+        return BrotliCompressor(level)
+
+
+class ZstdCodec:
+    """Zstandard, needs the zstandard package."""
+    name = 'zstd'
+
+    def compress(self, data, level):
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def compressor(self, level):
+        return zstandard.ZstdCompressor(level=level).compressobj()
+
+
+CODECS = {
+    codec.name: codec for codec, available in (
+        (BrotliCodec(), brotli is not None),
+        (ZstdCodec(), zstandard is not None),
+        (GzipCodec(), True),
+    ) if available
+}
+
+ETAG_SUFFIX = re.compile(r'-(%s)"' % '|'.join(map(re.escape, CODECS)))
+
+
+def parse_accept_encoding(header):
+    """Return the quality of each coding in an Accept-Encoding header."""
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def negotiate(header, encodings):
+    """
+    Return the first of encodings with the highest quality in an
+    Accept-Encoding header, None if it accepts none of them.
+    """
+    qualities = parse_accept_encoding(header)
+    default = qualities.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for encoding in encodings:
+        quality = qualities.get(encoding, default)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compression_levels(content_type):
+    """
+    Return the level of each encoding for a content type, None if it is
+    not compressed.
+    """
+    levels = settings.COMPRESSION_LEVELS
+    media_type = content_type.split(';')[0].strip().lower()
+    if media_type in levels:
+        return levels[media_type]
+    return levels.get(media_type.split('/')[0] + '/*')
+
+
+def compress_stream(codec, level, chunks):
+    """Compress an iterable of chunks, yielding what the codec outputs."""
+    compressor = codec.compressor(level)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def strip_etag_suffixes(request):
+    """
+    Remove the encoding suffixes of the tags in the If-Match and
+    If-None-Match headers of request, return the one of If-None-Match.
+    """
+    suffix = None
+    for header in ('HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH'):
+        value = request.META.get(header)
+        if value:
+            match = ETAG_SUFFIX.search(value)
+            if match is None:
+                continue
+            if header == 'HTTP_IF_NONE_MATCH':
+                suffix = match.group(1)
+            request.META[header] = ETAG_SUFFIX.sub('"', value)
+    return suffix
+
+
+def add_etag_suffix(response, encoding):
+    """Tag the ETag of response as the representation with encoding."""
+    etag = response.get('ETag')
+    if etag and etag.endswith('"'):
+        response['ETag'] = f'{etag[:-1]}-{encoding}"'
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.encodings = [
+            name for name in settings.COMPRESSION_ENCODINGS if name in CODECS
+        ]
+
+    def __call__(self, request):
+        suffix = strip_etag_suffixes(request)
+        response = self.get_response(request)
+        if response.status_code == 304:
+            if suffix:
+                add_etag_suffix(response, suffix)
+            return response
+        if (response.status_code in (204, 206)
+                or response.has_header('Content-Encoding')
+                or 'no-transform' in response.get('Cache-Control', '')):
+            return response
+        levels = compression_levels(response.get('Content-Type', ''))
+        if not levels:
+            return response
+        if not response.streaming and \
+                len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''),
+            [name for name in self.encodings if name in levels],
+        )
+        if encoding is None:
+            return response
+        codec, level = CODECS[encoding], levels[encoding]
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                codec, level, response.streaming_content,
+            )
+            if response.has_header('Content-Length'):
+                del response['Content-Length']
+        else:
+            content = codec.compress(response.content, level)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        add_etag_suffix(response, encoding)
+        response['Content-Encoding'] = encoding
+        return response
+
+
+def is_token_api_path(request):
+    """Return whether request is for an API authenticated with tokens."""
+    return request.path_info.startswith(tuple(settings.TOKEN_API_PATHS))
+
+
+class BrowserOnlyMixin:
+    """Skip the middleware for the token authenticated API paths."""
+
+    def __call__(self, request):
+        if is_token_api_path(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(BrowserOnlyMixin,
+                        sessions_middleware.SessionMiddleware):
+    """Sessions, but not for the API."""
+
+
+class CsrfViewMiddleware(BrowserOnlyMixin, csrf.CsrfViewMiddleware):
+    """CSRF protection of the session authenticated pages."""
+
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        if is_token_api_path(request):
+            return None
+        return super().process_view(
+            request, callback, callback_args, callback_kwargs,
+        )
+
+
+class AuthenticationMiddleware(BrowserOnlyMixin,
+                               auth_middleware.AuthenticationMiddleware):
+    """Session users, the API sets request.user itself."""
+
+
+class MessageMiddleware(BrowserOnlyMixin,
+                        messages_middleware.MessageMiddleware):
+    """Messages, but not for the API."""
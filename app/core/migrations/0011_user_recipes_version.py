@@ -0,0 +1,18 @@
+# Generated by Django 4.0.10 on 2026-10-19 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_recipe_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='recipes_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
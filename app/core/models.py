@@ -1,11 +1,17 @@
 """
 data base models
 """
+import hashlib
+import hmac
+import secrets
 import uuid
 import os
+from datetime import timedelta
 
 from django.conf import settings
-from django.db import models
+from django.core.validators import MinValueValidator
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -21,6 +27,45 @@ def recipe_image_file_path(instance, filename):
     return os.path.join('uploads', 'recipe', filename)
 
 
+class SoftDeleteQuerySet(models.QuerySet):
+    """queryset able to mark its rows as deleted"""
+    def soft_delete(self):
+        """mark the rows as deleted, return their number"""
+        return self.update(deleted_at=timezone.now())
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """manager hiding rows marked as deleted"""
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    """
+    model whose rows are marked as deleted and later removed in batches by
+    the purge_deleted command, objects hides them and all_objects does not
+    """
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = SoftDeleteManager()
+    all_objects = models.Manager.from_queryset(SoftDeleteQuerySet)()
+
+    class Meta:
+        abstract = True
+        indexes = [
+            models.Index(
+                fields=['deleted_at'],
+                name='%(app_label)s_%(class)s_deleted',
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+        ]
+
+    def soft_delete(self):
+        """mark the row as deleted"""
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+
 class UserManager(BaseUserManager):
     """manger for users"""
     def create_user(self, email, password=None, **extra_fields):
@@ -49,13 +94,35 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=255)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False)
+    # Incremented by every write to the recipes, tags or ingredients of the
+    # user, numbering its changes, see recipe.sync
+    recipes_version = models.PositiveIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['deleted_at'],
+                name='core_user_deleted',
+                condition=models.Q(deleted_at__isnull=False),
+            ),
+        ]
+
+    def soft_delete(self):
+        """
+        deactivate the user and mark it as deleted, its data is removed
+        by the purge_deleted command
+        """
+        self.is_active = False
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['is_active', 'deleted_at'])
 
-class Recipe(models.Model):
+
+class Recipe(SoftDeleteModel):
     """Recipe object"""
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -64,17 +131,47 @@ class Recipe(models.Model):
     title = models.CharField(max_length=255)
     description = models.TextField(blank=True)
     time_minutes = models.IntegerField()
+    servings = models.PositiveSmallIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+    )
     price = models.DecimalField(max_digits=5, decimal_places=2)
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag', blank=True)
-    ingredients = models.ManyToManyField('Ingredient', blank=True)
+    ingredients = models.ManyToManyField(
+        'Ingredient',
+        blank=True,
+        through='RecipeIngredient',
+    )
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
 
+    class Meta(SoftDeleteModel.Meta):
+        # Filtered and sorted recipe lists of a user scan one of these in
+        # order, including keyset pages after a given (field, id).
+        indexes = SoftDeleteModel.Meta.indexes + [
+            models.Index(
+                fields=['user', field, 'id'],
+                name=f'core_recipe_user_{name}',
+                condition=models.Q(deleted_at__isnull=True),
+            )
+            for field, name in (
+                ('title', 'title'),
+                ('time_minutes', 'time'),
+                ('price', 'price'),
+            )
+        ] + [
+            models.Index(
+                fields=['user', 'id'],
+                name='core_recipe_user_id',
+                condition=models.Q(deleted_at__isnull=True),
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
 
-class Tag(models.Model):
+class Tag(SoftDeleteModel):
     """Tag to be used for a recipe"""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
@@ -86,7 +183,7 @@ class Tag(models.Model):
         return self.name
 
 
-class Ingredient(models.Model):
+class Ingredient(SoftDeleteModel):
     """Ingredient to be used in a recipe"""
     name = models.CharField(max_length=255)
     user = models.ForeignKey(
@@ -96,3 +193,144 @@ class Ingredient(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class RecipeIngredient(models.Model):
+    """
+    Ingredient of a recipe with its quantity, the quantity is also stored
+    in base units (g, ml or pc) for scaling and shopping lists
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='ingredient_amounts',
+    )
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE)
+    quantity = models.DecimalField(
+        max_digits=10, decimal_places=3, null=True, blank=True,
+    )
+    unit = models.CharField(max_length=16, blank=True)
+    order = models.PositiveSmallIntegerField(default=0)
+    base_quantity = models.DecimalField(
+        max_digits=14, decimal_places=3, null=True, blank=True,
+    )
+    base_unit = models.CharField(max_length=16, blank=True)
+
+    class Meta:
+        # The table of the former plain many to many relation.
+        db_table = 'core_recipe_ingredients'
+        ordering = ['order', 'id']
+        unique_together = [('recipe', 'ingredient')]
+
+    def __str__(self):
+        return f'{self.quantity or ""} {self.unit} {self.ingredient}'.strip()
+
+
+class AuthTokenManager(models.Manager):
+    """manager for auth tokens"""
+    def create_token(self, user, device=''):
+        """
+        create a token for a device of the user and return it with its key,
+        replacing the token of a named device and removing the oldest
+        tokens beyond AUTH_TOKEN_MAX_PER_USER
+        """
+        secret = secrets.token_urlsafe(32)
+        # Prefixes are short enough to collide, draw another one if so.
+        for attempt in range(AuthToken.PREFIX_ATTEMPTS):
+            prefix = secrets.token_hex(AuthToken.PREFIX_LENGTH // 2)
+            try:
+                with transaction.atomic():
+                    if device:
+                        self.filter(user=user, device=device).delete()
+                    token = self.create(
+                        user=user,
+                        device=device,
+                        prefix=prefix,
+                        digest=AuthToken.hash_secret(secret),
+                        expires=timezone.now() + timedelta(
+                            seconds=settings.AUTH_TOKEN_TTL,
+                        ),
+                    )
+                break
+            except IntegrityError:
+                if attempt == AuthToken.PREFIX_ATTEMPTS - 1:
+                    raise
+        stale = self.filter(user=user).order_by('-created', '-id').values_list(
+            'id', flat=True,
+        )[settings.AUTH_TOKEN_MAX_PER_USER:]
+        if stale:
+            self.filter(id__in=list(stale)).delete()
+
+        return token, f'{prefix}.{secret}'
+
+
+class AuthToken(models.Model):
+    """
+    API token of a user's device, stored as the sha256 digest of its secret
+    and looked up by a unique public prefix
+    """
+    PREFIX_LENGTH = 8
+    PREFIX_ATTEMPTS = 5
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='auth_tokens',
+    )
+    device = models.CharField(max_length=255, blank=True)
+    prefix = models.CharField(max_length=PREFIX_LENGTH, unique=True)
+    digest = models.CharField(max_length=64)
+    created = models.DateTimeField(auto_now_add=True)
+    expires = models.DateTimeField(db_index=True)
+
+    objects = AuthTokenManager()
+
+    def __str__(self):
+        return f'{self.prefix} ({self.device})' if self.device else self.prefix
+
+    @staticmethod
+    def hash_secret(secret):
+        """return the digest stored for a token secret"""
+        return hashlib.sha256(secret.encode()).hexdigest()
+
+    def matches(self, secret):
+        """return whether secret is the secret of the token"""
+        return hmac.compare_digest(self.digest, self.hash_secret(secret))
+
+    @property
+    def is_expired(self):
+        return self.expires <= timezone.now()
+
+
+class Change(models.Model):
+    """
+    change to a recipe, tag or ingredient of a user, numbered by the
+    recipes_version of the user, read by the sync API
+    """
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    KINDS = [(RECIPE, 'Recipe'), (TAG, 'Tag'), (INGREDIENT, 'Ingredient')]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='changes',
+    )
+    seq = models.PositiveIntegerField()
+    kind = models.CharField(max_length=10, choices=KINDS)
+    object_id = models.BigIntegerField()
+    created = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'seq'], name='core_change_user_seq'),
+            # Finds the later changes of an object when compacting.
+            models.Index(
+                fields=['user', 'kind', 'object_id', 'seq'],
+                name='core_change_object',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} at {self.seq}'
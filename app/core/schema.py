@@ -0,0 +1,76 @@
+"""
+OpenAPI schema generated once per process or at deploy time.
+"""
+import json
+import os
+import threading
+
+from django.conf import settings
+from django.utils import translation
+
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.response import Response
+
+
+_schemas = {}
+_lock = threading.Lock()
+
+
+def generate_schema(version=None):
+    """Generate the schema of the API."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS(
+        api_version=version,
+    )
+    return generator.get_schema(request=None, public=True)
+
+
+def load_schema_file():
+    """Return the schema written by build_schema, or None."""
+    try:
+        with open(settings.API_SCHEMA_FILE) as fileobj:
+            return json.load(fileobj)
+    except (OSError, ValueError):
+        return None
+
+
+def write_schema_file(schema):
+    """Write the schema where load_schema_file reads it."""
+    os.makedirs(os.path.dirname(settings.API_SCHEMA_FILE), exist_ok=True)
+    with open(settings.API_SCHEMA_FILE, 'w') as fileobj:
+        json.dump(schema, fileobj)
+
+
+def get_schema(version=None):
+    """
+    Return the schema, from the file built at deploy time for the default
+    version and language, otherwise generated on first use.
+    """
+    language = translation.get_language()
+    key = (version, language)
+    with _lock:
+        if key not in _schemas:
+            schema = None
+            if version is None and language == settings.LANGUAGE_CODE:
+                schema = load_schema_file()
+            _schemas[key] = schema or generate_schema(version)
+    return _schemas[key]
+
+
+def clear_cache():
+    """Forget the schemas built so far."""
+    with _lock:
+        _schemas.clear()
+
+
+class CachedSchemaView(SpectacularAPIView):
+    """OpenAPI schema, generated once instead of on every request."""
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or \
+            self._get_version_parameter(request)
+        filename = self._get_filename(request, version)
+        return Response(
+            data=get_schema(version),
+            headers={'Content-Disposition': f'inline; filename="{filename}"'},
+        )
@@ -0,0 +1,72 @@
+"""
+Test runner reusing a migrated template database and running in parallel.
+"""
+import hashlib
+import os
+from pathlib import Path
+
+from django.apps import apps
+from django.db import connections
+from django.test.runner import DiscoverRunner, get_max_test_processes
+from django.test.utils import override_settings
+
+
+def migrations_fingerprint():
+    """Return a short hash of the migration files of every installed app."""
+    digest = hashlib.sha1()
+    for app_config in sorted(apps.get_app_configs(), key=lambda a: a.label):
+        migrations = Path(app_config.path) / 'migrations'
+        for path in sorted(migrations.glob('*.py')):
+            digest.update(f'{app_config.label}/{path.name}'.encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:10]
+
+
+class FastTestRunner(DiscoverRunner):
+    """
+    Run tests in parallel by default, with a fast password hasher and no
+    throttling, and keep the migrated test database between runs.
+
+    On PostgreSQL the test database name includes a fingerprint of the
+    migration files, so it is migrated once and reused until a migration
+    changes. Parallel workers are cloned from it with CREATE DATABASE ...
+    TEMPLATE. Set TEST_REUSE_DB=0 to always build a fresh database and
+    TEST_PARALLEL=1 to run serially.
+    """
+
+    def __init__(self, parallel=0, **kwargs):
+        if not parallel:
+            parallel = int(os.environ.get('TEST_PARALLEL', 0)) or \
+                get_max_test_processes()
+        super().__init__(parallel=parallel, **kwargs)
+        self.reuse_db = os.environ.get('TEST_REUSE_DB', '1') == '1'
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        # Hashing with PBKDF2 dominates tests creating users. Throttling
+        # tests set their own rates.
+        self._test_settings = override_settings(
+            PASSWORD_HASHERS=[
+                'django.contrib.auth.hashers.MD5PasswordHasher',
+            ],
+            THROTTLE_RATES={},
+        )
+        self._test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+    def setup_databases(self, **kwargs):
+        if self.reuse_db and not self.keepdb:
+            fingerprint = migrations_fingerprint()
+            for alias in connections:
+                settings_dict = connections[alias].settings_dict
+                if connections[alias].vendor != 'postgresql':
+                    continue
+                if not settings_dict['TEST'].get('NAME'):
+                    settings_dict['TEST']['NAME'] = (
+                        f'test_{settings_dict["NAME"]}_{fingerprint}'
+                    )
+                self.keepdb = True
+        return super().setup_databases(**kwargs)
@@ -0,0 +1,102 @@
+"""
+Factories creating test data, shared by the test modules of every app.
+"""
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+
+
+RECIPE_DEFAULTS = {
+    'title': 'Sample recipe title',
+    'time_minutes': 22,
+    'price': Decimal('5.25'),
+    'description': 'Sample description',
+    'link': 'http://example.com/recipe.pdf',
+}
+
+
+def create_user(email='user@example.com', password='testpass123', **params):
+    """Create and return a new user."""
+    return get_user_model().objects.create_user(
+        email=email,
+        password=password,
+        **params,
+    )
+
+
+def create_users(count, password='testpass123', **params):
+    """Create count users sharing one password hash, in one query."""
+    user_model = get_user_model()
+    encoded = make_password(password)
+    users = [
+        user_model(
+            email=f'user{n}@example.com',
+            password=encoded,
+            **params,
+        )
+        for n in range(count)
+    ]
+    user_model.objects.bulk_create(users)
+    return list(user_model.objects.filter(
+        email__in=[user.email for user in users],
+    ).order_by('id'))
+
+
+def create_recipe(user, **params):
+    """Create and return a sample recipe."""
+    defaults = dict(RECIPE_DEFAULTS, **params)
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def create_tags(user, names):
+    """Create tags with the given names, in one query."""
+    Tag.objects.bulk_create([Tag(user=user, name=name) for name in names])
+    return list(Tag.objects.filter(user=user, name__in=names).order_by('id'))
+
+
+def create_ingredients(user, names):
+    """Create ingredients with the given names, in one query."""
+    Ingredient.objects.bulk_create(
+        [Ingredient(user=user, name=name) for name in names],
+    )
+    return list(
+        Ingredient.objects.filter(user=user, name__in=names).order_by('id')
+    )
+
+
+def create_recipes(user, count, tags=(), ingredients=(), **params):
+    """
+    Create count sample recipes, each linked to all the given tags and
+    ingredients, with one query per table.
+    """
+    first = Recipe.objects.filter(user=user).count()
+    Recipe.objects.bulk_create([
+        Recipe(
+            user=user,
+            **dict(RECIPE_DEFAULTS, title=f'Sample recipe {first + n}',
+                   **params),
+        )
+        for n in range(count)
+    ])
+    recipes = list(Recipe.objects.filter(user=user).order_by('id')[first:])
+    Recipe.tags.through.objects.bulk_create([
+        Recipe.tags.through(recipe_id=recipe.id, tag_id=tag.id)
+        for recipe in recipes
+        for tag in tags
+    ])
+    Recipe.ingredients.through.objects.bulk_create([
+        Recipe.ingredients.through(
+            recipe_id=recipe.id,
+            ingredient_id=ingredient.id,
+        )
+        for recipe in recipes
+        for ingredient in ingredients
+    ])
+    return recipes
@@ -9,6 +9,11 @@ from django.core.management import call_command
 from django.db.utils import OperationalError
 from django.test import SimpleTestCase
 
+from core.management.commands.startup_profile import (
+    parse_importtime,
+    group_by_package,
+)
+
 
 @patch('core.management.commands.wait_for_db.Command.check')
 class CommandTests(SimpleTestCase):
@@ -32,3 +37,24 @@ class CommandTests(SimpleTestCase):
 
         self.assertEqual(patched_check.call_count, 6)
         patched_check.assert_called_with(databases=['default'])
+
+
+class StartupProfileTests(SimpleTestCase):
+    """Test the startup profile command."""
+
+    def test_parse_importtime(self):
+        """Test parsing -X importtime output."""
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       120 |        120 |   django.utils\n'
+            'import time:        80 |        200 | django\n'
+            'import time:        50 |         50 | yaml\n'
+        )
+
+        rows = parse_importtime(output)
+
+        self.assertEqual(rows[0], ('django.utils', 120, 120))
+        self.assertEqual(
+            group_by_package(rows),
+            [('django', 200), ('yaml', 50)],
+        )
@@ -0,0 +1,46 @@
+"""
+Tests for the compact_changes command.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.models import Change
+from core.tests.factories import create_user
+
+
+class CompactChangesTests(TestCase):
+    """Test compacting the change log."""
+
+    def change(self, seq, object_id, **params):
+        """Create a change of a recipe."""
+        return Change.objects.create(
+            user=self.user, seq=seq, kind=Change.RECIPE, object_id=object_id,
+            **params,
+        )
+
+    def setUp(self):
+        self.user = create_user()
+
+    @override_settings(SYNC_RETENTION=3600)
+    def test_compact(self):
+        """Test superseded and expired changes are deleted."""
+        self.change(1, 10, created=timezone.now() - timedelta(days=1))
+        self.change(2, 11)
+        latest = self.change(3, 11)
+        tag = Change.objects.create(
+            user=self.user, seq=3, kind=Change.TAG, object_id=11,
+        )
+        other = Change.objects.create(
+            user=create_user(email='other@example.com'), seq=1,
+            kind=Change.RECIPE, object_id=11,
+        )
+        out = StringIO()
+
+        call_command('compact_changes', batch_size=2, stdout=out)
+
+        self.assertEqual(set(Change.objects.all()), {latest, tag, other})
+        self.assertIn('1 expired and 1 superseded', out.getvalue())
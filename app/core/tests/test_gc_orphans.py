@@ -0,0 +1,99 @@
+"""
+Tests for collecting orphaned tags and ingredients.
+"""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.management.commands.gc_orphans import Command
+from core.models import Tag, Ingredient
+from core.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+)
+
+
+def gc_orphans(**options):
+    """Run gc_orphans in small chunks and return its output."""
+    out = StringIO()
+    call_command('gc_orphans', chunk_size=2, stdout=out, **options)
+    return out.getvalue()
+
+
+class GcOrphansTests(TestCase):
+    """Test the gc_orphans command."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.used_tag, self.orphan_tag, self.stale_tag = create_tags(
+            self.user, ['Used', 'Orphan', 'Stale'],
+        )
+        self.used_ingredient, self.orphan_ingredient = create_ingredients(
+            self.user, ['Used', 'Orphan'],
+        )
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(self.used_tag)
+        recipe.ingredients.add(self.used_ingredient)
+        deleted = create_recipe(user=self.user)
+        deleted.tags.add(self.stale_tag)
+        deleted.soft_delete()
+
+    def test_delete(self):
+        """Test rows used only by deleted recipes or unused are deleted."""
+        out = gc_orphans()
+
+        self.assertEqual(list(Tag.all_objects.all()), [self.used_tag])
+        self.assertEqual(list(Ingredient.all_objects.all()),
+                         [self.used_ingredient])
+        self.assertIn('tags: scanned 3, deleted 2', out)
+        self.assertIn('ingredients: scanned 2, deleted 1', out)
+
+    def test_linked_while_locking(self):
+        """Test rows linked to a recipe before they are locked are kept."""
+        lock = Command.lock
+
+        def lock_and_link(command, chunk):
+            locked = lock(command, chunk)
+            create_recipe(user=self.user).tags.add(self.orphan_tag)
+            return locked
+
+        with patch.object(Command, 'lock', lock_and_link):
+            out = gc_orphans()
+
+        self.assertCountEqual(Tag.all_objects.all(),
+                              [self.used_tag, self.orphan_tag])
+        self.assertIn('tags: scanned 3, deleted 1', out)
+
+    def test_dry_run(self):
+        """Test a dry run only counts orphans."""
+        out = gc_orphans(dry_run=True)
+
+        self.assertEqual(Tag.objects.count(), 3)
+        self.assertIn('tags: scanned 3, would remove 2', out)
+
+    def test_archive(self):
+        """Test archiving marks orphans as deleted."""
+        gc_orphans(archive=True)
+
+        self.assertEqual(list(Tag.objects.all()), [self.used_tag])
+        self.assertEqual(Tag.all_objects.count(), 3)
+
+    def test_user(self):
+        """Test collecting the rows of one user only."""
+        other = create_user(email='other@example.com')
+        create_tags(other, ['Orphan'])
+
+        gc_orphans(user='other@example.com')
+
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 3)
+        self.assertFalse(Tag.objects.filter(user=other).exists())
+
+    def test_unknown_user(self):
+        """Test an unknown user is an error."""
+        with self.assertRaises(CommandError):
+            gc_orphans(user='none@example.com')
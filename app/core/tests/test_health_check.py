@@ -1,13 +1,19 @@
 """
 Test for the health check API
 """
+import tempfile
+import threading
+import time
+from unittest.mock import patch
 
-from http import client
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from core import health
+
+
 class healthCheckTest(TestCase):
     """test the health check API"""
     def test_health_check(self):
@@ -17,3 +23,91 @@ class healthCheckTest(TestCase):
         res = client.get(url)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_liveness(self):
+        """test liveness does not depend on the database"""
+        client = APIClient()
+        with self.assertNumQueries(0):
+            res = client.get(reverse('health-live'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class ReadinessCheckTest(TestCase):
+    """test the readiness API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        health.reset_cache()
+        self.addCleanup(health.reset_cache)
+
+    def test_ready(self):
+        """test readiness reports every check with its latency"""
+        with override_settings(MEDIA_ROOT=self.media.name):
+            res = self.client.get(reverse('health-ready'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.data['ready'])
+        self.assertEqual(set(res.data['checks']), set(health.CHECKS))
+        for check in res.data['checks'].values():
+            self.assertTrue(check['ok'])
+            self.assertIn('latency_ms', check)
+
+    def test_not_ready_when_check_fails(self):
+        """test readiness returns 503 when a dependency is down"""
+        with override_settings(MEDIA_ROOT='/nonexistent/media'):
+            res = self.client.get(reverse('health-ready'))
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(res.data['ready'])
+        self.assertFalse(res.data['checks']['media']['ok'])
+        self.assertIn('error', res.data['checks']['media'])
+
+    def test_result_is_cached(self):
+        """test repeated probes reuse the cached report"""
+        with override_settings(MEDIA_ROOT=self.media.name), \
+                patch.object(health, 'run_checks', wraps=health.run_checks) as run:
+            first = self.client.get(reverse('health-ready'))
+            second = self.client.get(reverse('health-ready'))
+
+        self.assertEqual(run.call_count, 1)
+        self.assertFalse(first.data['cached'])
+        self.assertTrue(second.data['cached'])
+
+    @override_settings(HEALTH_CHECK_TIMEOUT=0.05)
+    def test_check_timeout(self):
+        """test a hanging check is reported as timed out"""
+        def slow():
+            time.sleep(0.5)
+
+        with patch.dict(health.CHECKS, {'database': slow}):
+            results = health.run_checks()
+
+        self.assertFalse(results['database']['ok'])
+        self.assertIn('Timed out', results['database']['error'])
+
+    @override_settings(HEALTH_CHECK_TIMEOUT=0.05)
+    def test_hanging_check_reused(self):
+        """test a check still hanging is awaited again, not run again"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        calls = []
+
+        def hanging():
+            calls.append(1)
+            release.wait(5)
+
+        with patch.dict(health.CHECKS, {'database': hanging}):
+            for _ in range(3):
+                results = health.run_checks()
+                self.assertFalse(results['database']['ok'])
+            self.assertEqual(len(calls), 1)
+
+            release.set()
+            health._running[hanging].result(timeout=5)
+            results = health.run_checks()
+
+        self.assertTrue(results['database']['ok'])
+        self.assertEqual(len(calls), 2)
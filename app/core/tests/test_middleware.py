@@ -0,0 +1,256 @@
+"""
+Tests for the API middleware.
+"""
+import gzip
+import json
+
+import brotli
+import zstandard
+
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import middleware
+from core.middleware import CompressionMiddleware, negotiate
+from core.tests.factories import create_recipes, create_tags, create_user
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+ME_URL = reverse('user:me')
+
+BODY = json.dumps([{'id': n, 'title': f'Recipe {n}'} for n in range(200)])
+
+
+def zstd_decompress(data):
+    """Decompress zstd frames, with or without their content size."""
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+DECODERS = {
+    'gzip': gzip.decompress,
+    'br': brotli.decompress,
+    'zstd': zstd_decompress,
+}
+
+
+def respond(body=BODY, content_type='application/json', **headers):
+    """Return a view returning body."""
+    def get_response(request):
+        response = HttpResponse(body, content_type=content_type)
+        for name, value in headers.items():
+            response[name.replace('_', '-')] = value
+        return response
+    return get_response
+
+
+class NegotiateTests(SimpleTestCase):
+    """Test the choice of encoding from Accept-Encoding."""
+
+    encodings = ['br', 'zstd', 'gzip']
+
+    def test_server_preference(self):
+        """Test equal qualities pick the first encoding of the server."""
+        self.assertEqual(negotiate('gzip, deflate, br', self.encodings), 'br')
+
+    def test_quality(self):
+        """Test the encoding with the highest quality wins."""
+        self.assertEqual(
+            negotiate('br;q=0.5, gzip;q=0.8', self.encodings), 'gzip',
+        )
+
+    def test_wildcard(self):
+        """Test * covers the encodings not listed."""
+        self.assertEqual(negotiate('br;q=0, *', self.encodings), 'zstd')
+
+    def test_refused(self):
+        """Test no encoding is picked when none is accepted."""
+        for header in ('', 'identity', 'deflate', 'gzip;q=0', 'br;q=x'):
+            with self.subTest(header=header):
+                self.assertIsNone(negotiate(header, self.encodings))
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test compressing responses."""
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def call(self, get_response, accept='br, zstd, gzip', **headers):
+        """Return the response of get_response through the middleware."""
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept, **headers)
+        return CompressionMiddleware(get_response)(request)
+
+    def test_encodings(self):
+        """Test each encoding compresses the body it decodes to."""
+        for encoding, decode in DECODERS.items():
+            with self.subTest(encoding=encoding):
+                res = self.call(respond(), accept=encoding)
+
+                self.assertEqual(res['Content-Encoding'], encoding)
+                self.assertEqual(decode(res.content).decode(), BODY)
+                self.assertEqual(res['Content-Length'], str(len(res.content)))
+                self.assertEqual(res['Vary'], 'Accept-Encoding')
+
+    def test_not_accepted(self):
+        """Test clients not accepting an encoding get the body as is."""
+        res = self.call(respond(), accept='')
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertEqual(res.content.decode(), BODY)
+        self.assertEqual(res['Vary'], 'Accept-Encoding')
+
+    @override_settings(COMPRESSION_MIN_SIZE=len(BODY) + 1)
+    def test_small(self):
+        """Test bodies under the minimum size are sent as is."""
+        res = self.call(respond())
+
+        self.assertFalse(res.has_header('Content-Encoding'))
+        self.assertFalse(res.has_header('Vary'))
+
+    @override_settings(COMPRESSION_LEVELS={
+        'application/json': {'gzip': 1},
+        'text/*': {'br': 5},
+        'text/event-stream': None,
+    })
+    def test_content_types(self):
+        """Test levels apply by content type, others are sent as is."""
+        for content_type, encoding in (
+            ('application/json; charset=utf-8', 'gzip'),
+            ('text/csv', 'br'),
+            ('text/event-stream', None),
+            ('image/png', None),
+        ):
+            with self.subTest(content_type=content_type):
+                res = self.call(respond(content_type=content_type))
+
+                self.assertEqual(res.get('Content-Encoding'), encoding)
+
+    def test_skipped(self):
+        """Test encoded and no-transform responses are left alone."""
+        for headers in ({'Content_Encoding': 'identity'},
+                        {'Cache_Control': 'private, no-transform'}):
+            with self.subTest(headers=headers):
+                res = self.call(respond(**headers))
+
+                self.assertEqual(res.content.decode(), BODY)
+
+    def test_streaming(self):
+        """Test streamed bodies are compressed chunk by chunk."""
+        chunks = [f'{n},'.encode() for n in range(1000)]
+
+        def get_response(request):
+            return StreamingHttpResponse(
+                iter(chunks), content_type='application/json',
+            )
+
+        for encoding, decode in DECODERS.items():
+            with self.subTest(encoding=encoding):
+                res = self.call(get_response, accept=encoding)
+
+                self.assertEqual(res['Content-Encoding'], encoding)
+                self.assertFalse(res.has_header('Content-Length'))
+                self.assertEqual(
+                    decode(b''.join(res.streaming_content)), b''.join(chunks),
+                )
+
+    def test_etag_variant(self):
+        """Test compressed responses tag their encoding in the ETag."""
+        res = self.call(respond(ETag='"abc"'), accept='gzip')
+
+        self.assertEqual(res['ETag'], '"abc-gzip"')
+
+    def test_etag_conditional(self):
+        """Test encoded tags of the client match the tags of the view."""
+        def get_response(request):
+            response = get_conditional_response(request, etag='"abc"') or \
+                respond()(request)
+            response['ETag'] = '"abc"'
+            return response
+
+        res = self.call(get_response, accept='br',
+                        HTTP_IF_NONE_MATCH='"abc-br"')
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], '"abc-br"')
+
+        res = self.call(get_response, accept='br', HTTP_IF_MATCH='"abc-br"')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['ETag'], '"abc-br"')
+
+
+class CompressionApiTests(TestCase):
+    """Test compression of API responses."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_recipe_list(self):
+        """Test a large recipe list is compressed."""
+        create_recipes(self.user, 30, tags=create_tags(self.user, ['Vegan']))
+        plain = self.client.get(RECIPES_URL)
+
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertLess(len(res.content), len(plain.content))
+
+
+class BrowserOnlyMiddlewareTests(TestCase):
+    """Test the session middleware is skipped for the API."""
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            email='admin@example.com', password='password123',
+        )
+        self.client = Client(enforce_csrf_checks=True)
+        self.client.force_login(self.admin)
+
+    def test_api_skipped(self):
+        """Test API requests get no session, user or messages."""
+        def get_response(request):
+            self.assertFalse(hasattr(request, 'session'))
+            self.assertFalse(hasattr(request, 'user'))
+            self.assertFalse(hasattr(request, '_messages'))
+            return HttpResponse()
+
+        chain = get_response
+        for name in ('MessageMiddleware', 'AuthenticationMiddleware',
+                     'CsrfViewMiddleware', 'SessionMiddleware'):
+            chain = getattr(middleware, name)(chain)
+
+        res = chain(RequestFactory().get(ME_URL))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_api_ignores_session(self):
+        """Test the API does not authenticate with the admin session."""
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn('Cookie', res.get('Vary', ''))
+        self.assertNotIn('csrftoken', res.cookies)
+
+    def test_admin_session(self):
+        """Test the admin keeps its session and CSRF protection."""
+        url = reverse('admin:core_user_changelist')
+
+        res = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('csrftoken', res.cookies)
+
+        res = self.client.post(url, {'action': 'delete_selected'})
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,102 @@
+"""
+Tests for purging soft-deleted rows.
+"""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Recipe, Tag, Ingredient
+from core.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+)
+
+
+def purge():
+    """Run purge_deleted in small batches."""
+    call_command('purge_deleted', batch_size=2, stdout=StringIO())
+
+
+class PurgeDeletedTests(TestCase):
+    """Test the purge_deleted command."""
+
+    def setUp(self):
+        self.user = create_user()
+
+    def test_purge_recipes(self):
+        """Test deleted recipes are removed and others kept."""
+        kept = create_recipe(user=self.user)
+        for _ in range(3):
+            recipe = create_recipe(user=self.user)
+            recipe.tags.set(create_tags(self.user, [f'tag {recipe.id}']))
+            recipe.soft_delete()
+
+        purge()
+
+        self.assertEqual(list(Recipe.all_objects.all()), [kept])
+        self.assertEqual(Tag.objects.count(), 3)
+        self.assertFalse(Recipe.tags.through.objects.exists())
+
+    def test_purge_tags_and_ingredients(self):
+        """Test deleted tags and ingredients are removed."""
+        tag, kept_tag = create_tags(self.user, ['Vegan', 'Dessert'])
+        ingredient, = create_ingredients(self.user, ['Salt'])
+        tag.soft_delete()
+        ingredient.soft_delete()
+
+        purge()
+
+        self.assertEqual(list(Tag.all_objects.all()), [kept_tag])
+        self.assertFalse(Ingredient.all_objects.exists())
+
+    def test_purge_user(self):
+        """Test a deleted user is removed with all its data."""
+        other = create_user(email='other@example.com')
+        create_recipe(user=other)
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.set(create_ingredients(self.user, ['Salt']))
+        create_tags(self.user, ['Vegan'])
+        self.user.soft_delete()
+
+        purge()
+
+        self.assertFalse(type(self.user).objects.filter(
+            id=self.user.id,
+        ).exists())
+        self.assertFalse(Recipe.all_objects.filter(user=self.user).exists())
+        self.assertFalse(Ingredient.all_objects.exists())
+        self.assertFalse(Tag.all_objects.exists())
+        self.assertEqual(Recipe.objects.filter(user=other).count(), 1)
+
+    def test_purge_passes(self):
+        """Test deleted rows and rows of deleted users are found apart."""
+        create_recipe(user=self.user).soft_delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            purge()
+
+        selects = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('SELECT')
+        ]
+        self.assertFalse([sql for sql in selects if ' OR ' in sql])
+
+    @patch('django.core.files.storage.FileSystemStorage.delete')
+    def test_purge_removes_unshared_images(self, mock_delete):
+        """Test image files are removed unless another recipe uses them."""
+        deleted = create_recipe(user=self.user, image='uploads/a.jpg')
+        create_recipe(user=self.user, image='uploads/shared.jpg')
+        shared = create_recipe(user=self.user, image='uploads/shared.jpg')
+        deleted.soft_delete()
+        shared.soft_delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            purge()
+
+        mock_delete.assert_called_once_with('uploads/a.jpg')
@@ -0,0 +1,143 @@
+"""
+Tests for the API renderers and parsers.
+"""
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+
+import msgpack
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+
+from rest_framework import status
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core import renderers
+from core.tests.factories import create_recipe, create_tags, create_user
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+SAMPLE = {
+    'text': 'Crème brûlée \u2028\u2029 😀 "quoted" \\',
+    'decimal': Decimal('5.25'),
+    'datetime': datetime.datetime(
+        2022, 7, 4, 7, 59, 1, 123456, tzinfo=datetime.timezone.utc,
+    ),
+    'date': datetime.date(2022, 7, 4),
+    'uuid': uuid.UUID('12345678123456781234567812345678'),
+    'lazy': gettext_lazy('Invalid token.'),
+    'error': ErrorDetail('Required.', code='required'),
+    'numbers': [0, -1, 2 ** 40, 1.5, True, None],
+    'nested': [{'id': 1, 'tags': []}],
+}
+
+
+class ORJSONRendererTests(SimpleTestCase):
+    """Test the orjson renderer matches DRF's JSON renderer."""
+
+    def test_same_bytes(self):
+        """Test the output is byte for byte the one of JSONRenderer."""
+        self.assertEqual(
+            renderers.ORJSONRenderer().render(SAMPLE),
+            JSONRenderer().render(SAMPLE),
+        )
+
+    def test_non_string_keys(self):
+        """Test keys that are not strings are written as strings."""
+        data = {'ids': {1: ['A valid integer is required.']}, None: 2}
+
+        self.assertEqual(
+            renderers.ORJSONRenderer().render(data),
+            JSONRenderer().render(data),
+        )
+
+    def test_indent(self):
+        """Test indented output is left to JSONRenderer."""
+        accepted = 'application/json; indent=2'
+
+        self.assertEqual(
+            renderers.ORJSONRenderer().render(SAMPLE, accepted, {}),
+            JSONRenderer().render(SAMPLE, accepted, {}),
+        )
+
+    def test_parse(self):
+        """Test parsing JSON and refusing invalid documents."""
+        parser = renderers.ORJSONParser()
+        body = '{"title": "Crème", "price": "5.25"}'.encode()
+
+        self.assertEqual(parser.parse(io.BytesIO(body)),
+                         {'title': 'Crème', 'price': '5.25'})
+        for body in (b'{"title": ', b'NaN'):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(body))
+
+
+class MessagePackTests(SimpleTestCase):
+    """Test the MessagePack renderer and parser."""
+
+    def test_same_data_as_json(self):
+        """Test MessagePack carries the values JSON carries."""
+        packed = renderers.MessagePackRenderer().render(SAMPLE)
+
+        self.assertEqual(
+            renderers.MessagePackParser().parse(io.BytesIO(packed)),
+            json.loads(JSONRenderer().render(SAMPLE)),
+        )
+
+    def test_parse_invalid(self):
+        """Test invalid MessagePack is refused."""
+        for body in (b'\xc1', b'\x92\x01'):
+            with self.assertRaises(ParseError):
+                renderers.MessagePackParser().parse(io.BytesIO(body))
+
+
+class WireFormatApiTests(TestCase):
+    """Test negotiating the wire format with the API."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        create_recipe(user=self.user).tags.set(
+            create_tags(self.user, ['Vegan']),
+        )
+
+    def test_default_json(self):
+        """Test responses are JSON by default."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(res.content), res.data)
+
+    def test_msgpack(self):
+        """Test MessagePack is returned and accepted on request."""
+        res = self.client.get(RECIPES_URL, HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(res.content),
+                         json.loads(JSONRenderer().render(res.data)))
+
+        payload = {'title': 'Soup', 'time_minutes': 10, 'price': '2.50',
+                   'tags': [{'name': 'Vegan'}]}
+        res = self.client.post(
+            RECIPES_URL, msgpack.packb(payload),
+            content_type='application/msgpack',
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(res.content)['title'], 'Soup')
+
+    def test_msgpack_invalid(self):
+        """Test malformed MessagePack bodies are refused."""
+        res = self.client.post(RECIPES_URL, b'\xc1',
+                               content_type='application/msgpack')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,61 @@
+"""
+Tests for the cached API schema.
+"""
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import schema
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaTests(TestCase):
+    """Test building and serving the schema."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.schema_file = os.path.join(self.tmp.name, 'schema', 'openapi.json')
+        schema.clear_cache()
+        self.addCleanup(schema.clear_cache)
+
+    def test_schema_generated_once(self):
+        """Test the schema is generated on the first request only."""
+        with override_settings(API_SCHEMA_FILE=self.schema_file), \
+                patch.object(schema, 'generate_schema',
+                             wraps=schema.generate_schema) as generate:
+            first = self.client.get(SCHEMA_URL, {'format': 'json'})
+            second = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(generate.call_count, 1)
+
+    def test_build_schema_command(self):
+        """Test the schema built at deploy time is served."""
+        with override_settings(API_SCHEMA_FILE=self.schema_file):
+            call_command('build_schema', stdout=StringIO())
+            with patch.object(schema, 'generate_schema') as generate:
+                res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        generate.assert_not_called()
+        with open(self.schema_file) as fileobj:
+            self.assertEqual(json.loads(res.content), json.load(fileobj))
+        self.assertIn('/api/recipe/recipes/', json.loads(res.content)['paths'])
+
+    def test_docs(self):
+        """Test the lazily imported docs view renders."""
+        res = self.client.get(reverse('api-docs'))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
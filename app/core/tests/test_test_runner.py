@@ -0,0 +1,30 @@
+"""
+Tests for the test runner.
+"""
+import os
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.test_runner import FastTestRunner, migrations_fingerprint
+
+
+class FastTestRunnerTests(SimpleTestCase):
+    """Test the test runner configuration."""
+
+    def test_fingerprint_stable(self):
+        """Test the migrations fingerprint is stable between calls."""
+        fingerprint = migrations_fingerprint()
+
+        self.assertEqual(len(fingerprint), 10)
+        self.assertEqual(fingerprint, migrations_fingerprint())
+
+    @patch.dict(os.environ, {'TEST_PARALLEL': '3'})
+    def test_parallel_from_environment(self):
+        """Test TEST_PARALLEL sets the default number of processes."""
+        self.assertEqual(FastTestRunner().parallel, 3)
+
+    @patch.dict(os.environ, {'TEST_PARALLEL': '3'})
+    def test_parallel_option_wins(self):
+        """Test an explicit --parallel overrides the default."""
+        self.assertEqual(FastTestRunner(parallel=1).parallel, 1)
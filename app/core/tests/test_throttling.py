@@ -0,0 +1,141 @@
+"""
+Tests for token bucket throttling.
+"""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import throttling
+from core.tests.factories import create_recipe, create_user
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TOKEN_URL = reverse('user:token')
+
+
+class TokenBucketTests(SimpleTestCase):
+    """Test the token bucket arithmetic and store."""
+
+    def test_parse_rate(self):
+        """Test parsing rates into capacity and refill per second."""
+        self.assertEqual(throttling.parse_rate('60/min'), (60, 1.0))
+        self.assertEqual(throttling.parse_rate('10/s'), (10, 10.0))
+
+    def test_take_token(self):
+        """Test taking tokens until the bucket is empty, then refilling."""
+        tokens, allowed, wait = throttling.take_token(1, 0, 0, 2, 1.0)
+        self.assertTrue(allowed)
+        tokens, allowed, wait = throttling.take_token(tokens, 0, 0, 2, 1.0)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 1.0)
+        tokens, allowed, wait = throttling.take_token(tokens, 0, 5, 2, 1.0)
+        self.assertTrue(allowed)
+        self.assertEqual(tokens, 1)
+
+    def test_local_store_evicts(self):
+        """Test the local store keeps at most max_keys buckets."""
+        store = throttling.LocalBucketStore(max_keys=2)
+        for key in ('a', 'b', 'c'):
+            store.take(key, 5, 1.0)
+
+        self.assertEqual(list(store.buckets), ['b', 'c'])
+
+
+class ThrottleApiTests(TestCase):
+    """Test throttling the API."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = create_user()
+        throttling.get_store().clear()
+        self.addCleanup(throttling.get_store().clear)
+
+    @override_settings(THROTTLE_RATES={'user': '2/min'})
+    def test_user_rate(self):
+        """Test a user is refused once their bucket is empty."""
+        self.client.force_authenticate(self.user)
+        for _ in range(2):
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+        other = APIClient()
+        other.force_authenticate(create_user(email='other@example.com'))
+        self.assertEqual(other.get(RECIPES_URL).status_code,
+                         status.HTTP_200_OK)
+
+    @override_settings(THROTTLE_RATES={'recipe-upload': '1/min'})
+    def test_scoped_rate(self):
+        """Test expensive actions have their own budget."""
+        self.client.force_authenticate(self.user)
+        recipe = create_recipe(user=self.user)
+        url = reverse('recipe:recipe-upload-image', args=[recipe.id])
+
+        self.client.post(url, {}, format='multipart')
+        res = self.client.post(url, {}, format='multipart')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client.get(RECIPES_URL).status_code,
+                         status.HTTP_200_OK)
+
+    @override_settings(THROTTLE_RATES={'login': '2/min'})
+    def test_login_rate(self):
+        """Test token requests are limited per address."""
+        payload = {'email': 'user@example.com', 'password': 'wrong'}
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(THROTTLE_RATES={'login': '1/min'})
+    def test_spoofed_forwarded_for(self):
+        """Test addresses added by the client do not change the bucket."""
+        payload = {'email': 'user@example.com', 'password': 'wrong'}
+        self.client.post(TOKEN_URL, payload,
+                         HTTP_X_FORWARDED_FOR='10.0.0.1')
+
+        res = self.client.post(TOKEN_URL, payload,
+                               HTTP_X_FORWARDED_FOR='10.0.0.2, 10.0.0.1')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(THROTTLE_RATES={'ip': '1/min'})
+    def test_health_not_throttled(self):
+        """Test health checks are never throttled."""
+        for _ in range(3):
+            res = self.client.get(reverse('health-live'))
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class UwsgiStoreTests(SimpleTestCase):
+    """Test the store shared through the uWSGI cache."""
+
+    def test_take(self):
+        """Test buckets are read and written under the uWSGI lock."""
+        cache = {}
+        fake = type('uwsgi', (), {
+            'lock': staticmethod(lambda: None),
+            'unlock': staticmethod(lambda: None),
+            'cache_get': staticmethod(lambda key, name: cache.get(key)),
+            'cache_update': staticmethod(
+                lambda key, value, expires, name: cache.update({key: value})
+            ),
+        })
+        with patch.dict('sys.modules', {'uwsgi': fake}):
+            store = throttling.UwsgiBucketStore('throttle')
+
+        self.assertEqual(store.take('k', 1, 0.01), (True, 0.0))
+        allowed, wait = store.take('k', 1, 0.01)
+        self.assertFalse(allowed)
+        self.assertGreater(wait, 0)
@@ -0,0 +1,215 @@
+"""
+Token bucket throttling for the API.
+
+Every client key has a bucket holding up to `capacity` tokens, refilled
+continuously at `capacity / period` tokens per second; a request takes
+one token or is refused. Buckets live in uWSGI's shared memory cache when
+running under uWSGI, so the limits hold across workers without an
+external service, and in process memory otherwise.
+"""
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """Return (capacity, tokens per second) of a rate like '100/min'."""
+    num, period = rate.split('/')
+    capacity = int(num)
+    return capacity, capacity / PERIODS[period[0]]
+
+
+def take_token(tokens, stamp, now, capacity, refill):
+    """
+    Refill a bucket holding tokens at time stamp up to now and take one.
+
+    Return the tokens left, whether the request is allowed and the
+    seconds until a token is available.
+    """
+    tokens = min(capacity, tokens + (now - stamp) * refill)
+    if tokens >= 1:
+        return tokens - 1, True, 0.0
+    return tokens, False, (1 - tokens) / refill
+
+
+class LocalBucketStore:
+    """Buckets in process memory, evicting the least recently used."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill):
+        """Take a token from the bucket of key, see take_token."""
+        now = time.monotonic()
+        with self.lock:
+            tokens, stamp = self.buckets.pop(key, (capacity, now))
+            tokens, allowed, wait = take_token(
+                tokens, stamp, now, capacity, refill,
+            )
+            self.buckets[key] = (tokens, now)
+            if len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return allowed, wait
+
+    def clear(self):
+        """Forget all buckets."""
+        with self.lock:
+            self.buckets.clear()
+
+
+class UwsgiBucketStore:
+    """Buckets in a uWSGI cache, shared by all workers of the server."""
+
+    FORMAT = 'dd'
+
+    def __init__(self, cache):
+        import uwsgi
+
+        self.uwsgi = uwsgi
+        self.cache = cache
+
+    def take(self, key, capacity, refill):
+        """Take a token from the bucket of key, see take_token."""
+        uwsgi = self.uwsgi
+        now = time.monotonic()
+        # Buckets idle long enough to be full again can be dropped.
+        expires = int(capacity / refill) + 1
+        uwsgi.lock()
+        try:
+            raw = uwsgi.cache_get(key, self.cache)
+            if raw:
+                tokens, stamp = struct.unpack(self.FORMAT, raw)
+            else:
+                tokens, stamp = capacity, now
+            tokens, allowed, wait = take_token(
+                tokens, stamp, now, capacity, refill,
+            )
+            uwsgi.cache_update(
+                key, struct.pack(self.FORMAT, tokens, now), expires,
+                self.cache,
+            )
+        finally:
+            uwsgi.unlock()
+        return allowed, wait
+
+    def clear(self):
+        """Forget all buckets."""
+        self.uwsgi.cache_clear(self.cache)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the bucket store configured by THROTTLE_STORE."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store(settings.THROTTLE_STORE)
+    return _store
+
+
+def _create_store(kind):
+    """Create a bucket store, 'auto' picking uWSGI when running under it."""
+    if kind in ('auto', 'uwsgi'):
+        try:
+            return UwsgiBucketStore(settings.THROTTLE_UWSGI_CACHE)
+        except ImportError:
+            if kind == 'uwsgi':
+                raise
+    return LocalBucketStore()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Base token bucket throttle, limiting requests of the key returned by
+    get_key at the rate configured for scope in THROTTLE_RATES.
+    """
+    scope = None
+
+    def get_scope(self, view):
+        """Return the rate scope applying to the view."""
+        return self.scope
+
+    def get_key(self, request, view):
+        """Return the client key to throttle, None to skip throttling."""
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        rate = settings.THROTTLE_RATES.get(scope) if scope else None
+        if rate is None:
+            return True
+        key = self.get_key(request, view)
+        if key is None:
+            return True
+        capacity, refill = parse_rate(rate)
+        allowed, self.wait_time = get_store().take(
+            f'{scope}:{key}', capacity, refill,
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class UserBucketThrottle(TokenBucketThrottle):
+    """Limit the requests of each authenticated user."""
+    scope = 'user'
+
+    def get_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return request.user.pk
+        return None
+
+
+class IPBucketThrottle(TokenBucketThrottle):
+    """Limit the requests from each client address."""
+    scope = 'ip'
+
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class ScopedBucketThrottle(TokenBucketThrottle):
+    """
+    Separate budget for expensive actions, per user or per address.
+
+    Views declare a throttle_scope, or throttle_scopes mapping viewset
+    actions to scopes.
+    """
+
+    def get_scope(self, view):
+        scopes = getattr(view, 'throttle_scopes', {})
+        return scopes.get(getattr(view, 'action', None)) or \
+            getattr(view, 'throttle_scope', None)
+
+    def get_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user-{request.user.pk}'
+        return f'ip-{self.get_ident(request)}'
+
+
+class LoginAccountBucketThrottle(TokenBucketThrottle):
+    """
+    Limit login attempts against each account from each address, so
+    others cannot lock the owner of an account out.
+    """
+    scope = 'login-account'
+
+    def get_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email:
+            return None
+        return f'{email.strip().lower()}:{self.get_ident(request)}'
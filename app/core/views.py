@@ -1,9 +1,41 @@
-from rest_framework.decorators import api_view
+"""
+Views for the health check APIs.
+"""
+from rest_framework import status
+from rest_framework.decorators import (
+    api_view,
+    authentication_classes,
+    permission_classes,
+    throttle_classes,
+)
+from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 
+from core import health
+
+
 @api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@throttle_classes([])
 def health_check(request):
     """
-    returns a simple health check
+    returns a simple health check, the process is alive
     """
     return Response({'health': True})
+
+
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+@throttle_classes([])
+def readiness_check(request):
+    """
+    returns whether the service dependencies are reachable
+    """
+    report = health.readiness()
+    code = (
+        status.HTTP_200_OK if report['ready']
+        else status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+    return Response(report, status=code)
@@ -0,0 +1,50 @@
+"""
+Cache of the detail representation of recipes, when RECIPE_CACHE names
+one of CACHES.
+
+Entries are keyed by the recipes_version of their user, which every write
+increments, see recipe.sync, so a write makes the user's entries
+unreachable instead of deleting them; they expire after
+RECIPE_CACHE_TIMEOUT seconds. The keys also hold the base URL of the
+request, the image URLs in the representation depend on it.
+"""
+from django.conf import settings
+from django.core.cache import caches
+
+
+def detail_cache():
+    """Return the cache of recipe details, None if there is none."""
+    alias = settings.RECIPE_CACHE
+    return caches[alias] if alias else None
+
+
+def detail_keys(request, ids):
+    """Return the cache key of each recipe id for the user of request."""
+    user = request.user
+    prefix = (
+        f'recipe:{request.build_absolute_uri("/")}:{user.pk}:'
+        f'{user.recipes_version}'
+    )
+    return {pk: f'{prefix}:{pk}' for pk in ids}
+
+
+def get_details(request, ids, load):
+    """
+    Return the detail of each of ids that exists by id, from the cache
+    when there, the others from load, which takes a list of ids and
+    returns the details it finds by id.
+    """
+    cache = detail_cache()
+    if cache is None:
+        return load(list(ids))
+    keys = detail_keys(request, ids)
+    cached = cache.get_many(keys.values())
+    details = {pk: cached[key] for pk, key in keys.items() if key in cached}
+    loaded = load([pk for pk in ids if pk not in details])
+    if loaded:
+        cache.set_many(
+            {keys[pk]: detail for pk, detail in loaded.items()},
+            settings.RECIPE_CACHE_TIMEOUT,
+        )
+    details.update(loaded)
+    return details
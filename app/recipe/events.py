@@ -0,0 +1,331 @@
+"""
+Server-sent events of the changes to the recipes, tags and ingredients of
+a user, served by the ASGI application, see app/asgi.py.
+
+Each process polls the change log of the users with open streams, with one
+query over their recipes_version every EVENTS_POLL_INTERVAL seconds, and
+is woken early by the writes it commits itself. Every change number is
+sent as one event with the number as id, so a client reconnecting with
+Last-Event-ID gets the changes it missed from the log.
+
+Streams buffer EVENTS_BUFFER events. A client too slow to read them, or
+resuming from too far back, gets a 'reset' event and is disconnected, and
+should catch up with the sync API before reconnecting. The token of a
+stream is checked again on every heartbeat, streams whose token was
+revoked or expired are closed.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections
+
+from rest_framework import exceptions
+
+from core.authentication import ExpiringTokenAuthentication
+from core.models import Change, Ingredient, Recipe, Tag
+
+
+logger = logging.getLogger(__name__)
+
+PATH = '/api/recipe/events/'
+
+KINDS = {
+    Change.RECIPE: ('recipes', Recipe),
+    Change.TAG: ('tags', Tag),
+    Change.INGREDIENT: ('ingredients', Ingredient),
+}
+
+
+def load_events(user_id, after, upto, limit=None):
+    """
+    Return the (number, data) events of the changes of a user after after
+    up to upto, None if there are more than limit.
+    """
+    close_old_connections()
+    rows = Change.objects.filter(
+        user_id=user_id, seq__gt=after, seq__lte=upto,
+    ).order_by('seq').values_list('seq', 'kind', 'object_id')
+    changes = defaultdict(lambda: defaultdict(set))
+    for seq, kind, object_id in rows:
+        changes[seq][kind].add(object_id)
+        if limit is not None and len(changes) > limit:
+            return None
+
+    changed = {kind: set() for kind in KINDS}
+    for kinds in changes.values():
+        for kind, ids in kinds.items():
+            changed[kind] |= ids
+    live = {
+        kind: set(model.objects.filter(id__in=changed[kind]).values_list(
+            'id', flat=True,
+        )) if changed[kind] else set()
+        for kind, (_, model) in KINDS.items()
+    }
+
+    events = []
+    for seq, kinds in changes.items():
+        data = {'seq': seq, 'changed': {}, 'deleted': {}}
+        for kind, (name, _) in KINDS.items():
+            ids = kinds.get(kind, set())
+            data['changed'][name] = sorted(ids & live[kind])
+            data['deleted'][name] = sorted(ids - live[kind])
+        events.append((seq, data))
+    return events
+
+
+def poll_versions(seen):
+    """
+    Return the events of the users whose recipes_version went past the
+    one in seen, and their new versions.
+    """
+    close_old_connections()
+    versions = get_user_model().objects.filter(pk__in=seen).values_list(
+        'pk', 'recipes_version',
+    )
+    return {
+        pk: (version, load_events(pk, seen[pk], version))
+        for pk, version in versions if version > seen[pk]
+    }
+
+
+class Stream:
+    """Bounded buffer of the events of one connection."""
+
+    def __init__(self, user_id, last):
+        self.user_id = user_id
+        self.last = last
+        self.queue = asyncio.Queue(settings.EVENTS_BUFFER)
+        self.overflowed = False
+
+    def put(self, event):
+        """Buffer an event, flagging the stream when it is full."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class Broker:
+    """
+    Open streams of this process by user, fed by polling the change log.
+    """
+
+    def __init__(self):
+        self.streams = defaultdict(set)
+        self.seen = {}
+        self.loop = None
+        self.wake = None
+        self.task = None
+
+    def subscribe(self, stream, version):
+        """
+        Add a stream of a user whose changes up to version are known,
+        return the number after which the broker will publish.
+        """
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.loop is not loop:
+            self.loop = loop
+            self.wake = asyncio.Event()
+            self.task = loop.create_task(self.poll())
+        self.streams[stream.user_id].add(stream)
+        return self.seen.setdefault(stream.user_id, version)
+
+    def unsubscribe(self, stream):
+        """Remove a stream."""
+        streams = self.streams.get(stream.user_id)
+        if streams is None:
+            return
+        streams.discard(stream)
+        if not streams:
+            del self.streams[stream.user_id]
+            self.seen.pop(stream.user_id, None)
+
+    def notify(self):
+        """Wake the poller now, from any thread."""
+        loop, wake = self.loop, self.wake
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(wake.set)
+
+    async def poll(self):
+        """Publish the new changes of the users with streams, until none."""
+        while self.streams:
+            try:
+                await asyncio.wait_for(
+                    self.wake.wait(), settings.EVENTS_POLL_INTERVAL,
+                )
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            if not self.seen:
+                continue
+            try:
+                new = await sync_to_async(poll_versions)(dict(self.seen))
+            except Exception:
+                logger.exception('Could not poll the change log')
+                continue
+            for user_id, (version, events) in new.items():
+                if user_id not in self.seen:
+                    continue  # every stream closed during the query
+                self.seen[user_id] = max(self.seen[user_id], version)
+                for stream in self.streams[user_id]:
+                    for event in events:
+                        stream.put(event)
+
+
+broker = Broker()
+
+
+def authenticate(headers):
+    """Return the user of the token in the Authorization header."""
+    keyword, _, key = headers.get(b'authorization', b'').decode().partition(
+        ' ',
+    )
+    if keyword != 'Token' or not key:
+        raise exceptions.NotAuthenticated()
+    close_old_connections()
+    user, _ = ExpiringTokenAuthentication().authenticate_credentials(key)
+    return user
+
+
+def is_authenticated(headers):
+    """Return whether the token in the Authorization header is valid."""
+    try:
+        authenticate(headers)
+    except exceptions.APIException:
+        return False
+    return True
+
+
+def encode(seq, name, data):
+    """Return a server-sent event."""
+    lines = f'event: {name}\ndata: {json.dumps(data)}\n\n'
+    if seq is not None:
+        lines = f'id: {seq}\n' + lines
+    return lines.encode()
+
+
+async def respond(send, status, body, headers=()):
+    """Send a complete response."""
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def wait_disconnect(receive):
+    """Return once the client is gone."""
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def events_application(scope, receive, send):
+    """ASGI application streaming the changes of the authenticated user."""
+    if scope['method'] != 'GET':
+        await respond(send, 405, b'{"detail": "Method not allowed."}',
+                      [(b'allow', b'GET')])
+        return
+    headers = dict(scope['headers'])
+    try:
+        user = await sync_to_async(authenticate)(headers)
+    except exceptions.APIException as exc:
+        await respond(send, 401, json.dumps({'detail': exc.detail}).encode(),
+                      [(b'www-authenticate', b'Token')])
+        return
+    try:
+        last = int(headers.get(b'last-event-id', b''))
+    except ValueError:
+        last = None
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    stream = Stream(user.pk, user.recipes_version)
+    upto = broker.subscribe(stream, user.recipes_version)
+    tasks = [asyncio.ensure_future(wait_disconnect(receive))]
+    try:
+        replay = []
+        if last is not None and last < upto:
+            replay = await sync_to_async(load_events)(
+                user.pk, last, upto, settings.EVENTS_BUFFER,
+            )
+            if replay is None:
+                await send_reset(send)
+                return
+            stream.last = last
+        else:
+            stream.last = upto
+        tasks.append(asyncio.ensure_future(
+            forward(stream, send, headers, replay),
+        ))
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        broker.unsubscribe(stream)
+        for task in tasks:
+            task.cancel()
+        await send({'type': 'http.response.body', 'body': b''})
+
+
+async def send_reset(send):
+    """Tell the client to catch up with the sync API."""
+    await send({
+        'type': 'http.response.body',
+        'body': encode(None, 'reset', {'detail': 'Sync again.'}),
+        'more_body': True,
+    })
+
+
+async def forward(stream, send, headers, replay=()):
+    """
+    Send the replayed events, then the events of stream with heartbeats
+    until it overflows or the token of headers is no longer valid.
+    """
+    await send({
+        'type': 'http.response.body', 'body': b'retry: 3000\n\n',
+        'more_body': True,
+    })
+    # Live events buffered while the replay was loaded come after it.
+    for seq, data in replay:
+        await send_event(stream, send, seq, data)
+    while True:
+        if stream.overflowed:
+            await send_reset(send)
+            return
+        try:
+            seq, data = await asyncio.wait_for(
+                stream.queue.get(), settings.EVENTS_HEARTBEAT,
+            )
+        except asyncio.TimeoutError:
+            if not await sync_to_async(is_authenticated)(headers):
+                return
+            await send({
+                'type': 'http.response.body', 'body': b': ping\n\n',
+                'more_body': True,
+            })
+            continue
+        if seq <= stream.last:
+            continue  # replayed already
+        await send_event(stream, send, seq, data)
+
+
+async def send_event(stream, send, seq, data):
+    """Send the event of a change."""
+    stream.last = seq
+    await send({
+        'type': 'http.response.body',
+        'body': encode(seq, 'change', data),
+        'more_body': True,
+    })
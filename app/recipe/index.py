@@ -0,0 +1,341 @@
+"""
+In-memory index of the tags and ingredients of each user's recipes.
+
+Every recipe of a user is a row of two packed bit matrices, with one bit
+per tag and one per ingredient, so similarity and pantry queries are a
+few vectorized bit operations over all recipes instead of joins.
+
+Indexes are kept per process for the most recently used users and tagged
+with User.recipes_version, which every write increments, see recipe.sync.
+The process making a write patches its index in place; other processes see
+a newer version on their next request and rebuild theirs.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from django.conf import settings
+from django.db import transaction
+
+from core.models import Recipe, RecipeIngredient
+
+
+POPCOUNT = np.array([bin(n).count('1') for n in range(256)], dtype=np.uint8)
+
+
+def popcount(bits):
+    """Return the number of set bits in each row of a packed bit matrix."""
+    return POPCOUNT[bits].sum(axis=1, dtype=np.int32)
+
+
+class BitMatrix:
+    """
+    Rows of packed bits over columns keyed by ids, both growing.
+
+    Bits are stored column major, queries read a few byte columns of every
+    row.
+    """
+
+    def __init__(self, capacity):
+        self.columns = {}
+        self.bits = np.zeros((capacity, 8), dtype=np.uint8, order='F')
+        self.counts = np.zeros(capacity, dtype=np.int32)
+
+    def column(self, key):
+        """Return the column of key, adding one when it is new."""
+        column = self.columns.get(key)
+        if column is None:
+            column = self.columns[key] = len(self.columns)
+            width = self.bits.shape[1]
+            if column >> 3 >= width:
+                self.bits = np.asfortranarray(
+                    np.hstack([self.bits, np.zeros_like(self.bits)]),
+                )
+        return column
+
+    def grow(self, capacity):
+        """Make room for capacity rows."""
+        extra = capacity - len(self.bits)
+        if extra > 0:
+            self.bits = np.asfortranarray(np.vstack([
+                self.bits,
+                np.zeros((extra, self.bits.shape[1]), dtype=np.uint8),
+            ]))
+            self.counts = np.concatenate([
+                self.counts, np.zeros(extra, dtype=np.int32),
+            ])
+
+    def set_bits(self, rows, keys):
+        """Set the bits of keys in rows, two parallel sequences."""
+        if not len(rows):
+            return
+        columns = np.fromiter(
+            (self.column(key) for key in keys), dtype=np.int64,
+            count=len(keys),
+        )
+        rows = np.asarray(rows, dtype=np.int64)
+        np.bitwise_or.at(
+            self.bits,
+            (rows, columns >> 3),
+            np.left_shift(1, columns & 7).astype(np.uint8),
+        )
+        changed = np.unique(rows)
+        self.counts[changed] = popcount(self.bits[changed])
+
+    def clear_column(self, key):
+        """Clear the bit of key in every row."""
+        column = self.columns.get(key)
+        if column is None:
+            return
+        byte, bit = column >> 3, np.uint8(1 << (column & 7))
+        rows = np.flatnonzero(self.bits[:, byte] & bit)
+        self.bits[rows, byte] &= ~bit
+        self.counts[rows] -= 1
+
+    def clear_rows(self, rows):
+        """Clear every bit of rows."""
+        self.bits[rows] = 0
+        self.counts[rows] = 0
+
+    def overlap(self, size, mask):
+        """Return the bits each of the first size rows shares with mask."""
+        # Only the few bytes set in mask can overlap, skip the others.
+        columns = np.flatnonzero(mask)
+        return popcount(self.bits[:size, columns] & mask[columns])
+
+    def mask(self, keys):
+        """Return a packed row with the bits of keys known to the matrix."""
+        mask = np.zeros(self.bits.shape[1], dtype=np.uint8)
+        for key in keys:
+            column = self.columns.get(key)
+            if column is not None:
+                mask[column >> 3] |= 1 << (column & 7)
+        return mask
+
+
+def _tag_links(**filters):
+    """Return the (recipe, tag) links to index."""
+    return list(Recipe.tags.through.objects.filter(
+        tag__deleted_at__isnull=True, **filters,
+    ).values_list('recipe_id', 'tag_id'))
+
+
+def _ingredient_links(**filters):
+    """Return the (recipe, ingredient) links to index."""
+    return list(RecipeIngredient.objects.filter(
+        ingredient__deleted_at__isnull=True, **filters,
+    ).order_by().values_list('recipe_id', 'ingredient_id'))
+
+
+class RecipeIndex:
+    """Bitsets of the tags and ingredients of the recipes of a user."""
+
+    def __init__(self, version, capacity=64):
+        self.version = version
+        self.size = 0
+        self.recipe_ids = np.zeros(capacity, dtype=np.int64)
+        self.rows = {}
+        # Rows of deleted or reloaded recipes, reused before adding rows.
+        self.free = []
+        self.tags = BitMatrix(capacity)
+        self.ingredients = BitMatrix(capacity)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def build(cls, user, version):
+        """Build the index of the recipes of user from the database."""
+        recipe_ids = list(Recipe.objects.filter(user=user).order_by(
+            'id',
+        ).values_list('id', flat=True))
+        live = {'recipe__user': user, 'recipe__deleted_at__isnull': True}
+        index = cls(version, capacity=max(64, len(recipe_ids)))
+        index._add(recipe_ids, _tag_links(**live), _ingredient_links(**live))
+        return index
+
+    def _add(self, recipe_ids, tags, ingredients):
+        """Add rows for recipe_ids and set the bits of their links."""
+        capacity = len(self.recipe_ids)
+        size = self.size + max(0, len(recipe_ids) - len(self.free))
+        if size > capacity:
+            capacity = max(2 * capacity, size)
+            self.recipe_ids = np.concatenate([
+                self.recipe_ids,
+                np.zeros(capacity - len(self.recipe_ids), dtype=np.int64),
+            ])
+            self.tags.grow(capacity)
+            self.ingredients.grow(capacity)
+        for recipe_id in recipe_ids:
+            if self.free:
+                row = self.free.pop()
+            else:
+                row = self.size
+                self.size += 1
+            self.rows[recipe_id] = row
+            self.recipe_ids[row] = recipe_id
+        for matrix, links in ((self.tags, tags),
+                              (self.ingredients, ingredients)):
+            matrix.set_bits(
+                [self.rows[recipe_id] for recipe_id, _ in links],
+                [key for _, key in links],
+            )
+
+    def update(self, user, recipe_ids=(), tag_ids=(), ingredient_ids=()):
+        """
+        Reload the rows of recipe_ids and the columns of tag_ids and
+        ingredient_ids, added, changed or deleted.
+        """
+        live = list(Recipe.objects.filter(
+            user=user, id__in=recipe_ids,
+        ).values_list('id', flat=True)) if recipe_ids else []
+        tags = _tag_links(recipe_id__in=live) if live else []
+        ingredients = _ingredient_links(recipe_id__in=live) if live else []
+        columns = []
+        for matrix, keys, links, lookup in (
+            (self.tags, tag_ids, _tag_links, 'tag_id__in'),
+            (self.ingredients, ingredient_ids, _ingredient_links,
+             'ingredient_id__in'),
+        ):
+            if keys:
+                columns.append((matrix, keys, links(**{
+                    lookup: keys,
+                    'recipe__user': user,
+                    'recipe__deleted_at__isnull': True,
+                })))
+
+        with self.lock:
+            for recipe_id in recipe_ids:
+                row = self.rows.pop(recipe_id, None)
+                if row is not None:
+                    # 0 marks the row as free until it is reused.
+                    self.recipe_ids[row] = 0
+                    self.tags.clear_rows(row)
+                    self.ingredients.clear_rows(row)
+                    self.free.append(row)
+            self._add(live, tags, ingredients)
+            for matrix, keys, links in columns:
+                for key in keys:
+                    matrix.clear_column(key)
+                links = [link for link in links if link[0] in self.rows]
+                matrix.set_bits(
+                    [self.rows[recipe_id] for recipe_id, _ in links],
+                    [key for _, key in links],
+                )
+
+    def similar(self, recipe_id, limit, weights):
+        """
+        Return up to limit (recipe id, score) of the recipes most similar
+        to recipe_id, by Jaccard similarity of tags and of ingredients
+        combined with weights.
+        """
+        with self.lock:
+            row = self.rows.get(recipe_id)
+            if row is None:
+                return []
+            size = self.size
+            numerator = np.zeros(size, dtype=np.float64)
+            denominator = np.zeros(size, dtype=np.float64)
+            for matrix, weight in ((self.tags, weights['tags']),
+                                   (self.ingredients, weights['ingredients'])):
+                shared = matrix.overlap(size, matrix.bits[row])
+                union = matrix.counts[:size] + matrix.counts[row] - shared
+                numerator += weight * shared
+                denominator += weight * union
+            recipe_ids = self.recipe_ids[:size].copy()
+
+        scores = np.divide(
+            numerator, denominator,
+            out=np.zeros(size, dtype=np.float64), where=denominator > 0,
+        )
+        scores[row] = 0
+        scores[recipe_ids == 0] = 0
+        return self._top(recipe_ids, scores, limit)
+
+    def pantry(self, ingredient_ids, limit, max_missing):
+        """
+        Return up to limit (recipe id, missing, matched) of the recipes
+        needing the fewest ingredients outside ingredient_ids, at most
+        max_missing, then using the most of them.
+        """
+        with self.lock:
+            size = self.size
+            matched = self.ingredients.overlap(
+                size, self.ingredients.mask(ingredient_ids),
+            )
+            missing = self.ingredients.counts[:size] - matched
+            recipe_ids = self.recipe_ids[:size].copy()
+
+        candidates = np.flatnonzero(
+            (recipe_ids != 0) & (missing <= max_missing) & (matched > 0)
+        )
+        # Fewest missing first, then most matched, then newest.
+        order = np.lexsort((
+            -recipe_ids[candidates],
+            -matched[candidates],
+            missing[candidates],
+        ))[:limit]
+        chosen = candidates[order]
+        return [
+            (int(recipe_ids[n]), int(missing[n]), int(matched[n]))
+            for n in chosen
+        ]
+
+    @staticmethod
+    def _top(recipe_ids, scores, limit):
+        """Return the (recipe id, score) of the limit best positive scores."""
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > limit:
+            best = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[best]
+        order = np.lexsort((-recipe_ids[candidates], -scores[candidates]))
+        return [
+            (int(recipe_ids[n]), float(scores[n]))
+            for n in candidates[order]
+        ]
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def get_index(user):
+    """Return the index of the recipes of user, built when missing or old."""
+    with _indexes_lock:
+        index = _indexes.get(user.pk)
+        if index is not None and index.version == user.recipes_version:
+            _indexes.move_to_end(user.pk)
+            return index
+
+    index = RecipeIndex.build(user, user.recipes_version)
+    with _indexes_lock:
+        _indexes[user.pk] = index
+        _indexes.move_to_end(user.pk)
+        while len(_indexes) > settings.RECIPE_INDEX_MAX_USERS:
+            _indexes.popitem(last=False)
+    return index
+
+
+def update_on_commit(user, version, recipes=(), tags=(), ingredients=()):
+    """
+    Patch the index of user in this process with a write numbered version
+    once the current transaction commits, or forget the index if it missed
+    an earlier write.
+    """
+    def patch():
+        with _indexes_lock:
+            index = _indexes.get(user.pk)
+            if index is None:
+                return
+            if index.version != version - 1:
+                del _indexes[user.pk]
+                return
+        index.update(user, recipes, tags, ingredients)
+        index.version = version
+
+    transaction.on_commit(patch)
+
+
+def clear():
+    """Forget the indexes of every user."""
+    with _indexes_lock:
+        _indexes.clear()
@@ -0,0 +1,47 @@
+"""
+Normalized representation of recipe lists.
+
+Recipes list the ids of their tags and ingredients, and each tag and
+ingredient they reference is sent once, by id, next to them instead of
+inside every recipe using it. The links and names come from one query per
+relation, without building a model instance per link.
+"""
+from core.models import Recipe, RecipeIngredient
+
+
+def _links(queryset, recipes, attr, field):
+    """
+    Append the ids of the objects linked to recipes by queryset to attr of
+    each recipe, return the linked objects by id.
+    """
+    objects = {}
+    rows = queryset.filter(
+        recipe_id__in=list(recipes),
+        **{f'{field}__deleted_at__isnull': True},
+    ).values_list('recipe_id', f'{field}_id', f'{field}__name')
+    for recipe_id, object_id, name in rows:
+        getattr(recipes[recipe_id], attr).append(object_id)
+        if object_id not in objects:
+            objects[object_id] = {'id': object_id, 'name': name}
+    return {str(object_id): obj for object_id, obj in objects.items()}
+
+
+def side_load(recipes):
+    """
+    Set tag_ids and ingredient_ids on recipes, return their tags and their
+    ingredients by id.
+    """
+    by_id = {recipe.id: recipe for recipe in recipes}
+    for recipe in recipes:
+        recipe.tag_ids = []
+        recipe.ingredient_ids = []
+    if not by_id:
+        return {}, {}
+    tags = _links(
+        Recipe.tags.through.objects.order_by('id'), by_id, 'tag_ids', 'tag',
+    )
+    ingredients = _links(
+        RecipeIngredient.objects.order_by('order', 'id'), by_id,
+        'ingredient_ids', 'ingredient',
+    )
+    return tags, ingredients
@@ -1,13 +1,29 @@
 """
 serializers for rest api
 """
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils.translation import gettext as _
+
 from rest_framework import serializers
 
 from core.models import (
     Recipe,
+    RecipeIngredient,
     Tag,
     Ingredient,
 )
+from recipe.sync import parse_token
+from recipe.units import normalize_unit, to_base
+
+
+def ingredient_amounts_prefetch():
+    """Return the prefetch of recipe ingredient amounts with their names."""
+    return Prefetch(
+        'ingredient_amounts',
+        queryset=RecipeIngredient.objects.filter(
+            ingredient__deleted_at__isnull=True,
+        ).select_related('ingredient'),
+    )
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -28,6 +44,17 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class RecipeIngredientSerializer(serializers.ModelSerializer):
+    """Serializer for the quantity of an ingredient in a recipe"""
+    name = serializers.CharField(source='ingredient.name', max_length=255)
+
+    class Meta:
+        model = RecipeIngredient
+        fields = ['name', 'quantity', 'unit', 'base_quantity', 'base_unit']
+        read_only_fields = ['base_quantity', 'base_unit']
+        extra_kwargs = {'quantity': {'min_value': 0}}
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """
     Serializer for recipe
@@ -38,40 +65,95 @@ class RecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
         fields = [
-            'id', 'title', 'time_minutes', 'price', 'link', 'tags',
-            'ingredients',
+            'id', 'title', 'time_minutes', 'servings', 'price', 'link',
+            'tags', 'ingredients',
         ]
         read_only_fields = ['id']
 
+    def save(self, **kwargs):
+        # Ids of the tags and ingredients the write creates, for the change
+        # log of the sync API.
+        self.created = {'tags': [], 'ingredients': []}
+        return super().save(**kwargs)
+
     def _get_or_create_tags(self, tags, recipe):
         """
         get or create tags
         """
         auth_user = self.context['request'].user
+        tag_objs = []
         for tag in tags:
             tag_obj, created = Tag.objects.get_or_create(
                 user=auth_user,
                 **tag,
             )
-            recipe.tags.add(tag_obj)
+            if created:
+                self.created['tags'].append(tag_obj.id)
+            tag_objs.append(tag_obj)
+        recipe.tags.add(*tag_objs)
 
     def _get_or_create_ingredients(self, ingredients, recipe):
         """Handle getting or creating ingredients as needed."""
         auth_user = self.context['request'].user
+        ingredient_objs = []
         for ingredient in ingredients:
             ingredient_obj, created = Ingredient.objects.get_or_create(
                 user=auth_user,
                 **ingredient,
             )
-            recipe.ingredients.add(ingredient_obj)
+            if created:
+                self.created['ingredients'].append(ingredient_obj.id)
+            ingredient_objs.append(ingredient_obj)
+        recipe.ingredients.add(*ingredient_objs)
+
+    def _set_ingredient_amounts(self, amounts, recipe):
+        """
+        Replace the ingredients of recipe with amounts, creating missing
+        ingredients, with a fixed number of queries.
+        """
+        auth_user = self.context['request'].user
+        names = [amount['ingredient']['name'] for amount in amounts]
+        ingredients = {
+            ingredient.name: ingredient
+            for ingredient in Ingredient.objects.filter(
+                user=auth_user, name__in=names,
+            )
+        }
+        new = [
+            Ingredient(user=auth_user, name=name)
+            for name in names if name not in ingredients
+        ]
+        Ingredient.objects.bulk_create(new)
+        self.created['ingredients'].extend(ingredient.id for ingredient in new)
+        ingredients.update((ingredient.name, ingredient) for ingredient in new)
+
+        rows = []
+        for order, amount in enumerate(amounts):
+            quantity = amount.get('quantity')
+            unit = amount.get('unit', '')
+            base_quantity, base_unit = to_base(quantity, unit)
+            rows.append(RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredients[amount['ingredient']['name']],
+                quantity=quantity,
+                unit=normalize_unit(unit) if unit else '',
+                order=order,
+                base_quantity=base_quantity,
+                base_unit=base_unit,
+            ))
+        RecipeIngredient.objects.filter(recipe=recipe).delete()
+        RecipeIngredient.objects.bulk_create(rows)
 
     def create(self, validated_data):
         """Create a recipe."""
         tags = validated_data.pop('tags', [])
         ingredients = validated_data.pop('ingredients', [])
+        amounts = validated_data.pop('ingredient_amounts', None)
         recipe = Recipe.objects.create(**validated_data)
         self._get_or_create_tags(tags, recipe)
         self._get_or_create_ingredients(ingredients, recipe)
+        if amounts is not None:
+            self._set_ingredient_amounts(amounts, recipe)
 
         return recipe
 
@@ -79,6 +161,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         """Update recipe"""
         tags = validated_data.pop('tags', None)
         ingredients = validated_data.pop('ingredients', None)
+        amounts = validated_data.pop('ingredient_amounts', None)
 
         if tags is not None:
             instance.tags.clear()
@@ -88,6 +171,9 @@ class RecipeSerializer(serializers.ModelSerializer):
             instance.ingredients.clear()
             self._get_or_create_ingredients(ingredients, instance)
 
+        if amounts is not None:
+            self._set_ingredient_amounts(amounts, instance)
+
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
@@ -99,8 +185,38 @@ class RecipeDetailSerializer(RecipeSerializer):
     """
     Serializer for recipe detail view
     """
+    ingredient_amounts = RecipeIngredientSerializer(many=True, required=False)
+
     class Meta(RecipeSerializer.Meta):
-        fields = RecipeSerializer.Meta.fields + ['description', 'image']
+        fields = RecipeSerializer.Meta.fields + [
+            'description', 'image', 'ingredient_amounts',
+        ]
+
+    def validate(self, attrs):
+        """
+        Check ingredients are given either by name or with amounts, once each
+        """
+        amounts = attrs.get('ingredient_amounts')
+        if amounts is None:
+            return attrs
+        if 'ingredients' in attrs:
+            raise serializers.ValidationError(
+                _('Set either ingredients or ingredient_amounts, not both.'),
+            )
+        names = [amount['ingredient']['name'] for amount in amounts]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError({
+                'ingredient_amounts': _('Each ingredient can appear once.'),
+            })
+        return attrs
+
+    def to_representation(self, instance):
+        """Load the ingredient amounts in one query unless prefetched"""
+        if 'ingredient_amounts' not in getattr(
+            instance, '_prefetched_objects_cache', {},
+        ):
+            prefetch_related_objects([instance], ingredient_amounts_prefetch())
+        return super().to_representation(instance)
 
 
 class RecipeImageSerializer(serializers.ModelSerializer):
@@ -114,3 +230,195 @@ class RecipeImageSerializer(serializers.ModelSerializer):
         extra_kwargs = {
             'image': {'required': True}
         }
+
+
+class RecipeDuplicateSerializer(serializers.Serializer):
+    """
+    Serializer for duplicating a recipe
+    """
+    title = serializers.CharField(max_length=255, required=False)
+
+
+class RecipeBulkDuplicateSerializer(serializers.Serializer):
+    """
+    Serializer for duplicating many recipes
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=100,
+    )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """
+    Serializer for the IDs of the recipes to get at once
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=300,
+    )
+
+
+class RecipeIdsQuerySerializer(RecipeIdsSerializer):
+    """
+    Serializer for the IDs of the recipes to get at once, comma separated
+    """
+
+    def to_internal_value(self, data):
+        ids = data.get('ids', '')
+        return super().to_internal_value({
+            'ids': [pk for pk in ids.split(',') if pk.strip()],
+        })
+
+
+class MultiGetSerializer(serializers.Serializer):
+    """
+    Serializer for recipes got by ID, in the order of the IDs, and the IDs
+    not found
+    """
+    results = RecipeDetailSerializer(many=True)
+    missing = serializers.ListField(child=serializers.IntegerField())
+
+
+class RecipeRangeQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the range filters of the recipe list
+    """
+    min_time = serializers.IntegerField(required=False)
+    max_time = serializers.IntegerField(required=False)
+    min_price = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False,
+    )
+    max_price = serializers.DecimalField(
+        max_digits=5, decimal_places=2, required=False,
+    )
+
+
+class ShoppingListQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the recipes of a shopping list, as comma separated IDs
+    each optionally followed by ':servings'
+    """
+    recipes = serializers.CharField()
+    servings = serializers.IntegerField(min_value=1, required=False)
+
+    def validate_recipes(self, value):
+        """Return a dict of servings, None for unset, by recipe ID"""
+        recipes = {}
+        try:
+            for item in value.split(','):
+                recipe_id, sep, servings = item.partition(':')
+                servings = int(servings) if sep else None
+                if servings is not None and servings < 1:
+                    raise ValueError(servings)
+                recipes[int(recipe_id)] = servings
+        except ValueError:
+            raise serializers.ValidationError(
+                _('Expected recipe IDs like 1,2:4,3.'),
+            )
+        if len(recipes) > 100:
+            raise serializers.ValidationError(
+                _('At most 100 recipes per shopping list.'),
+            )
+        return recipes
+
+
+class SimilarQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the number of similar recipes to return
+    """
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
+class SimilarRecipeSerializer(RecipeSerializer):
+    """
+    Serializer for a recipe with its similarity to another one
+    """
+    similarity = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ['similarity']
+        read_only_fields = RecipeSerializer.Meta.fields
+
+
+class PantryQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the ingredients at hand, as comma separated IDs and
+    names
+    """
+    ingredients = serializers.CharField(required=False)
+    names = serializers.CharField(required=False)
+    max_missing = serializers.IntegerField(min_value=0, default=2)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+    def validate_ingredients(self, value):
+        """Return the list of ingredient IDs"""
+        try:
+            return [int(pk) for pk in value.split(',')]
+        except ValueError:
+            raise serializers.ValidationError(
+                _('Expected ingredient IDs like 1,2,3.'),
+            )
+
+    def validate_names(self, value):
+        """Return the list of ingredient names"""
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def validate(self, attrs):
+        if not attrs.get('ingredients') and not attrs.get('names'):
+            raise serializers.ValidationError(
+                _('Give ingredients or names.'),
+            )
+        return attrs
+
+
+class PantryRecipeSerializer(RecipeSerializer):
+    """
+    Serializer for a recipe with the ingredients missing to cook it
+    """
+    missing = serializers.IntegerField(read_only=True)
+    missing_ingredients = serializers.ListField(
+        child=serializers.CharField(), read_only=True,
+    )
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + [
+            'missing', 'missing_ingredients',
+        ]
+        read_only_fields = RecipeSerializer.Meta.fields
+
+
+class NormalizedRecipeSerializer(RecipeSerializer):
+    """
+    Serializer for a recipe with the ids of its tags and ingredients, set
+    by recipe.normalized.side_load
+    """
+    tags = serializers.ListField(
+        child=serializers.IntegerField(), source='tag_ids', read_only=True,
+    )
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(), source='ingredient_ids',
+        read_only=True,
+    )
+
+    class Meta(RecipeSerializer.Meta):
+        read_only_fields = RecipeSerializer.Meta.fields
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    """
+    Serializer for the token of the last sync, none for a full sync
+    """
+    since = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=1000, default=500,
+    )
+
+    def validate_since(self, value):
+        """Return the change number of the token"""
+        seq = parse_token(value)
+        if seq is None:
+            raise serializers.ValidationError(_('Invalid sync token.'))
+        return seq
@@ -0,0 +1,71 @@
+"""
+Shopping lists summing the ingredients of many recipes.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Case,
+    Count,
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    Sum,
+    Value,
+    When,
+)
+
+from core.models import RecipeIngredient
+from recipe.units import BASE_PLACES
+
+
+def shopping_list(user, recipes, servings=None):
+    """
+    Return the ingredients of the recipes of user summed by name and base
+    unit, in one grouped query.
+
+    recipes maps recipe IDs to the servings wanted, or None for the
+    servings argument, or when that is None too the recipe's servings.
+    """
+    default = Value(servings) if servings else F('recipe__servings')
+    wanted = Case(
+        *[
+            When(recipe_id=recipe_id, then=Value(count))
+            for recipe_id, count in recipes.items() if count
+        ],
+        default=default,
+        output_field=IntegerField(),
+    )
+    scaled = ExpressionWrapper(
+        F('base_quantity') * wanted / F('recipe__servings'),
+        output_field=DecimalField(max_digits=20, decimal_places=3),
+    )
+    return RecipeIngredient.objects.filter(
+        recipe_id__in=recipes,
+        recipe__user=user,
+        recipe__deleted_at__isnull=True,
+        ingredient__deleted_at__isnull=True,
+    ).values(
+        'base_unit',
+        name=F('ingredient__name'),
+    ).annotate(
+        quantity=Sum(scaled),
+        recipes=Count('recipe_id', distinct=True),
+    ).order_by('name', 'base_unit')
+
+
+def shopping_items(rows):
+    """
+    Return rows as shopping list items, with quantities as strings so
+    every format renders them alike.
+    """
+    return [
+        {
+            'name': row['name'],
+            'quantity': None if row['quantity'] is None else
+            str(Decimal(row['quantity']).quantize(BASE_PLACES)),
+            'unit': row['base_unit'],
+            'recipes': row['recipes'],
+        }
+        for row in rows
+    ]
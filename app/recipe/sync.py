@@ -0,0 +1,123 @@
+"""
+Change log of the recipes, tags and ingredients of each user, for clients
+keeping an offline copy.
+
+Every write increments User.recipes_version and logs the objects it
+changed under the new number, in the transaction of the write. The UPDATE
+locks the row of the user until the commit, so the writes of a user are
+numbered in commit order and a client that has seen the changes up to a
+number cannot miss an earlier one committing late.
+
+Clients pass back the token of their last sync, '<number>-<timestamp>',
+and get the objects changed since, current or deleted. compact_changes
+keeps the last change of each object and removes changes older than
+SYNC_RETENTION, so older tokens are refused with 410 Gone and the client
+syncs from scratch.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.models import Change
+from recipe import events, index
+
+
+KINDS = {
+    'recipes': Change.RECIPE,
+    'tags': Change.TAG,
+    'ingredients': Change.INGREDIENT,
+}
+
+
+class SyncTokenExpired(APIException):
+    """The changes since a sync token were compacted away."""
+    status_code = status.HTTP_410_GONE
+    default_detail = _('Sync token expired, sync again without since.')
+    default_code = 'sync_token_expired'
+
+
+def record_changes(user, recipes=(), tags=(), ingredients=()):
+    """
+    Log a write to the recipes, tags and ingredients of user with these
+    ids, return its number.
+
+    Must run in the transaction of the write, the recipe index and the
+    event streams of this process are updated when it commits.
+    """
+    users = get_user_model().objects.filter(pk=user.pk)
+    users.update(recipes_version=F('recipes_version') + 1)
+    seq = users.values_list('recipes_version', flat=True).get()
+    user.recipes_version = seq
+    Change.objects.bulk_create([
+        Change(user=user, seq=seq, kind=KINDS[kind], object_id=object_id)
+        for kind, ids in (
+            ('recipes', recipes),
+            ('tags', tags),
+            ('ingredients', ingredients),
+        )
+        for object_id in dict.fromkeys(ids)
+    ])
+    index.update_on_commit(user, seq, recipes, tags, ingredients)
+    transaction.on_commit(events.broker.notify)
+    return seq
+
+
+def make_token(seq):
+    """Return the sync token of the changes up to seq."""
+    return f'{seq}-{int(time.time())}'
+
+
+def parse_token(token):
+    """Return the change number of a sync token, None if malformed."""
+    try:
+        seq, stamp = (int(part) for part in token.split('-'))
+    except ValueError:
+        return None
+    if seq < 0:
+        return None
+    if stamp < time.time() - settings.SYNC_RETENTION:
+        raise SyncTokenExpired()
+    return seq
+
+
+def current_seq(user):
+    """Return the number of the last committed change of user."""
+    return get_user_model().objects.filter(pk=user.pk).values_list(
+        'recipes_version', flat=True,
+    ).get()
+
+
+def changed_ids(user, since, limit):
+    """
+    Return the ids of the objects of user changed after since by kind, up
+    to limit of them unless a single write changed more, the number of
+    the last change returned and whether more changes follow.
+    """
+    # Read before the changes, later ones are sent again next time.
+    upto = max(current_seq(user), since)
+    changes = Change.objects.filter(user=user, seq__gt=since).order_by('seq')
+    rows = list(changes.values_list('seq', 'kind', 'object_id')[:limit + 1])
+    more = len(rows) > limit
+    if more:
+        # Stop before the last write, it may not be complete.
+        upto = rows[-1][0] - 1
+        if upto < rows[0][0]:
+            upto = rows[0][0]
+            rows = list(changes.filter(seq=upto).values_list(
+                'seq', 'kind', 'object_id',
+            ))
+        else:
+            rows = [row for row in rows if row[0] <= upto]
+
+    ids = {kind: set() for kind in KINDS}
+    names = {value: kind for kind, value in KINDS.items()}
+    for seq, kind, object_id in rows:
+        ids[names[kind]].add(object_id)
+    return ids, upto, more
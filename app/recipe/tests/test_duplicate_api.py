@@ -0,0 +1,115 @@
+"""
+Tests for duplicating recipes.
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+)
+
+
+DUPLICATE_MANY_URL = reverse('recipe:recipe-duplicate-many')
+
+
+def duplicate_url(recipe_id):
+    """Return the URL duplicating a recipe."""
+    return reverse('recipe:recipe-duplicate', args=[recipe_id])
+
+
+class DuplicateRecipeApiTests(TestCase):
+    """Test the recipe duplication endpoints."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipe = create_recipe(
+            user=self.user, title='Curry', image='uploads/recipe/curry.jpg',
+        )
+        self.recipe.tags.set(create_tags(self.user, ['Dinner', 'Spicy']))
+        self.recipe.ingredients.set(create_ingredients(self.user, ['Rice']))
+
+    def test_duplicate(self):
+        """Test copying a recipe with its links and image reference."""
+        res = self.client.post(duplicate_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        copy = Recipe.objects.get(id=res.data['id'])
+        self.assertNotEqual(copy.id, self.recipe.id)
+        self.assertEqual(copy.title, 'Curry')
+        self.assertEqual(copy.price, self.recipe.price)
+        self.assertEqual(copy.image.name, self.recipe.image.name)
+        self.assertEqual(set(copy.tags.all()), set(self.recipe.tags.all()))
+        self.assertEqual(list(copy.ingredients.all()),
+                         list(self.recipe.ingredients.all()))
+        self.assertEqual(len(res.data['tags']), 2)
+
+    def test_duplicate_with_title(self):
+        """Test copying a recipe under a new title."""
+        res = self.client.post(duplicate_url(self.recipe.id),
+                               {'title': 'Mild curry'})
+
+        self.assertEqual(res.data['title'], 'Mild curry')
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.title, 'Curry')
+
+    def test_duplicate_other_user_recipe(self):
+        """Test recipes of other users cannot be copied."""
+        other = create_recipe(user=create_user(email='other@example.com'))
+
+        res = self.client.post(duplicate_url(other.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_duplicate_many(self):
+        """Test copying many recipes keeps the requested order."""
+        second = create_recipe(user=self.user, title='Soup')
+
+        res = self.client.post(
+            DUPLICATE_MANY_URL,
+            {'ids': [second.id, self.recipe.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r['title'] for r in res.data], ['Soup', 'Curry'])
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(len(res.data[1]['tags']), 2)
+
+    def test_duplicate_many_constant_queries(self):
+        """Test copying many recipes takes a fixed number of queries."""
+        recipes = [create_recipe(user=self.user) for _ in range(5)]
+        for recipe in recipes:
+            recipe.tags.set(self.recipe.tags.all())
+            recipe.ingredients.set(self.recipe.ingredients.all())
+
+        with self.assertNumQueries(16):
+            self.client.post(DUPLICATE_MANY_URL, {'ids': [self.recipe.id]},
+                             format='json')
+        with self.assertNumQueries(16):
+            self.client.post(
+                DUPLICATE_MANY_URL,
+                {'ids': [recipe.id for recipe in recipes]},
+                format='json',
+            )
+
+    def test_duplicate_many_missing(self):
+        """Test copying unknown or foreign recipes copies nothing."""
+        other = create_recipe(user=create_user(email='other@example.com'))
+
+        res = self.client.post(
+            DUPLICATE_MANY_URL,
+            {'ids': [self.recipe.id, other.id]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Recipe.objects.filter(user=self.user).count(), 1)
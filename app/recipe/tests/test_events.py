@@ -0,0 +1,232 @@
+"""
+Tests for the server-sent events of recipe changes.
+"""
+import asyncio
+import json
+from unittest.mock import patch
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.authentication import revoked
+from core.models import AuthToken
+from core.tests.factories import create_recipe, create_user
+from recipe import events
+from recipe.sync import record_changes
+
+
+def parse(body):
+    """Return the (id, event, data) of the events of a stream body."""
+    parsed = []
+    for block in body.decode().split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in block.splitlines()
+            if ': ' in line and not line.startswith(':')
+        )
+        if 'event' in fields:
+            parsed.append((
+                int(fields['id']) if 'id' in fields else None,
+                fields['event'],
+                json.loads(fields['data']),
+            ))
+    return parsed
+
+
+@override_settings(EVENTS_POLL_INTERVAL=0.01, EVENTS_HEARTBEAT=5)
+class EventStreamTests(TestCase):
+    """Test streaming the changes of a user."""
+
+    def setUp(self):
+        # The test database lives in a transaction of this thread.
+        connections = patch('recipe.events.close_old_connections')
+        connections.start()
+        self.addCleanup(connections.stop)
+        self.addCleanup(revoked.clear)
+        self.user = create_user()
+        _, self.key = AuthToken.objects.create_token(self.user)
+
+    def stream(self, headers=None, until=None, during=None, method='GET'):
+        """
+        Open a stream, run during, return the start message and the body
+        once until returns true for it.
+        """
+        if headers is None:
+            headers = {'authorization': f'Token {self.key}'}
+        scope = {
+            'type': 'http', 'method': method, 'path': events.PATH,
+            'headers': [(k.encode(), v.encode()) for k, v in headers.items()],
+        }
+
+        async def run():
+            messages = []
+            done = asyncio.Event()
+
+            async def receive():
+                await done.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+                body = b''.join(m.get('body', b'') for m in messages)
+                if until is None or until(body):
+                    done.set()
+
+            from app.asgi import application
+            task = asyncio.ensure_future(application(scope, receive, send))
+            if during is not None:
+                await asyncio.sleep(0.05)
+                await sync_to_async(during)()
+            await asyncio.wait_for(task, 5)
+            return messages
+
+        messages = async_to_sync(run)()
+        return messages[0], b''.join(m.get('body', b'') for m in messages)
+
+    def change(self, title='Soup'):
+        """Create a recipe and record the change."""
+        recipe = create_recipe(user=self.user, title=title)
+        return recipe, record_changes(self.user, recipes=[recipe.id])
+
+    def test_live_changes(self):
+        """Test changes committed while connected are pushed."""
+        created = []
+
+        def during():
+            created.append(self.change())
+            recipe, _ = created[0]
+            recipe.soft_delete()
+            record_changes(self.user, recipes=[recipe.id])
+
+        start, body = self.stream(
+            until=lambda body: body.count(b'event: change') == 2,
+            during=during,
+        )
+
+        self.assertEqual(start['status'], 200)
+        self.assertIn((b'content-type', b'text/event-stream'),
+                      start['headers'])
+        (recipe, seq), = created
+        first, second = parse(body)
+        self.assertEqual(first[:2], (seq, 'change'))
+        self.assertEqual(second[0], seq + 1)
+        self.assertEqual(second[2]['deleted']['recipes'], [recipe.id])
+        self.assertEqual(second[2]['changed']['recipes'], [])
+
+    def test_resume(self):
+        """Test clients get the changes after their Last-Event-ID."""
+        _, first = self.change('Soup')
+        stew, _ = self.change('Stew')
+        headers = {
+            'authorization': f'Token {self.key}',
+            'last-event-id': str(first),
+        }
+
+        _, body = self.stream(
+            headers, until=lambda body: b'event: change' in body,
+        )
+
+        (seq, name, data), = parse(body)
+        self.assertEqual(seq, first + 1)
+        self.assertEqual(data['changed']['recipes'], [stew.id])
+
+    def test_live_during_replay(self):
+        """Test live changes published during the replay come after it."""
+        for n in range(2):
+            self.change(f'Recipe {n}')
+        load_events = events.load_events
+
+        def load_and_publish(user_id, after, upto, limit=None):
+            replay = load_events(user_id, after, upto, limit)
+            _, seq = self.change('Live')
+            live = load_events(user_id, upto, seq)
+            for stream in events.broker.streams[user_id]:
+                for event in live:
+                    events.broker.loop.call_soon_threadsafe(stream.put, event)
+            return replay
+
+        headers = {
+            'authorization': f'Token {self.key}', 'last-event-id': '0',
+        }
+        with patch('recipe.events.load_events', load_and_publish):
+            _, body = self.stream(
+                headers, until=lambda body: body.count(b'event: change') == 3,
+            )
+
+        self.assertEqual([event[0] for event in parse(body)], [1, 2, 3])
+
+    @override_settings(EVENTS_HEARTBEAT=0.01)
+    def test_token_invalidated(self):
+        """Test streams close once their token is revoked or expired."""
+        for invalidate in (
+            lambda tokens: tokens.delete(),
+            lambda tokens: tokens.update(expires=timezone.now()),
+        ):
+            _, self.key = AuthToken.objects.create_token(self.user)
+
+            def during():
+                invalidate(AuthToken.objects.filter(user=self.user))
+
+            _, body = self.stream(until=lambda body: False, during=during)
+
+            self.assertTrue(body.startswith(b'retry: '))
+
+    @override_settings(EVENTS_BUFFER=2)
+    def test_resume_too_far(self):
+        """Test clients missing more than a buffer are told to sync."""
+        for n in range(3):
+            self.change(f'Recipe {n}')
+        headers = {
+            'authorization': f'Token {self.key}', 'last-event-id': '0',
+        }
+
+        _, body = self.stream(headers, until=lambda body: False)
+
+        self.assertEqual([event[1] for event in parse(body)], ['reset'])
+
+    @override_settings(EVENTS_HEARTBEAT=0.01)
+    def test_heartbeat(self):
+        """Test idle streams get comments to keep the connection open."""
+        _, body = self.stream(until=lambda body: b': ping' in body)
+
+        self.assertTrue(body.startswith(b'retry: '))
+
+    def test_unauthenticated(self):
+        """Test streams need a valid token."""
+        for headers in ({}, {'authorization': 'Token nope.nope'}):
+            start, body = self.stream(headers)
+            self.assertEqual(start['status'], 401)
+
+    def test_method(self):
+        """Test only GET opens a stream."""
+        start, _ = self.stream(method='POST')
+
+        self.assertEqual(start['status'], 405)
+
+    def test_other_paths_served_by_django(self):
+        """Test the ASGI application passes other requests to Django."""
+        with patch('app.asgi.django_application') as django_application:
+            async def serve(scope, receive, send):
+                pass
+            django_application.side_effect = serve
+            from app.asgi import application
+            scope = {'type': 'http', 'path': '/api/health/live/'}
+            async_to_sync(application)(scope, None, None)
+
+        django_application.assert_called_once()
+
+
+class StreamTests(TestCase):
+    """Test the buffers of the streams."""
+
+    @override_settings(EVENTS_BUFFER=1)
+    def test_overflow(self):
+        """Test a full stream is flagged instead of blocking."""
+        async def fill():
+            stream = events.Stream(1, 0)
+            stream.put((1, {}))
+            stream.put((2, {}))
+            return stream.overflowed
+
+        self.assertTrue(async_to_sync(fill)())
@@ -0,0 +1,151 @@
+"""
+Tests for ingredient quantities of recipes.
+"""
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Ingredient, RecipeIngredient
+from core.tests.factories import create_ingredients, create_recipe, create_user
+from recipe.units import normalize_unit, to_base
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class UnitTests(SimpleTestCase):
+    """Test normalizing units."""
+
+    def test_normalize_unit(self):
+        """Test unit spellings map to one canonical unit."""
+        self.assertEqual(normalize_unit('Tablespoons'), 'tbsp')
+        self.assertEqual(normalize_unit(' Fluid  Ounce '), 'fl oz')
+        self.assertEqual(normalize_unit('Tbsp.'), 'tbsp')
+        self.assertEqual(normalize_unit('Pinch'), 'pinch')
+
+    def test_to_base(self):
+        """Test converting quantities to base units."""
+        self.assertEqual(to_base(Decimal('1.5'), 'kg'),
+                         (Decimal('1500.000'), 'g'))
+        self.assertEqual(to_base(Decimal('2'), 'tbsp'),
+                         (Decimal('29.574'), 'ml'))
+        self.assertEqual(to_base(Decimal('3'), ''), (Decimal('3.000'), 'pc'))
+        self.assertEqual(to_base(Decimal('1'), 'pinch'),
+                         (Decimal('1.000'), 'pinch'))
+        self.assertEqual(to_base(None, 'g'), (None, 'g'))
+
+
+class IngredientAmountApiTests(TestCase):
+    """Test writing and reading ingredient amounts."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_create_with_amounts(self):
+        """Test creating a recipe with ingredient amounts."""
+        rice, = create_ingredients(self.user, ['Rice'])
+        payload = {
+            'title': 'Curry',
+            'time_minutes': 30,
+            'price': '5.50',
+            'ingredient_amounts': [
+                {'name': 'Rice', 'quantity': '0.5', 'unit': 'Kilograms'},
+                {'name': 'Curry paste', 'quantity': '2', 'unit': 'tbsp'},
+                {'name': 'Onion', 'quantity': '1'},
+            ],
+        }
+
+        res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        amounts = res.data['ingredient_amounts']
+        self.assertEqual([a['name'] for a in amounts],
+                         ['Rice', 'Curry paste', 'Onion'])
+        self.assertEqual(amounts[0]['unit'], 'kg')
+        self.assertEqual(amounts[0]['base_quantity'], '500.000')
+        self.assertEqual(amounts[0]['base_unit'], 'g')
+        self.assertEqual(amounts[2]['base_unit'], 'pc')
+        self.assertEqual(Ingredient.objects.filter(user=self.user).count(), 3)
+        self.assertIn(rice.id, [i['id'] for i in res.data['ingredients']])
+
+    def test_update_amounts(self):
+        """Test replacing the ingredient amounts of a recipe."""
+        recipe = create_recipe(user=self.user)
+        recipe.ingredients.set(create_ingredients(self.user, ['Salt']))
+        payload = {'ingredient_amounts': [
+            {'name': 'Pepper', 'quantity': '1', 'unit': 'tsp'},
+        ]}
+
+        res = self.client.patch(detail_url(recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([i.name for i in recipe.ingredients.all()],
+                         ['Pepper'])
+        self.assertEqual(RecipeIngredient.objects.get().base_unit, 'ml')
+
+    def test_names_only_have_no_quantity(self):
+        """Test ingredients set by name have no quantity."""
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Toast',
+            'time_minutes': 5,
+            'price': '1.00',
+            'ingredients': [{'name': 'Bread'}],
+        }, format='json')
+
+        self.assertEqual(res.data['ingredient_amounts'], [{
+            'name': 'Bread', 'quantity': None, 'unit': '',
+            'base_quantity': None, 'base_unit': '',
+        }])
+
+    def test_amounts_and_names_rejected(self):
+        """Test ingredients cannot be set both ways at once."""
+        recipe = create_recipe(user=self.user)
+        payload = {
+            'ingredients': [{'name': 'Salt'}],
+            'ingredient_amounts': [{'name': 'Salt', 'quantity': '1'}],
+        }
+
+        res = self.client.patch(detail_url(recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_duplicate_amounts_rejected(self):
+        """Test an ingredient can only appear once."""
+        recipe = create_recipe(user=self.user)
+        payload = {'ingredient_amounts': [
+            {'name': 'Salt', 'quantity': '1'},
+            {'name': 'Salt', 'quantity': '2'},
+        ]}
+
+        res = self.client.patch(detail_url(recipe.id), payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_amounts_constant_queries(self):
+        """Test writing amounts takes the same queries for any count."""
+        recipe = create_recipe(user=self.user)
+
+        def patch(count):
+            payload = {'ingredient_amounts': [
+                {'name': f'Ingredient {n}', 'quantity': n, 'unit': 'g'}
+                for n in range(count)
+            ]}
+            return self.client.patch(detail_url(recipe.id), payload,
+                                     format='json')
+
+        patch(1)
+        with self.assertNumQueries(16):
+            patch(2)
+        with self.assertNumQueries(16):
+            patch(20)
@@ -1,7 +1,6 @@
 """Test for the Ingredient API"""
 from decimal import Decimal
 
-from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
 
@@ -12,6 +11,7 @@ from core.models import (
     Ingredient,
     Recipe,
 )
+from core.tests.factories import create_user
 from recipe.serializers import IngredientSerializer
 
 
@@ -23,11 +23,6 @@ def detail_url(ingredient_id):
     return reverse('recipe:ingredient-detail', args=[ingredient_id])
 
 
-def create_user(email='user@example.com', password='testpass'):
-    """Create a user"""
-    return get_user_model().objects.create_user(email=email, password=password)
-
-
 class PublicIngredientsApiTests(TestCase):
     """Test the publicly available ingredients API"""
 
@@ -0,0 +1,153 @@
+"""
+Tests for getting many recipes at once.
+"""
+from django.core.cache import caches
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.factories import (
+    create_recipe,
+    create_recipes,
+    create_tags,
+    create_user,
+)
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+MULTI_GET_URL = reverse('recipe:recipe-multi-get')
+
+
+def detail_url(recipe_id):
+    """Create and return a recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class MultiGetApiTests(TestCase):
+    """Test getting the details of many recipes by id."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.recipes = create_recipes(
+            self.user, 3, tags=create_tags(self.user, ['Vegan']),
+        )
+
+    def ids(self, *recipes):
+        """Return the comma separated ids of recipes."""
+        return ','.join(str(recipe.id) for recipe in recipes)
+
+    def test_get_ids(self):
+        """Test recipes come in the requested order with their details."""
+        first, second, third = self.recipes
+
+        res = self.client.get(RECIPES_URL, {
+            'ids': self.ids(third, first, second),
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [third.id, first.id, second.id],
+        )
+        self.assertEqual(
+            res.data['results'][0], self.client.get(detail_url(third.id)).data,
+        )
+        self.assertEqual(res.data['missing'], [])
+
+    def test_post(self):
+        """Test the ids can be posted."""
+        first, second, _ = self.recipes
+
+        res = self.client.post(
+            MULTI_GET_URL, {'ids': [second.id, first.id]}, format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']],
+            [second.id, first.id],
+        )
+
+    def test_missing(self):
+        """Test unknown, deleted and other users' ids are reported."""
+        first, second, _ = self.recipes
+        second.soft_delete()
+        other = create_recipe(user=create_user(email='other@example.com'))
+
+        res = self.client.post(MULTI_GET_URL, {
+            'ids': [other.id, first.id, 0, second.id, first.id],
+        }, format='json')
+
+        self.assertEqual(
+            [recipe['id'] for recipe in res.data['results']], [first.id],
+        )
+        self.assertEqual(res.data['missing'], [other.id, 0, second.id])
+
+    def test_invalid(self):
+        """Test bad, empty and too long lists of ids are refused."""
+        for ids in ('1,x', '', ','.join(map(str, range(1, 302)))):
+            with self.subTest(ids=ids[:10]):
+                res = self.client.get(RECIPES_URL, {'ids': ids})
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_queries(self):
+        """Test the number of queries does not grow with the ids."""
+        recipes = create_recipes(self.user, 20)
+
+        # Recipes, tags, ingredients and ingredient amounts.
+        with self.assertNumQueries(4):
+            res = self.client.get(RECIPES_URL, {'ids': self.ids(*recipes)})
+
+        self.assertEqual(len(res.data['results']), 20)
+
+
+@override_settings(RECIPE_CACHE='default')
+class MultiGetCacheTests(TestCase):
+    """Test recipe details are reused from the cache."""
+
+    def setUp(self):
+        caches['default'].clear()
+        self.addCleanup(caches['default'].clear)
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.first, self.second = create_recipes(self.user, 2)
+
+    def test_reused(self):
+        """Test cached details are not loaded again."""
+        self.client.get(detail_url(self.first.id))
+
+        with self.assertNumQueries(4):
+            res = self.client.post(MULTI_GET_URL, {
+                'ids': [self.second.id, self.first.id],
+            }, format='json')
+        with self.assertNumQueries(0):
+            cached = self.client.post(MULTI_GET_URL, {
+                'ids': [self.second.id, self.first.id],
+            }, format='json')
+
+        self.assertEqual(cached.data, res.data)
+
+    def test_write_invalidates(self):
+        """Test a write makes the cached details of the user stale."""
+        self.client.get(detail_url(self.first.id))
+
+        self.client.patch(detail_url(self.first.id), {'title': 'Renamed'})
+        res = self.client.get(detail_url(self.first.id))
+
+        self.assertEqual(res.data['title'], 'Renamed')
+
+    def test_missing_not_cached(self):
+        """Test deleted recipes are not served from the cache."""
+        self.client.get(detail_url(self.first.id))
+
+        self.client.delete(detail_url(self.first.id))
+        res = self.client.get(detail_url(self.first.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
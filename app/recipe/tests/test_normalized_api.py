@@ -0,0 +1,126 @@
+"""
+Tests for the normalized recipe list.
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_recipes,
+    create_tags,
+    create_user,
+)
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class NormalizedListApiTests(TestCase):
+    """Test listing recipes with side-loaded tags and ingredients."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.vegan, self.quick = create_tags(self.user, ['Vegan', 'Quick'])
+        self.rice, self.peas = create_ingredients(self.user, ['Rice', 'Peas'])
+
+    def test_side_loaded(self):
+        """Test recipes reference tags and ingredients listed once by id."""
+        risotto = create_recipe(user=self.user, title='Risotto')
+        risotto.tags.add(self.vegan, self.quick)
+        risotto.ingredients.add(self.rice, self.peas)
+        salad = create_recipe(user=self.user, title='Salad')
+        salad.tags.add(self.vegan)
+        nested = self.client.get(RECIPES_URL).json()
+
+        res = self.client.get(RECIPES_URL, {'format': 'normalized'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        data = res.json()
+        self.assertEqual(data['tags'], {
+            str(self.vegan.id): {'id': self.vegan.id, 'name': 'Vegan'},
+            str(self.quick.id): {'id': self.quick.id, 'name': 'Quick'},
+        })
+        self.assertEqual(data['ingredients'], {
+            str(self.rice.id): {'id': self.rice.id, 'name': 'Rice'},
+            str(self.peas.id): {'id': self.peas.id, 'name': 'Peas'},
+        })
+        # The same recipes as the nested list, with references.
+        self.assertEqual(len(data['results']), len(nested))
+        for recipe, expected in zip(data['results'], nested):
+            for field in ('tags', 'ingredients'):
+                self.assertCountEqual(
+                    [data[field][str(pk)] for pk in recipe.pop(field)],
+                    expected.pop(field),
+                )
+            self.assertEqual(recipe, expected)
+
+    def test_deleted_references(self):
+        """Test soft deleted tags and ingredients are left out."""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(self.vegan, self.quick)
+        recipe.ingredients.add(self.rice)
+        self.quick.delete()
+        self.rice.delete()
+
+        data = self.client.get(RECIPES_URL, {'format': 'normalized'}).json()
+
+        self.assertEqual(data['results'][0]['tags'], [self.vegan.id])
+        self.assertEqual(data['results'][0]['ingredients'], [])
+        self.assertEqual(list(data['tags']), [str(self.vegan.id)])
+        self.assertEqual(data['ingredients'], {})
+
+    def test_queries(self):
+        """Test the list takes one query per relation for any size."""
+        create_recipes(self.user, 20, tags=[self.vegan, self.quick],
+                       ingredients=[self.rice])
+
+        # Recipes, tag links and ingredient links.
+        with self.assertNumQueries(3):
+            res = self.client.get(RECIPES_URL, {'format': 'normalized'})
+
+        self.assertEqual(len(res.json()['results']), 20)
+
+    def test_paginated(self):
+        """Test pages side-load the references of their recipes only."""
+        first, second = create_recipes(self.user, 2)
+        first.tags.add(self.vegan)
+        second.tags.add(self.quick)
+
+        res = self.client.get(RECIPES_URL, {
+            'format': 'normalized', 'page_size': 1,
+        })
+
+        data = res.json()
+        self.assertEqual([r['id'] for r in data['results']], [second.id])
+        self.assertEqual(list(data['tags']), [str(self.quick.id)])
+        self.assertIsNotNone(data['next'])
+
+    def test_empty(self):
+        """Test an empty list."""
+        res = self.client.get(RECIPES_URL, {'format': 'normalized'})
+
+        self.assertEqual(res.json(), {
+            'results': [], 'tags': {}, 'ingredients': {},
+        })
+
+    def test_other_actions(self):
+        """Test only the list is normalized."""
+        recipe = create_recipe(user=self.user)
+        recipe.tags.add(self.vegan)
+
+        res = self.client.get(
+            reverse('recipe:recipe-detail', args=[recipe.id]),
+            {'format': 'normalized'},
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['tags'], [
+            {'id': self.vegan.id, 'name': 'Vegan'},
+        ])
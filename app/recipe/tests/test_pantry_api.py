@@ -0,0 +1,117 @@
+"""
+Tests for the pantry API.
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_user,
+)
+from recipe import index
+from recipe.sync import record_changes
+
+
+PANTRY_URL = reverse('recipe:recipe-pantry')
+
+
+class PantryApiTests(TestCase):
+    """Test finding the recipes to cook with the ingredients at hand."""
+
+    def setUp(self):
+        index.clear()
+        self.addCleanup(index.clear)
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.rice, self.egg, self.peas, self.ham = create_ingredients(
+            self.user, ['Rice', 'Egg', 'Peas', 'Ham'],
+        )
+
+    def recipe(self, title, *ingredients):
+        """Create a recipe with ingredients."""
+        recipe = create_recipe(user=self.user, title=title)
+        recipe.ingredients.set(ingredients)
+        return recipe
+
+    def test_ranked_by_missing(self):
+        """Test recipes missing fewer ingredients come first."""
+        fried_rice = self.recipe('Fried rice', self.rice, self.egg, self.peas)
+        omelette = self.recipe('Omelette', self.egg)
+        carbonara = self.recipe('Carbonara', self.egg, self.ham, self.peas)
+        self.recipe('Pea soup', self.peas, self.ham)
+        self.recipe('Toast')
+
+        res = self.client.get(PANTRY_URL, {
+            'ingredients': f'{self.rice.id},{self.egg.id}',
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(r['id'], r['missing']) for r in res.data],
+            [(omelette.id, 0), (fried_rice.id, 1), (carbonara.id, 2)],
+        )
+        self.assertEqual(res.data[1]['missing_ingredients'], ['Peas'])
+
+    def test_max_missing(self):
+        """Test recipes missing too many ingredients are left out."""
+        self.recipe('Fried rice', self.rice, self.egg, self.peas)
+        omelette = self.recipe('Omelette', self.egg)
+
+        res = self.client.get(PANTRY_URL, {
+            'ingredients': str(self.egg.id), 'max_missing': 0,
+        })
+
+        self.assertEqual([r['id'] for r in res.data], [omelette.id])
+
+    def test_names(self):
+        """Test ingredients at hand can be named, ignoring case."""
+        fried_rice = self.recipe('Fried rice', self.rice, self.egg)
+        other = create_user(email='other@example.com')
+        create_ingredients(other, ['Ham'])
+
+        res = self.client.get(PANTRY_URL, {'names': 'rice, EGG,ham'})
+
+        self.assertEqual(
+            [(r['id'], r['missing']) for r in res.data],
+            [(fried_rice.id, 0)],
+        )
+
+    def test_other_users_recipes(self):
+        """Test only recipes of the user are returned."""
+        other = create_user(email='other@example.com')
+        create_recipe(user=other).ingredients.set(
+            create_ingredients(other, ['Rice']),
+        )
+
+        res = self.client.get(PANTRY_URL, {'names': 'Rice'})
+
+        self.assertEqual(res.data, [])
+
+    def test_invalid_query(self):
+        """Test the ingredients at hand are required and checked."""
+        for params in ({}, {'ingredients': 'a,b'}, {'names': ' , '}):
+            res = self.client.get(PANTRY_URL, params)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_write_updates_results(self):
+        """Test new recipes and deleted ingredients are taken into account."""
+        self.recipe('Fried rice', self.rice, self.egg)
+        self.client.get(PANTRY_URL, {'names': 'Rice'})
+        omelette = self.recipe('Omelette', self.egg, self.ham)
+        record_changes(self.user, recipes=[omelette.id])
+
+        res = self.client.get(PANTRY_URL, {'names': 'Egg', 'max_missing': 0})
+        self.assertEqual(res.data, [])
+
+        self.client.delete(
+            reverse('recipe:ingredient-detail', args=[self.ham.id]),
+        )
+
+        res = self.client.get(PANTRY_URL, {'names': 'Egg', 'max_missing': 0})
+        self.assertEqual([r['id'] for r in res.data], [omelette.id])
+        self.assertEqual(res.data[0]['missing_ingredients'], [])
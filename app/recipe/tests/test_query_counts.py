@@ -0,0 +1,250 @@
+"""
+Query count regression tests for the recipe APIs.
+"""
+import tempfile
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import (
+    Recipe,
+    Tag,
+    Ingredient,
+)
+from benchmark.querycount import QueryCountMixin
+from benchmark.seed import seed_user
+from recipe import index
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+MULTI_GET_URL = reverse('recipe:recipe-multi-get')
+SHOPPING_LIST_URL = reverse('recipe:shopping-list')
+SYNC_URL = reverse('recipe:sync')
+PANTRY_URL = reverse('recipe:recipe-pantry')
+
+
+def detail_url(recipe_id):
+    """Return recipe detail URL."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class RecipeQueryCountTests(QueryCountMixin, TestCase):
+    """Test recipe API query counts do not depend on row count."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'user@example.com', 'testpass123',
+        )
+        self.client.force_authenticate(self.user)
+        seed_user(self.user, recipes=2, tags=3, ingredients=3)
+        self.recipe = Recipe.objects.filter(user=self.user).first()
+
+    def grow(self):
+        """Add many recipes, tags and ingredients for the user."""
+        seed_user(self.user, recipes=30, tags=20, ingredients=40)
+        tags = Tag.objects.filter(user=self.user)[:5]
+        ingredients = Ingredient.objects.filter(user=self.user)[:8]
+        self.recipe.tags.add(*tags)
+        self.recipe.ingredients.add(*ingredients)
+
+    def test_recipe_list(self):
+        """Test listing recipes."""
+        self.assertQueryCountStable(
+            'recipe-list', lambda: self.client.get(RECIPES_URL), self.grow,
+        )
+
+    def test_recipe_list_filtered(self):
+        """Test listing recipes filtered by tags and ingredients."""
+        tag_ids = ','.join(
+            str(pk) for pk in Tag.objects.values_list('id', flat=True)
+        )
+        self.assertQueryCountStable(
+            'recipe-list-filtered',
+            lambda: self.client.get(RECIPES_URL, {'tags': tag_ids}),
+            self.grow,
+        )
+
+    def grow_all(self, ids):
+        """Grow the dataset and put the ids of every recipe in ids."""
+        self.grow()
+        ids[:] = Recipe.objects.filter(user=self.user).values_list(
+            'id', flat=True,
+        )
+
+    def cold_index(self, request):
+        """Return request run with the recipe index built from scratch."""
+        def run():
+            index.clear()
+            return request()
+        return run
+
+    def test_recipe_list_normalized(self):
+        """Test listing recipes with side-loaded tags and ingredients."""
+        self.assertQueryCountStable(
+            'recipe-list-normalized',
+            lambda: self.client.get(RECIPES_URL, {'format': 'normalized'}),
+            self.grow,
+        )
+
+    def test_recipe_multi_get(self):
+        """Test getting the details of every recipe by id."""
+        ids = [self.recipe.id]
+        self.assertQueryCountStable(
+            'recipe-multi-get',
+            lambda: self.client.post(
+                MULTI_GET_URL, {'ids': ids}, format='json',
+            ),
+            lambda: self.grow_all(ids),
+        )
+
+    def test_shopping_list(self):
+        """Test the shopping list of every recipe."""
+        ids = [self.recipe.id]
+        self.assertQueryCountStable(
+            'shopping-list',
+            lambda: self.client.get(SHOPPING_LIST_URL, {
+                'recipes': ','.join(map(str, ids)),
+            }),
+            lambda: self.grow_all(ids),
+        )
+
+    def test_sync(self):
+        """Test a full sync."""
+        self.assertQueryCountStable(
+            'sync', lambda: self.client.get(SYNC_URL), self.grow,
+        )
+
+    def test_recipe_similar(self):
+        """Test the recipes similar to one, building the index."""
+        tag = Tag.objects.filter(user=self.user).first()
+        for recipe in Recipe.objects.filter(user=self.user):
+            recipe.tags.add(tag)
+        url = reverse('recipe:recipe-similar', args=[self.recipe.id])
+        self.assertQueryCountStable(
+            'recipe-similar', self.cold_index(lambda: self.client.get(url)),
+            self.grow,
+        )
+
+    def test_recipe_pantry(self):
+        """Test the recipes cooked from some ingredients, building the index."""
+        ingredients = ','.join(map(str, Ingredient.objects.filter(
+            user=self.user,
+        ).values_list('id', flat=True)))
+        self.assertQueryCountStable(
+            'recipe-pantry',
+            self.cold_index(lambda: self.client.get(PANTRY_URL, {
+                'ingredients': ingredients,
+            })),
+            self.grow,
+        )
+
+    def test_recipe_detail(self):
+        """Test retrieving a recipe."""
+        self.assertQueryCountStable(
+            'recipe-detail',
+            lambda: self.client.get(detail_url(self.recipe.id)),
+            self.grow,
+        )
+
+    def test_recipe_create(self):
+        """Test creating a recipe with tags and ingredients."""
+        payload = {
+            'title': 'Curry',
+            'time_minutes': 30,
+            'price': '5.50',
+            'tags': [{'name': 'tag-0'}, {'name': 'Dinner'}],
+            'ingredients': [{'name': 'ingredient-0'}, {'name': 'Rice'}],
+        }
+        self.assertQueryCountStable(
+            'recipe-create',
+            lambda: self.client.post(RECIPES_URL, payload, format='json'),
+            self.grow,
+        )
+
+    def test_recipe_update(self):
+        """Test updating the tags and ingredients of a recipe."""
+        payload = {
+            'tags': [{'name': 'tag-0'}, {'name': 'Dinner'}],
+            'ingredients': [{'name': 'ingredient-0'}, {'name': 'Rice'}],
+        }
+        self.assertQueryCountStable(
+            'recipe-update',
+            lambda: self.client.patch(
+                detail_url(self.recipe.id), payload, format='json',
+            ),
+            self.grow,
+        )
+
+    def test_recipe_upload_image(self):
+        """Test uploading a recipe image."""
+        url = reverse('recipe:recipe-upload-image', args=[self.recipe.id])
+
+        def upload():
+            with tempfile.NamedTemporaryFile(suffix='.jpg') as image_file:
+                Image.new('RGB', (10, 10)).save(image_file, format='JPEG')
+                image_file.seek(0)
+                return self.client.post(
+                    url, {'image': image_file}, format='multipart',
+                )
+
+        with tempfile.TemporaryDirectory() as media, \
+                override_settings(MEDIA_ROOT=media):
+            self.assertQueryCountStable('recipe-upload-image', upload,
+                                        self.grow)
+
+    def test_recipe_duplicate(self):
+        """Test duplicating a recipe."""
+        self.recipe.tags.add(Tag.objects.first())
+        self.recipe.ingredients.add(Ingredient.objects.first())
+        self.assertQueryCountStable(
+            'recipe-duplicate',
+            lambda: self.client.post(
+                reverse('recipe:recipe-duplicate', args=[self.recipe.id]),
+            ),
+            self.grow,
+        )
+
+    def test_recipe_duplicate_many(self):
+        """Test duplicating many recipes."""
+        ids = list(Recipe.objects.values_list('id', flat=True)[:2])
+        for recipe in Recipe.objects.filter(id__in=ids):
+            recipe.tags.add(Tag.objects.first())
+            recipe.ingredients.add(Ingredient.objects.first())
+        self.assertQueryCountStable(
+            'recipe-duplicate-many',
+            lambda: self.client.post(
+                reverse('recipe:recipe-duplicate-many'), {'ids': ids},
+                format='json',
+            ),
+            self.grow,
+        )
+
+    def test_tag_list(self):
+        """Test listing tags."""
+        self.assertQueryCountStable(
+            'tag-list', lambda: self.client.get(TAGS_URL), self.grow,
+        )
+
+    def test_tag_list_assigned_only(self):
+        """Test listing tags assigned to recipes."""
+        self.assertQueryCountStable(
+            'tag-list-assigned-only',
+            lambda: self.client.get(TAGS_URL, {'assigned_only': 1}),
+            self.grow,
+        )
+
+    def test_ingredient_list(self):
+        """Test listing ingredients."""
+        self.assertQueryCountStable(
+            'ingredient-list',
+            lambda: self.client.get(INGREDIENTS_URL),
+            self.grow,
+        )
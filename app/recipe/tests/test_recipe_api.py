@@ -21,6 +21,10 @@ from core.models import (
     Ingredient,
 )
 
+from core.tests.factories import (
+    create_recipe,
+    create_user,
+)
 from recipe.serializers import (
     RecipeSerializer,
     RecipeDetailSerializer,
@@ -40,26 +44,6 @@ def image_upload_url(recipe_id):
     return reverse('recipe:recipe-upload-image', args=[recipe_id])
 
 
-def create_recipe(user, **params):
-    """Create and return a sample recipe."""
-    defaults = {
-        'title': 'Sample recipe title',
-        'time_minutes': 22,
-        'price': Decimal('5.25'),
-        'description': 'Sample description',
-        'link': 'http://example.com/recipe.pdf',
-    }
-    defaults.update(params)
-
-    recipe = Recipe.objects.create(user=user, **defaults)
-    return recipe
-
-
-def create_user(**params):
-    """Create and return a new user."""
-    return get_user_model().objects.create_user(**params)
-
-
 class PublicRecipeAPITests(TestCase):
     """Test unauthenticated API requests."""
 
@@ -208,6 +192,16 @@ class PrivateRecipeApiTests(TestCase):
         self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Recipe.objects.filter(id=recipe.id).exists())
 
+    def test_deleted_recipe_hidden(self):
+        """Test deleted recipes are kept for purging but not returned."""
+        recipe = create_recipe(user=self.user)
+        self.client.delete(detail_url(recipe.id))
+
+        self.assertTrue(Recipe.all_objects.filter(id=recipe.id).exists())
+        self.assertEqual(self.client.get(RECIPES_URL).data, [])
+        res = self.client.get(detail_url(recipe.id))
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
     def test_recipe_other_user_recipe_error(self):
         """Test that only authenticated user can delete a recipe."""
         new_user = create_user(
@@ -0,0 +1,154 @@
+"""
+Tests for filtering, ordering and paginating the recipe list.
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.tests.factories import create_recipe, create_user
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class RecipeFilterApiTests(TestCase):
+    """Test range filters and ordering of the recipe list."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.quick = create_recipe(user=self.user, title='Quick',
+                                   time_minutes=10, price=Decimal('8.00'))
+        self.cheap = create_recipe(user=self.user, title='Cheap',
+                                   time_minutes=25, price=Decimal('3.50'))
+        self.slow = create_recipe(user=self.user, title='Slow',
+                                  time_minutes=90, price=Decimal('3.50'))
+
+    def titles(self, params):
+        """Return the titles listed for params."""
+        res = self.client.get(RECIPES_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [recipe['title'] for recipe in res.data]
+
+    def test_range_filters(self):
+        """Test filtering by time and price ranges."""
+        self.assertEqual(self.titles({'max_time': 30}), ['Cheap', 'Quick'])
+        self.assertEqual(self.titles({'min_time': 25}), ['Slow', 'Cheap'])
+        self.assertEqual(self.titles({'max_time': 30, 'max_price': '5'}),
+                         ['Cheap'])
+        self.assertEqual(self.titles({'min_price': '4.00'}), ['Quick'])
+
+    def test_invalid_range(self):
+        """Test non numeric, non finite and out of range values fail."""
+        for params in ({'max_price': 'cheap'}, {'min_price': 'Infinity'},
+                       {'max_price': 'NaN'}, {'min_price': '-inf'},
+                       {'max_price': '1000'}, {'min_price': '1.005'},
+                       {'min_time': '1.5'}, {'max_time': 'NaN'}):
+            with self.subTest(params=params):
+                res = self.client.get(RECIPES_URL, params)
+
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering(self):
+        """Test ordering by whitelisted fields with id breaking ties."""
+        self.assertEqual(self.titles({'ordering': 'price'}),
+                         ['Cheap', 'Slow', 'Quick'])
+        self.assertEqual(self.titles({'ordering': '-price'}),
+                         ['Quick', 'Slow', 'Cheap'])
+        self.assertEqual(self.titles({'ordering': 'price,-time_minutes'}),
+                         ['Slow', 'Cheap', 'Quick'])
+        self.assertEqual(self.titles({'ordering': 'title'}),
+                         ['Cheap', 'Quick', 'Slow'])
+
+    def test_ordering_unknown_field(self):
+        """Test ordering by fields outside the whitelist is rejected."""
+        for ordering in ('description', 'user__email', '-link'):
+            res = self.client.get(RECIPES_URL, {'ordering': ordering})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unpaginated_by_default(self):
+        """Test the list is a plain list unless a page is requested."""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertIsInstance(res.data, list)
+
+    def test_cursor_pages(self):
+        """Test walking keyset pages in the requested order."""
+        for n in range(4):
+            create_recipe(user=self.user, title=f'Extra {n}',
+                          price=Decimal('3.50'))
+        expected = list(Recipe.objects.filter(user=self.user).order_by(
+            'price', 'id',
+        ).values_list('title', flat=True))
+
+        titles = []
+        url = RECIPES_URL + '?ordering=price&page_size=2'
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(res.data['results']), 2)
+            titles += [recipe['title'] for recipe in res.data['results']]
+            url = res.data['next']
+
+        self.assertEqual(titles, expected)
+
+    def walk(self, url, link='next'):
+        """Return the titles of the pages from url following link."""
+        titles = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            titles.append([recipe['title'] for recipe in res.data['results']])
+            url = res.data[link]
+        return titles
+
+    def test_cursor_ties(self):
+        """Test pages of rows sharing the sort value lose or repeat none."""
+        for n in range(5):
+            create_recipe(user=self.user, title=f'Tied {n}', time_minutes=25,
+                          price=Decimal('3.50'))
+        first = self.client.get(
+            RECIPES_URL, {'ordering': 'time_minutes', 'page_size': 2},
+        )
+        seen = [recipe['title'] for recipe in first.data['results']]
+        # Rows already listed going away must not shift the next pages.
+        Recipe.objects.filter(title__in=seen).delete()
+
+        pages = self.walk(first.data['next'])
+
+        self.assertEqual(sum(pages, seen), [
+            'Quick', 'Cheap', 'Tied 0', 'Tied 1', 'Tied 2', 'Tied 3',
+            'Tied 4', 'Slow',
+        ])
+
+    def test_cursor_backwards(self):
+        """Test previous links walk the same pages back."""
+        for n in range(5):
+            create_recipe(user=self.user, title=f'Tied {n}',
+                          price=Decimal('3.50'))
+        forward = self.walk(RECIPES_URL + '?ordering=-price&page_size=2')
+        last = self.client.get(RECIPES_URL, {
+            'ordering': '-price', 'page_size': 2,
+        })
+        while last.data['next']:
+            last = self.client.get(last.data['next'])
+
+        backward = self.walk(last.data['previous'], link='previous')
+
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_invalid_cursor(self):
+        """Test cursors that do not match the ordering are refused."""
+        first = self.client.get(RECIPES_URL, {'page_size': 1})
+        other = first.data['next'].replace('page_size=1', 'page_size=1&'
+                                           'ordering=price')
+
+        res = self.client.get(other)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
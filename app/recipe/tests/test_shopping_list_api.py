@@ -0,0 +1,139 @@
+"""
+Tests for the shopping list API.
+"""
+import gzip
+from decimal import Decimal
+
+import msgpack
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import RecipeIngredient
+from core.tests.factories import create_ingredients, create_recipe, create_user
+from recipe.units import to_base
+
+
+SHOPPING_LIST_URL = reverse('recipe:shopping-list')
+
+
+def add_amounts(recipe, amounts):
+    """Add (ingredient, quantity, unit) amounts to recipe."""
+    amounts = [(i, Decimal(str(q)), unit) for i, q, unit in amounts]
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient=ingredient,
+            quantity=quantity,
+            unit=unit,
+            base_quantity=to_base(quantity, unit)[0],
+            base_unit=to_base(quantity, unit)[1],
+        )
+        for ingredient, quantity, unit in amounts
+    ])
+
+
+class ShoppingListApiTests(TestCase):
+    """Test the shopping list API."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.rice, self.milk, self.egg = create_ingredients(
+            self.user, ['Rice', 'Milk', 'Egg'],
+        )
+        self.pudding = create_recipe(user=self.user, servings=2)
+        add_amounts(self.pudding, [
+            (self.rice, 100, 'g'), (self.milk, 1, 'l'), (self.egg, 2, ''),
+        ])
+        self.risotto = create_recipe(user=self.user, servings=4)
+        add_amounts(self.risotto, [(self.rice, 0.4, 'kg')])
+
+    def get_list(self, params):
+        """Return the status and decoded body of a shopping list."""
+        res = self.client.get(SHOPPING_LIST_URL, params)
+        return res.status_code, res.json()
+
+    def test_sum_recipes(self):
+        """Test ingredients are summed in base units across recipes."""
+        code, items = self.get_list({
+            'recipes': f'{self.pudding.id},{self.risotto.id}',
+        })
+
+        self.assertEqual(code, status.HTTP_200_OK)
+        self.assertEqual(items, [
+            {'name': 'Egg', 'quantity': '2.000', 'unit': 'pc', 'recipes': 1},
+            {'name': 'Milk', 'quantity': '1000.000', 'unit': 'ml',
+             'recipes': 1},
+            {'name': 'Rice', 'quantity': '500.000', 'unit': 'g',
+             'recipes': 2},
+        ])
+
+    def test_scale_servings(self):
+        """Test scaling every recipe, or one, to a number of servings."""
+        _, items = self.get_list({
+            'recipes': f'{self.pudding.id},{self.risotto.id}',
+            'servings': 1,
+        })
+        self.assertEqual(items[2]['quantity'], '150.000')
+
+        _, items = self.get_list({
+            'recipes': f'{self.pudding.id}:4,{self.risotto.id}',
+        })
+        self.assertEqual(items[2]['quantity'], '600.000')
+        self.assertEqual(items[0]['quantity'], '4.000')
+
+    def test_other_user_recipes_ignored(self):
+        """Test recipes of other users are not included."""
+        other = create_user(email='other@example.com')
+        recipe = create_recipe(user=other)
+        add_amounts(recipe, [
+            (create_ingredients(other, ['Salt'])[0], 1, 'g'),
+        ])
+
+        _, items = self.get_list({'recipes': f'{recipe.id}'})
+
+        self.assertEqual(items, [])
+
+    def test_invalid_recipes(self):
+        """Test malformed recipe lists are rejected."""
+        for recipes in ('', 'a,b', '1:0', '1:x'):
+            code, _ = self.get_list({'recipes': recipes})
+            self.assertEqual(code, status.HTTP_400_BAD_REQUEST, recipes)
+
+    def test_single_query(self):
+        """Test the list is computed in one query."""
+        recipes = ','.join(str(r.id) for r in (self.pudding, self.risotto))
+        with self.assertNumQueries(1):
+            self.client.get(SHOPPING_LIST_URL, {'recipes': recipes})
+
+    def test_msgpack(self):
+        """Test clients accepting MessagePack get the list in it."""
+        recipes = f'{self.pudding.id},{self.risotto.id}'
+        _, items = self.get_list({'recipes': recipes})
+
+        res = self.client.get(
+            SHOPPING_LIST_URL, {'recipes': recipes},
+            HTTP_ACCEPT='application/msgpack',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(res.content), items)
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_compressed(self):
+        """Test the list is compressed for clients accepting it."""
+        params = {'recipes': f'{self.pudding.id},{self.risotto.id}'}
+        plain = self.client.get(SHOPPING_LIST_URL, params)
+
+        res = self.client.get(
+            SHOPPING_LIST_URL, params, HTTP_ACCEPT_ENCODING='gzip',
+        )
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(res.content), plain.content)
@@ -0,0 +1,193 @@
+"""
+Tests for the similar recipes API and the recipe index.
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+)
+from recipe import index
+from recipe.sync import record_changes
+
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def similar_url(recipe_id):
+    """Return the URL of the recipes similar to a recipe."""
+    return reverse('recipe:recipe-similar', args=[recipe_id])
+
+
+def detail_url(recipe_id):
+    """Return the URL of a recipe."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SimilarRecipesApiTests(TestCase):
+    """Test ranking similar recipes."""
+
+    def setUp(self):
+        index.clear()
+        self.addCleanup(index.clear)
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.tags = create_tags(self.user, ['Dinner', 'Spicy', 'Vegan'])
+        self.ingredients = create_ingredients(
+            self.user, ['Rice', 'Chili', 'Tofu', 'Bread'],
+        )
+
+    def recipe(self, title, tags, ingredients):
+        """Create a recipe with tags and ingredients picked by index."""
+        recipe = create_recipe(user=self.user, title=title)
+        recipe.tags.set([self.tags[n] for n in tags])
+        recipe.ingredients.set([self.ingredients[n] for n in ingredients])
+        return recipe
+
+    def test_ranking(self):
+        """Test recipes are ranked by weighted Jaccard similarity."""
+        curry = self.recipe('Curry', [0, 1], [0, 1, 2])
+        close = self.recipe('Chili tofu', [0, 1], [1, 2])
+        far = self.recipe('Fried rice', [0], [0])
+        self.recipe('Toast', [2], [3])
+        other = create_user(email='other@example.com')
+        create_recipe(user=other).tags.set(
+            create_tags(other, ['Dinner', 'Spicy']),
+        )
+
+        res = self.client.get(similar_url(curry.id))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data], [close.id, far.id])
+        # Tags weigh 1 and ingredients 2: (2 + 2 * 2) / (2 + 2 * 3)
+        self.assertEqual(res.data[0]['similarity'], 0.75)
+        # (1 + 2 * 1) / (2 + 2 * 3)
+        self.assertEqual(res.data[1]['similarity'], 0.375)
+        self.assertEqual(len(res.data[0]['tags']), 2)
+
+    def test_limit(self):
+        """Test limiting the number of similar recipes."""
+        curry = self.recipe('Curry', [0], [0])
+        for n in range(3):
+            self.recipe(f'Rice {n}', [0], [0])
+
+        res = self.client.get(similar_url(curry.id), {'limit': 2})
+
+        self.assertEqual(len(res.data), 2)
+        res = self.client.get(similar_url(curry.id), {'limit': 0})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_user_recipe(self):
+        """Test recipes of other users are not found."""
+        other = create_user(email='other@example.com')
+        recipe = create_recipe(user=other)
+
+        res = self.client.get(similar_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_patch_index(self):
+        """Test recipe writes update the index of the process in place."""
+        curry = self.recipe('Curry', [0], [0, 1])
+        self.client.get(similar_url(curry.id))
+        built = index.get_index(self.user)
+        payload = {
+            'title': 'Rice bowl', 'time_minutes': 10, 'price': '3.00',
+            'ingredients': [{'name': 'Rice'}, {'name': 'Chili'}],
+        }
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.post(RECIPES_URL, payload, format='json')
+
+        self.user.refresh_from_db()
+        self.assertEqual(built.version, self.user.recipes_version)
+        self.assertIs(index.get_index(self.user), built)
+        res = self.client.get(similar_url(curry.id))
+        self.assertEqual([r['id'] for r in res.data], [res.data[0]['id']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(detail_url(res.data[0]['id']))
+
+        self.assertIs(index.get_index(self.user), built)
+        self.assertEqual(self.client.get(similar_url(curry.id)).data, [])
+
+    def test_outdated_index_rebuilt(self):
+        """Test an index older than the recipes of the user is rebuilt."""
+        curry = self.recipe('Curry', [0], [0])
+        built = index.get_index(self.user)
+        # Another process writes without patching this one.
+        copy = self.recipe('Curry again', [0], [0])
+        record_changes(self.user, recipes=[copy.id])
+
+        res = self.client.get(similar_url(curry.id))
+
+        self.assertEqual([r['id'] for r in res.data], [copy.id])
+        self.assertIsNot(index.get_index(self.user), built)
+
+    def test_deleting_tag_patches_index(self):
+        """Test deleting a tag clears it from every recipe of the index."""
+        curry = self.recipe('Curry', [0, 1], [])
+        stew = self.recipe('Stew', [0, 1], [])
+        self.client.get(similar_url(curry.id))
+        built = index.get_index(self.user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(
+                reverse('recipe:tag-detail', args=[self.tags[0].id]),
+            )
+
+        self.assertIs(index.get_index(self.user), built)
+        self.assertEqual(list(built.tags.counts[:2]), [1, 1])
+        res = self.client.get(similar_url(curry.id))
+        self.assertEqual([r['id'] for r in res.data], [stew.id])
+        self.assertEqual(res.data[0]['similarity'], 1.0)
+
+
+class RecipeIndexTests(TestCase):
+    """Test the bit matrices of the index."""
+
+    def test_bit_matrix_grows(self):
+        """Test columns and rows are added as needed."""
+        matrix = index.BitMatrix(1)
+        matrix.grow(3)
+        matrix.set_bits([0, 0, 2], range(100, 103))
+        matrix.set_bits([2] * 100, range(200, 300))
+
+        self.assertEqual(list(matrix.counts), [2, 0, 101])
+        self.assertEqual(matrix.bits.shape, (3, 16))
+        self.assertEqual(
+            list(index.popcount(matrix.bits & matrix.mask([101, 102, 7]))),
+            [1, 0, 1],
+        )
+
+    def test_rows_reused(self):
+        """Test updates and deletes reuse rows instead of adding them."""
+        user = create_user()
+        tag, = create_tags(user, ['Vegan'])
+        recipes = [create_recipe(user=user) for _ in range(3)]
+        recipe_index = index.RecipeIndex.build(user, 0)
+        capacity = len(recipe_index.recipe_ids)
+
+        for n in range(200):
+            recipe = recipes[n % 3]
+            recipe.tags.set([tag] if n % 2 else [])
+            recipe_index.update(user, recipe_ids=[recipe.id])
+        recipes[0].soft_delete()
+        recipe_index.update(user, recipe_ids=[recipes[0].id])
+        added = create_recipe(user=user)
+        recipe_index.update(user, recipe_ids=[added.id])
+
+        self.assertEqual(recipe_index.size, 3)
+        self.assertEqual(len(recipe_index.recipe_ids), capacity)
+        self.assertEqual(len(recipe_index.tags.bits), capacity)
+        self.assertCountEqual(
+            recipe_index.recipe_ids[:recipe_index.size],
+            [recipes[1].id, recipes[2].id, added.id],
+        )
@@ -0,0 +1,175 @@
+"""
+Tests for the sync API.
+"""
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Change
+from core.tests.factories import (
+    create_ingredients,
+    create_recipe,
+    create_tags,
+    create_user,
+)
+from recipe import sync
+
+
+SYNC_URL = reverse('recipe:sync')
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+def detail_url(recipe_id):
+    """Return the URL of a recipe."""
+    return reverse('recipe:recipe-detail', args=[recipe_id])
+
+
+class SyncApiTests(TestCase):
+    """Test syncing the recipes of a user."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create(self, title, tags=()):
+        """Create a recipe through the API, return its id."""
+        res = self.client.post(RECIPES_URL, {
+            'title': title, 'time_minutes': 5, 'price': '1.00',
+            'tags': [{'name': name} for name in tags],
+        }, format='json')
+        return res.data['id']
+
+    def test_full_sync(self):
+        """Test syncing without a token returns every object."""
+        recipe = create_recipe(user=self.user)
+        create_recipe(user=create_user(email='other@example.com'))
+
+        res = self.client.get(SYNC_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([r['id'] for r in res.data['recipes']], [recipe.id])
+        self.assertIn('ingredient_amounts', res.data['recipes'][0])
+        self.assertFalse(res.data['more'])
+        self.assertEqual(sync.parse_token(res.data['next']), 0)
+
+    def test_changes_since(self):
+        """Test a token returns the objects changed after it only."""
+        self.create('Soup')
+        token = self.client.get(SYNC_URL).data['next']
+        stew = self.create('Stew', tags=['Winter'])
+
+        res = self.client.get(SYNC_URL, {'since': token})
+
+        self.assertEqual([r['id'] for r in res.data['recipes']], [stew])
+        self.assertEqual([t['name'] for t in res.data['tags']], ['Winter'])
+        self.assertEqual(res.data['deleted'],
+                         {'recipes': [], 'tags': [], 'ingredients': []})
+        res = self.client.get(SYNC_URL, {'since': res.data['next']})
+        self.assertEqual(res.data['recipes'], [])
+
+    def test_deletes_and_renames(self):
+        """Test deleted objects are listed and renamed tags returned."""
+        soup = self.create('Soup', tags=['Starter'])
+        stew = self.create('Stew')
+        tag = Change.objects.get(kind=Change.TAG).object_id
+        token = self.client.get(SYNC_URL).data['next']
+
+        self.client.delete(detail_url(soup))
+        self.client.patch(reverse('recipe:tag-detail', args=[tag]),
+                          {'name': 'Entree'})
+        res = self.client.get(SYNC_URL, {'since': token})
+
+        self.assertEqual(res.data['recipes'], [])
+        self.assertEqual(res.data['deleted']['recipes'], [soup])
+        self.assertEqual(res.data['tags'], [{'id': tag, 'name': 'Entree'}])
+
+        self.client.delete(reverse('recipe:tag-detail', args=[tag]))
+        self.client.patch(detail_url(stew), {'title': 'Beef stew'})
+        res = self.client.get(SYNC_URL, {'since': res.data['next']})
+
+        self.assertEqual(res.data['deleted']['tags'], [tag])
+        self.assertEqual(res.data['recipes'][0]['title'], 'Beef stew')
+
+    def test_collected_orphans(self):
+        """Test tags and ingredients removed by gc_orphans are deleted."""
+        for archive in (False, True):
+            with self.subTest(archive=archive):
+                tag, = create_tags(self.user, [f'Orphan {archive}'])
+                ingredient, = create_ingredients(
+                    self.user, [f'Orphan {archive}'],
+                )
+                token = self.client.get(SYNC_URL).data['next']
+
+                call_command('gc_orphans', archive=archive, stdout=StringIO())
+                res = self.client.get(SYNC_URL, {'since': token})
+
+                self.assertEqual(res.data['deleted'], {
+                    'recipes': [], 'tags': [tag.id],
+                    'ingredients': [ingredient.id],
+                })
+
+    def test_pages(self):
+        """Test changes come in pages ending at a complete write."""
+        token = self.client.get(SYNC_URL).data['next']
+        ids = [self.create(f'Recipe {n}', tags=[f'Tag {n}'])
+               for n in range(3)]
+
+        res = self.client.get(SYNC_URL, {'since': token, 'limit': 3})
+
+        # The third change belongs to the second write, which stays out.
+        self.assertTrue(res.data['more'])
+        self.assertEqual([r['id'] for r in res.data['recipes']], ids[:1])
+        seen = [r['id'] for r in res.data['recipes']]
+        while res.data['more']:
+            res = self.client.get(SYNC_URL, {
+                'since': res.data['next'], 'limit': 3,
+            })
+            seen += [r['id'] for r in res.data['recipes']]
+        self.assertEqual(seen, ids)
+
+    def test_large_write(self):
+        """Test a write changing more objects than a page is returned."""
+        token = self.client.get(SYNC_URL).data['next']
+        self.create('Soup', tags=['A', 'B', 'C'])
+
+        res = self.client.get(SYNC_URL, {'since': token, 'limit': 2})
+
+        self.assertEqual(len(res.data['tags']), 3)
+        self.assertTrue(res.data['more'])
+        res = self.client.get(SYNC_URL, {'since': res.data['next']})
+        self.assertEqual(res.data['tags'], [])
+        self.assertFalse(res.data['more'])
+
+    def test_invalid_token(self):
+        """Test malformed tokens are refused."""
+        for token in ('abc', '1', '1-2-3', '-1-5'):
+            res = self.client.get(SYNC_URL, {'since': token})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(SYNC_RETENTION=60)
+    def test_expired_token(self):
+        """Test tokens older than the retention are gone."""
+        with patch('time.time', return_value=time.time() - 120):
+            token = sync.make_token(3)
+
+        res = self.client.get(SYNC_URL, {'since': token})
+
+        self.assertEqual(res.status_code, status.HTTP_410_GONE)
+
+    def test_failed_write_not_logged(self):
+        """Test changes are logged in the transaction of the write."""
+        with patch('recipe.sync.index.update_on_commit',
+                   side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.create('Soup')
+
+        self.assertFalse(Change.objects.exists())
+        self.assertEqual(self.client.get(SYNC_URL).data['recipes'], [])
@@ -3,7 +3,6 @@ test tags api
 """
 from decimal import Decimal
 
-from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.test import TestCase
 
@@ -14,6 +13,7 @@ from core.models import (
     Tag,
     Recipe,
 )
+from core.tests.factories import create_user
 from recipe.serializers import TagSerializer
 
 TAG_URL = reverse('recipe:tag-list')
@@ -24,11 +24,6 @@ def detail_url(tag_id):
     return reverse('recipe:tag-detail', args=[tag_id])
 
 
-def create_user(email='user@example.com', password='test_pass'):
-    """Create and return a new user"""
-    return get_user_model().objects.create_user(email, password)
-
-
 class PublicTagsApiTests(TestCase):
     """Test unauthenticated api requests"""
 
@@ -141,3 +136,19 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAG_URL, {'assigned_only': 1})
 
         self.assertEqual(len(res.data), 1)
+
+    def test_filter_assigned_ignores_deleted_recipes(self):
+        """Test tags only assigned to deleted recipes are not assigned"""
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+        recipe = Recipe.objects.create(
+            title='Pancakes',
+            time_minutes=5,
+            price=Decimal('3.00'),
+            user=self.user,
+        )
+        recipe.tags.add(tag)
+        recipe.soft_delete()
+
+        res = self.client.get(TAG_URL, {'assigned_only': 1})
+
+        self.assertEqual(res.data, [])
@@ -0,0 +1,64 @@
+"""
+Normalizing ingredient quantities to base units.
+
+Quantities are converted when recipes are written, so scaling and
+shopping lists add up stored base quantities instead of parsing units.
+"""
+from decimal import Decimal
+
+
+# Unit: (base unit, factor to the base unit)
+UNITS = {
+    'mg': ('g', Decimal('0.001')),
+    'g': ('g', Decimal('1')),
+    'kg': ('g', Decimal('1000')),
+    'oz': ('g', Decimal('28.3495')),
+    'lb': ('g', Decimal('453.592')),
+    'ml': ('ml', Decimal('1')),
+    'cl': ('ml', Decimal('10')),
+    'dl': ('ml', Decimal('100')),
+    'l': ('ml', Decimal('1000')),
+    'tsp': ('ml', Decimal('4.92892')),
+    'tbsp': ('ml', Decimal('14.7868')),
+    'cup': ('ml', Decimal('236.588')),
+    'fl oz': ('ml', Decimal('29.5735')),
+    'pc': ('pc', Decimal('1')),
+}
+
+ALIASES = {
+    'milligram': 'mg', 'milligrams': 'mg',
+    'gram': 'g', 'grams': 'g', 'gr': 'g',
+    'kilogram': 'kg', 'kilograms': 'kg', 'kgs': 'kg',
+    'ounce': 'oz', 'ounces': 'oz',
+    'pound': 'lb', 'pounds': 'lb', 'lbs': 'lb',
+    'milliliter': 'ml', 'milliliters': 'ml',
+    'millilitre': 'ml', 'millilitres': 'ml',
+    'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l',
+    'teaspoon': 'tsp', 'teaspoons': 'tsp',
+    'tablespoon': 'tbsp', 'tablespoons': 'tbsp',
+    'cups': 'cup',
+    'fluid ounce': 'fl oz', 'fluid ounces': 'fl oz',
+    'piece': 'pc', 'pieces': 'pc', 'pcs': 'pc', '': 'pc',
+}
+
+BASE_PLACES = Decimal('0.001')
+
+
+def normalize_unit(unit):
+    """Return the canonical spelling of unit, unknown units lowercased."""
+    unit = ' '.join(unit.lower().replace('.', ' ').split())
+    return ALIASES.get(unit, unit)
+
+
+def to_base(quantity, unit):
+    """
+    Return quantity in unit converted to (base quantity, base unit).
+
+    Units without a conversion are their own base, so only quantities of
+    the same unknown unit add up. A missing quantity stays missing.
+    """
+    unit = normalize_unit(unit)
+    base_unit, factor = UNITS.get(unit, (unit, Decimal('1')))
+    if quantity is None:
+        return None, base_unit
+    return (quantity * factor).quantize(BASE_PLACES), base_unit
@@ -15,5 +15,8 @@ router.register('ingredients', views.IngredientViewSet)
 app_name = 'recipe'
 
 urlpatterns = [
+    path('shopping-list/', views.ShoppingListView.as_view(),
+         name='shopping-list'),
+    path('sync/', views.SyncView.as_view(), name='sync'),
     path('', include(router.urls)),
 ]
@@ -1,6 +1,12 @@
 """
 View for the recipe APIs
 """
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Lower
+from django.http import Http404
+
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
@@ -14,16 +20,28 @@ from rest_framework import (
     status,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 
+from core.authentication import ExpiringTokenAuthentication
+from core.renderers import NormalizedJSONRenderer
 from core.models import (
     Recipe,
+    RecipeIngredient,
     Tag,
     Ingredient,
 )
 from recipe import serializers
+from recipe.cache import get_details
+from recipe.duplication import duplicate_recipes
+from recipe.index import get_index
+from recipe.normalized import side_load
+from recipe.pagination import RecipeCursorPagination
+from recipe.shopping import shopping_items, shopping_list
+from recipe.sync import changed_ids, current_seq, make_token, record_changes
 
 
 @extend_schema_view(
@@ -39,6 +57,53 @@ from recipe import serializers
                 OpenApiTypes.STR,
                 description='Comma separated list of ingredient IDs to filter',
             ),
+            OpenApiParameter(
+                'min_time',
+                OpenApiTypes.INT,
+                description='Minimum preparation time in minutes',
+            ),
+            OpenApiParameter(
+                'max_time',
+                OpenApiTypes.INT,
+                description='Maximum preparation time in minutes',
+            ),
+            OpenApiParameter(
+                'min_price',
+                OpenApiTypes.DECIMAL,
+                description='Minimum price',
+            ),
+            OpenApiParameter(
+                'max_price',
+                OpenApiTypes.DECIMAL,
+                description='Maximum price',
+            ),
+            OpenApiParameter(
+                'ordering',
+                OpenApiTypes.STR,
+                description='Comma separated fields to order by, prefixed '
+                            'with - for descending: id, title, time_minutes, '
+                            'price. Defaults to -id.',
+            ),
+            OpenApiParameter(
+                'page_size',
+                OpenApiTypes.INT,
+                description='Return pages of this many recipes with cursor '
+                            'links instead of the full list',
+            ),
+            OpenApiParameter(
+                'ids',
+                OpenApiTypes.STR,
+                description='Comma separated list of up to 300 recipe IDs '
+                            'to get with their details, see multi-get',
+            ),
+            OpenApiParameter(
+                'format',
+                OpenApiTypes.STR,
+                enum=['normalized'],
+                description='normalized lists the ids of the tags and '
+                            'ingredients of each recipe under results, '
+                            'and the tags and ingredients once by id',
+            ),
         ]
     )
 )
@@ -48,8 +113,32 @@ class RecipeViewSet(viewsets.ModelViewSet):
     """
     serializer_class = serializers.RecipeDetailSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [ExpiringTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES, NormalizedJSONRenderer,
+    ]
+    throttle_scopes = {
+        'upload_image': 'recipe-upload',
+        'duplicate_many': 'recipe-bulk',
+    }
+    pagination_class = RecipeCursorPagination
+    # Each field is backed by a (user, field, id) index on Recipe
+    ordering_fields = ['id', 'title', 'time_minutes', 'price']
+    range_filters = {
+        'min_time': 'time_minutes__gte',
+        'max_time': 'time_minutes__lte',
+        'min_price': 'price__gte',
+        'max_price': 'price__lte',
+    }
+
+    def is_normalized(self):
+        """
+        Return whether the client asked for side-loaded tags and ingredients
+        """
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        return self.action == 'list' and \
+            isinstance(renderer, NormalizedJSONRenderer)
 
     def _params_to_ints(self, qs):
         """
@@ -57,6 +146,41 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         return [int(str_id) for str_id in qs.split(',')]
 
+    def get_ordering(self):
+        """
+        Return the ordering of the ordering parameter, ending with id in the
+        direction of the first field so every order matches an index
+        """
+        param = self.request.query_params.get('ordering')
+        if not param:
+            return ['-id']
+        ordering = []
+        for field in param.split(','):
+            if field.lstrip('-') not in self.ordering_fields:
+                raise ValidationError({'ordering': [
+                    f'Unknown field {field!r}, use one of '
+                    f'{", ".join(self.ordering_fields)}.'
+                ]})
+            if field.lstrip('-') == 'id':
+                ordering.append(field)
+                return ordering
+            ordering.append(field)
+        ordering.append('-id' if ordering[0].startswith('-') else 'id')
+        return ordering
+
+    def get_range_filters(self):
+        """
+        Return the lookups of the range filter parameters
+        """
+        query = serializers.RecipeRangeQuerySerializer(
+            data=self.request.query_params,
+        )
+        query.is_valid(raise_exception=True)
+        return {
+            self.range_filters[param]: value
+            for param, value in query.validated_data.items()
+        }
+
     def get_queryset(self):
         """
         Return the recipes for the authenticated user
@@ -64,30 +188,145 @@ class RecipeViewSet(viewsets.ModelViewSet):
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
         queryset = self.queryset
+        # Semi-joins, so recipes matching many IDs are listed once without
+        # a DISTINCT over the whole result.
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = queryset.filter(Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef('pk'), tag_id__in=tag_ids,
+                ),
+            ))
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = queryset.filter(Exists(
+                RecipeIngredient.objects.filter(
+                    recipe_id=OuterRef('pk'), ingredient_id__in=ingredient_ids,
+                ),
+            ))
+
+        queryset = queryset.filter(
+            user=self.request.user,
+            **self.get_range_filters(),
+        ).order_by(*self.get_ordering())
+        if self.action in ('upload_image', 'duplicate', 'duplicate_many',
+                           'similar') or self.is_normalized():
+            return queryset  # these serialize no tags or ingredients
 
-        return queryset.filter(user=self.request.user).order_by('-id').distinct()
+        return queryset.prefetch_related('tags', 'ingredients')
 
     def get_serializer_class(self):
         """
         Return the serializer class for request
         """
-        if self.action == 'list':
+        if self.is_normalized():
+            return serializers.NormalizedRecipeSerializer
+        elif self.action == 'list':
             return serializers.RecipeSerializer
         elif self.action == 'upload_image':
             return serializers.RecipeImageSerializer
+        elif self.action == 'duplicate':
+            return serializers.RecipeDuplicateSerializer
+        elif self.action == 'duplicate_many':
+            return serializers.RecipeBulkDuplicateSerializer
+        elif self.action == 'similar':
+            return serializers.SimilarRecipeSerializer
+        elif self.action == 'pantry':
+            return serializers.PantryRecipeSerializer
+        elif self.action == 'multi_get':
+            return serializers.RecipeIdsSerializer
         return self.serializer_class
 
+    def list(self, request, *args, **kwargs):
+        """
+        List the recipes, with side-loaded tags and ingredients when asked
+        """
+        if 'ids' in request.query_params:
+            query = serializers.RecipeIdsQuerySerializer(
+                data=request.query_params,
+            )
+            query.is_valid(raise_exception=True)
+            return self.multi_get_response(query.validated_data['ids'])
+        if not self.is_normalized():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        recipes = list(queryset if page is None else page)
+        tags, ingredients = side_load(recipes)
+        results = self.get_serializer(recipes, many=True).data
+        if page is None:
+            response = Response({'results': results})
+        else:
+            response = self.get_paginated_response(results)
+        response.data['tags'] = tags
+        response.data['ingredients'] = ingredients
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return a recipe, from the detail cache when there is one
+        """
+        try:
+            pk = int(kwargs[self.lookup_field])
+        except ValueError:
+            raise Http404
+        details = get_details(request, [pk], self.load_details)
+        if pk not in details:
+            raise Http404
+        return Response(details[pk])
+
+    def load_details(self, ids):
+        """
+        Return the details of the recipes of ids found by id, with one query
+        per relation
+        """
+        if not ids:
+            return {}
+        recipes = Recipe.objects.filter(
+            user=self.request.user,
+        ).prefetch_related(
+            'tags', 'ingredients', serializers.ingredient_amounts_prefetch(),
+        ).in_bulk(ids)
+        data = serializers.RecipeDetailSerializer(
+            list(recipes.values()), many=True,
+            context=self.get_serializer_context(),
+        ).data
+        return {detail['id']: detail for detail in data}
+
+    def multi_get_response(self, ids):
+        """
+        Return the details of the recipes of ids in their order, and the
+        ids not found
+        """
+        ids = list(dict.fromkeys(ids))
+        details = get_details(self.request, ids, self.load_details)
+        return Response({
+            'results': [details[pk] for pk in ids if pk in details],
+            'missing': [pk for pk in ids if pk not in details],
+        })
+
+    @extend_schema(
+        request=serializers.RecipeIdsSerializer,
+        responses={200: serializers.MultiGetSerializer},
+    )
+    @action(methods=['POST'], detail=False, url_path='multi-get')
+    def multi_get(self, request):
+        """
+        Get up to 300 recipes with their details, in the order of their ids
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return self.multi_get_response(serializer.validated_data['ids'])
+
     def perform_create(self, serializer):
         """
         Create a new recipe
         """
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            recipe = serializer.save(user=self.request.user)
+            record_changes(
+                self.request.user, recipes=[recipe.id], **serializer.created,
+            )
 
     @action(methods=['POST'], detail=True, url_path='upload-image')
     def upload_image(self, request, pk=None):
@@ -100,7 +339,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
             data=request.data,
         )
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                record_changes(request.user, recipes=[recipe.id])
             return Response(
                 serializer.data,
                 status=status.HTTP_200_OK,
@@ -110,17 +351,147 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=status.HTTP_400_BAD_REQUEST,
         )
 
+    @extend_schema(responses={201: serializers.RecipeDetailSerializer})
+    @action(methods=['POST'], detail=True)
+    def duplicate(self, request, pk=None):
+        """
+        Copy a recipe, optionally with a new title
+        """
+        recipe = self.get_object()
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            copy, = duplicate_recipes([recipe], **serializer.validated_data)
+            record_changes(request.user, recipes=[copy.id])
+        copy = Recipe.objects.prefetch_related('tags', 'ingredients').get(
+            id=copy.id,
+        )
+        return Response(
+            serializers.RecipeDetailSerializer(copy).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        operation_id='recipe_recipes_duplicate_many',
+        responses={201: serializers.RecipeSerializer(many=True)},
+    )
+    @action(methods=['POST'], detail=False, url_path='duplicate')
+    def duplicate_many(self, request):
+        """
+        Copy many recipes, in the order of their ids
+        """
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(serializer.validated_data['ids']))
+        recipes = Recipe.objects.filter(user=request.user).in_bulk(ids)
+        missing = [pk for pk in ids if pk not in recipes]
+        if missing:
+            raise ValidationError({'ids': [f'Recipes not found: {missing}.']})
+        with transaction.atomic():
+            copies = duplicate_recipes([recipes[pk] for pk in ids])
+            record_changes(
+                request.user, recipes=[copy.id for copy in copies],
+            )
+        created = Recipe.objects.prefetch_related(
+            'tags', 'ingredients',
+        ).in_bulk([copy.id for copy in copies])
+        return Response(
+            serializers.RecipeSerializer(
+                [created[copy.id] for copy in copies], many=True,
+            ).data,
+            status=status.HTTP_201_CREATED,
+        )
+
+    @extend_schema(
+        parameters=[serializers.SimilarQuerySerializer],
+        responses={200: serializers.SimilarRecipeSerializer(many=True)},
+    )
+    @action(methods=['GET'], detail=True)
+    def similar(self, request, pk=None):
+        """
+        Return the other recipes sharing the most tags and ingredients
+        """
+        recipe = self.get_object()
+        query = serializers.SimilarQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        scores = get_index(request.user).similar(
+            recipe.id,
+            query.validated_data['limit'],
+            settings.RECIPE_SIMILARITY_WEIGHTS,
+        )
+        recipes = Recipe.objects.filter(user=request.user).prefetch_related(
+            'tags', 'ingredients',
+        ).in_bulk([recipe_id for recipe_id, _ in scores])
+        similar = []
+        for recipe_id, score in scores:
+            if recipe_id in recipes:  # unless deleted since it was indexed
+                recipes[recipe_id].similarity = round(score, 4)
+                similar.append(recipes[recipe_id])
+        return Response(
+            serializers.SimilarRecipeSerializer(similar, many=True).data,
+        )
+
+    @extend_schema(
+        parameters=[serializers.PantryQuerySerializer],
+        responses={200: serializers.PantryRecipeSerializer(many=True)},
+    )
+    @action(methods=['GET'], detail=False)
+    def pantry(self, request):
+        """
+        Return the recipes missing the fewest of the ingredients at hand
+        """
+        query = serializers.PantryQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        have = set(query.validated_data.get('ingredients', []))
+        names = query.validated_data.get('names')
+        if names:
+            have.update(Ingredient.objects.annotate(
+                lower_name=Lower('name'),
+            ).filter(
+                user=request.user,
+                lower_name__in=[name.lower() for name in names],
+            ).values_list('id', flat=True))
+
+        ranked = get_index(request.user).pantry(
+            have,
+            query.validated_data['limit'],
+            query.validated_data['max_missing'],
+        )
+        recipes = Recipe.objects.filter(user=request.user).prefetch_related(
+            'tags', 'ingredients',
+        ).in_bulk([recipe_id for recipe_id, _, _ in ranked])
+        cookable = []
+        for recipe_id, missing, _ in ranked:
+            recipe = recipes.get(recipe_id)
+            if recipe is None:  # deleted since it was indexed
+                continue
+            recipe.missing = missing
+            recipe.missing_ingredients = [
+                ingredient.name for ingredient in recipe.ingredients.all()
+                if ingredient.id not in have
+            ]
+            cookable.append(recipe)
+        return Response(
+            serializers.PantryRecipeSerializer(cookable, many=True).data,
+        )
+
     def perform_update(self, serializer):
         """
         Update a recipe
         """
-        serializer.save(user=self.request.user)
+        with transaction.atomic():
+            recipe = serializer.save(user=self.request.user)
+            record_changes(
+                self.request.user, recipes=[recipe.id], **serializer.created,
+            )
 
     def perform_destroy(self, instance):
         """
-        Delete a recipe
+        Mark a recipe as deleted, purge_deleted removes it later
         """
-        instance.delete()
+        with transaction.atomic():
+            instance.soft_delete()
+            record_changes(self.request.user, recipes=[instance.id])
 
 
 @extend_schema_view(
@@ -143,8 +514,10 @@ class BaseRecipeAttrViewSet(
     """
     Base viewset for user owned recipe attributes
     """
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [ExpiringTokenAuthentication]
     permission_classes = [IsAuthenticated]
+    # Argument of record_changes taking the ids of the model
+    change_kind = None
 
     def get_queryset(self):
         """
@@ -155,10 +528,33 @@ class BaseRecipeAttrViewSet(
         )
         queryset = self.queryset
         if assigned_only:
-            queryset = queryset.filter(recipe__isnull=False)
+            queryset = queryset.filter(
+                recipe__isnull=False,
+                recipe__deleted_at__isnull=True,
+            )
 
         return queryset.filter(user=self.request.user).order_by('-name').distinct()
 
+    def perform_destroy(self, instance):
+        """
+        Mark the ingredient/tag as deleted, purge_deleted removes it later
+        """
+        with transaction.atomic():
+            instance.soft_delete()
+            record_changes(
+                self.request.user, **{self.change_kind: [instance.id]},
+            )
+
+    def perform_update(self, serializer):
+        """
+        Rename the ingredient/tag
+        """
+        with transaction.atomic():
+            instance = serializer.save()
+            record_changes(
+                self.request.user, **{self.change_kind: [instance.id]},
+            )
+
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """
@@ -166,6 +562,7 @@ class TagViewSet(BaseRecipeAttrViewSet):
     """
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
+    change_kind = 'tags'
 
 
 class IngredientViewSet(BaseRecipeAttrViewSet):
@@ -174,5 +571,90 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
     """
     serializer_class = serializers.IngredientSerializer
     queryset = Ingredient.objects.all()
-    authentication_classes = [TokenAuthentication]
+    change_kind = 'ingredients'
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+
+class ShoppingListView(APIView):
+    """
+    Ingredients of many recipes summed in base units
+    """
+    authentication_classes = [ExpiringTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[serializers.ShoppingListQuerySerializer],
+        responses={200: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+        """
+        Return the shopping list of the recipes in the query
+        """
+        query = serializers.ShoppingListQuerySerializer(
+            data=request.query_params,
+        )
+        query.is_valid(raise_exception=True)
+        rows = shopping_list(
+            request.user,
+            query.validated_data['recipes'],
+            query.validated_data.get('servings'),
+        )
+        return Response(shopping_items(rows))
+
+
+class SyncView(APIView):
+    """
+    Recipes, tags and ingredients changed since the last sync of a client
+    """
+    authentication_classes = [ExpiringTokenAuthentication]
     permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[serializers.SyncQuerySerializer],
+        responses={200: OpenApiTypes.OBJECT, 410: OpenApiTypes.OBJECT},
+    )
+    def get(self, request):
+        """
+        Return the objects changed after the since token, or every object
+        without it, with a token for the next sync
+        """
+        query = serializers.SyncQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        since = query.validated_data.get('since')
+        recipes = Recipe.objects.filter(user=request.user).prefetch_related(
+            'tags', 'ingredients', serializers.ingredient_amounts_prefetch(),
+        )
+        tags = Tag.objects.filter(user=request.user)
+        ingredients = Ingredient.objects.filter(user=request.user)
+        if since is None:
+            upto, more = current_seq(request.user), False
+            deleted = {'recipes': set(), 'tags': set(), 'ingredients': set()}
+        else:
+            ids, upto, more = changed_ids(
+                request.user, since, query.validated_data['limit'],
+            )
+            recipes = recipes.filter(id__in=ids['recipes'])
+            tags = tags.filter(id__in=ids['tags'])
+            ingredients = ingredients.filter(id__in=ids['ingredients'])
+            deleted = ids
+
+        data = {
+            'recipes': serializers.RecipeDetailSerializer(
+                recipes.order_by('id'), many=True,
+            ).data,
+            'tags': serializers.TagSerializer(
+                tags.order_by('id'), many=True,
+            ).data,
+            'ingredients': serializers.IngredientSerializer(
+                ingredients.order_by('id'), many=True,
+            ).data,
+        }
+        # Changed objects that are gone are sent as deleted.
+        data['deleted'] = {
+            kind: sorted(ids - {item['id'] for item in data[kind]})
+            for kind, ids in deleted.items()
+        }
+        data['next'] = make_token(upto)
+        data['more'] = more
+        return Response(data)
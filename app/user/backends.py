@@ -0,0 +1,93 @@
+"""
+Authentication backend bounding the passwords hashed at a time.
+"""
+import threading
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class LoginUnavailable(APIException):
+    """Too many logins are being verified, the client should retry."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = _('Too many login attempts in progress, retry shortly.')
+    default_code = 'login_unavailable'
+
+
+_slots = None
+_init_lock = threading.Lock()
+
+
+def _hashing_slots():
+    """Return the semaphore bounding the hashes running at a time."""
+    global _slots
+    if _slots is None:
+        with _init_lock:
+            if _slots is None:
+                _slots = threading.BoundedSemaphore(
+                    settings.PASSWORD_VERIFY_CONCURRENCY,
+                )
+    return _slots
+
+
+def _verify(password, encoded):
+    """Return whether password matches and whether it must be rehashed."""
+    rehash = []
+    matches = check_password(password, encoded, setter=rehash.append)
+    return matches, bool(rehash)
+
+
+def run_hashing(func, *args):
+    """
+    Run a password hashing function in this thread.
+
+    At most PASSWORD_VERIFY_CONCURRENCY hashes run at a time in a process,
+    logins beyond them are refused with LoginUnavailable at once instead
+    of waiting for the CPU behind each other.
+    """
+    slots = _hashing_slots()
+    if not slots.acquire(blocking=False):
+        raise LoginUnavailable()
+    try:
+        return func(*args)
+    finally:
+        slots.release()
+
+
+def verify_password(password, encoded):
+    """Return whether password matches and whether it must be rehashed."""
+    return run_hashing(_verify, password, encoded)
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend verifying passwords within the hashing bound, rehashing them
+    with the current hasher and cost after a successful login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user_model = get_user_model()
+        if username is None:
+            username = kwargs.get(user_model.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = user_model._default_manager.get_by_natural_key(username)
+        except user_model.DoesNotExist:
+            # Hash once anyway so unknown users take as long as known ones.
+            run_hashing(make_password, password)
+            return None
+
+        matches, rehash = verify_password(password, user.password)
+        if not matches or not self.user_can_authenticate(user):
+            return None
+        if rehash:
+            user.set_password(password)
+            user.save(update_fields=['password'])
+        return user
@@ -23,15 +23,23 @@ class UserSerializer(serializers.ModelSerializer):
         return get_user_model().objects.create_user(**validated_data)  # create a new user with the validated data
 
     def update(self, instance, validated_data):
-        """Update a user, setting the password correctly and return it"""
+        """Update a user in one write of the changed fields and return it"""
         password = validated_data.pop('password', None)  # get the password from the validated data
-        user = super().update(instance, validated_data)  # update the user with the validated data
+        changed = [
+            field for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]  # only the fields whose value differs are written
+        for field in changed:
+            setattr(instance, field, validated_data[field])
 
         if password:  # if the password is not empty
-            user.set_password(password)  # set the password
-            user.save()  # save the user with the new password
+            instance.set_password(password)  # hash the password
+            changed.append('password')
 
-        return user
+        if changed:  # skip the write when nothing changed
+            instance.save(update_fields=changed)
+
+        return instance
 
 
 class AuthTokenSerializer(serializers.Serializer):
@@ -41,6 +49,8 @@ class AuthTokenSerializer(serializers.Serializer):
         style={'input_type': 'password'},
         trim_whitespace=False,
     )
+    device = serializers.CharField(max_length=255, required=False,
+                                   allow_blank=True)  # name of the device the token is for
 
     def validate(self, attrs):
         """validate and authenticate the user"""
@@ -59,3 +69,14 @@ class AuthTokenSerializer(serializers.Serializer):
 
         attrs['user'] = user  # add the user to the attrs dictionary
         return attrs  # return the attrs dictionary
+
+
+class RevokeTokenSerializer(serializers.Serializer):
+    """Serializer for revoking auth tokens"""
+    all = serializers.BooleanField(default=False)  # revoke every token of the user, not only the current one
+
+
+class TokenSerializer(serializers.Serializer):
+    """Serializer for an issued auth token"""
+    token = serializers.CharField()
+    expires = serializers.DateTimeField()
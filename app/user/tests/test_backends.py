@@ -0,0 +1,124 @@
+"""
+Tests for password hashing and the pooled authentication backend.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import throttling
+from core.tests.factories import create_user
+from user import backends
+
+
+PBKDF2 = 'core.hashers.TunedPBKDF2PasswordHasher'
+TOKEN_URL = reverse('user:token')
+
+
+class PooledBackendTests(TestCase):
+    """Test verifying passwords within the hashing bound."""
+
+    def test_authenticate(self):
+        """Test a valid password authenticates the user."""
+        user = create_user()
+
+        self.assertEqual(
+            authenticate(email='user@example.com', password='testpass123'),
+            user,
+        )
+        self.assertIsNone(
+            authenticate(email='user@example.com', password='wrong'),
+        )
+
+    def test_unknown_user_hashes(self):
+        """Test unknown users are hashed once to hide they do not exist."""
+        with patch('user.backends.make_password') as mock_make:
+            user = authenticate(email='none@example.com', password='pass')
+
+        self.assertIsNone(user)
+        mock_make.assert_called_once_with('pass')
+
+    @override_settings(PASSWORD_HASHERS=[PBKDF2],
+                       PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_rehash_on_cost_change(self):
+        """Test passwords are rehashed after the cost setting changes."""
+        user = create_user()
+        self.assertIn('$1000$', user.password)
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            authenticate(email=user.email, password='testpass123')
+
+        user.refresh_from_db()
+        self.assertIn('$2000$', user.password)
+
+    @override_settings(PASSWORD_HASHERS=[
+        PBKDF2, 'django.contrib.auth.hashers.MD5PasswordHasher',
+    ], PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_rehash_on_hasher_change(self):
+        """Test passwords of an older hasher are replaced on login."""
+        user = create_user(password='unused')
+        user.password = make_password('testpass123', hasher='md5')
+        user.save()
+
+        authenticate(email=user.email, password='testpass123')
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_hashing_busy(self):
+        """Test logins are refused while every hashing slot is taken."""
+        encoded = make_password('pass')
+
+        def verify_again(password, encoded):
+            return backends.verify_password(password, encoded)
+
+        with self.settings(PASSWORD_VERIFY_CONCURRENCY=1), \
+                patch('user.backends._slots', None):
+            with self.assertRaises(backends.LoginUnavailable):
+                backends.run_hashing(verify_again, 'pass', encoded)
+            self.assertEqual(
+                backends.verify_password('pass', encoded), (True, False),
+            )
+
+    def test_hashing_busy_api(self):
+        """Test the token endpoint answers 503 when hashing is busy."""
+        create_user()
+        slots = backends._hashing_slots()
+        payload = {'email': 'user@example.com', 'password': 'testpass123'}
+
+        with patch.object(slots, 'acquire', return_value=False):
+            res = APIClient().post(TOKEN_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+
+class LoginAccountThrottleTests(TestCase):
+    """Test limiting login attempts per account."""
+
+    def setUp(self):
+        throttling.get_store().clear()
+        self.addCleanup(throttling.get_store().clear)
+
+    @override_settings(THROTTLE_RATES={'login-account': '2/min'})
+    def test_account_rate(self):
+        """Test attempts on one account are limited per address."""
+        payload = {'email': 'User@example.com', 'password': 'wrong'}
+        client = APIClient(REMOTE_ADDR='10.0.0.1')
+        for _ in range(2):
+            res = client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = client.post(TOKEN_URL, dict(payload, email='user@example.com'))
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = client.post(TOKEN_URL, dict(payload, email='other@example.com'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # The owner of the account logs in from their own address.
+        res = APIClient(REMOTE_ADDR='10.0.0.2').post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
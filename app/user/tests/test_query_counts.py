@@ -0,0 +1,60 @@
+"""
+Query count regression tests for the user API.
+"""
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from benchmark.querycount import QueryCountMixin
+from benchmark.seed import seed, seed_user
+
+
+ME_URL = reverse('user:me')
+TOKEN_URL = reverse('user:token')
+
+
+class UserQueryCountTests(QueryCountMixin, TestCase):
+    """Test user API query counts do not depend on row count."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+
+    def grow(self):
+        """Add other users and data owned by the user."""
+        seed(users=10, recipes_per_user=2)
+        seed_user(self.user, recipes=20)
+
+    def test_me(self):
+        """Test retrieving the profile."""
+        self.client.force_authenticate(self.user)
+        self.assertQueryCountStable(
+            'user-me', lambda: self.client.get(ME_URL), self.grow,
+        )
+
+    def test_me_update(self):
+        """Test updating the profile."""
+        self.client.force_authenticate(self.user)
+        names = count()
+        self.assertQueryCountStable(
+            'user-me-update',
+            lambda: self.client.patch(ME_URL, {'name': f'Name {next(names)}'}),
+            self.grow,
+        )
+
+    def test_token(self):
+        """Test obtaining a token."""
+        payload = {'email': 'user@example.com', 'password': 'testpass123'}
+        self.assertQueryCountStable(
+            'user-token',
+            lambda: self.client.post(TOKEN_URL, payload),
+            self.grow,
+        )
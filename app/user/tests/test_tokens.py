@@ -0,0 +1,204 @@
+"""
+Tests for expiring, rotating and revoking auth tokens.
+"""
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.authentication import revoked
+from core.models import AuthToken
+from core.tests.factories import create_user
+
+
+TOKEN_URL = reverse('user:token')
+REFRESH_URL = reverse('user:token-refresh')
+REVOKE_URL = reverse('user:token-revoke')
+ME_URL = reverse('user:me')
+
+
+class TokenApiTests(TestCase):
+    """Test the token lifecycle through the API."""
+
+    def setUp(self):
+        self.user = create_user()
+        self.client = APIClient()
+        revoked.clear()
+        self.addCleanup(revoked.clear)
+
+    def login(self, device=''):
+        """Create a token through the API and return its key."""
+        res = self.client.post(TOKEN_URL, {
+            'email': 'user@example.com',
+            'password': 'testpass123',
+            'device': device,
+        })
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data['token']
+
+    def get_me(self, key):
+        """Return the response to /me authenticated with key."""
+        return APIClient(HTTP_AUTHORIZATION=f'Token {key}').get(ME_URL)
+
+    def test_token_stored_hashed(self):
+        """Test tokens are stored as digests under their prefix."""
+        key = self.login(device='phone')
+
+        token = AuthToken.objects.get(user=self.user)
+        prefix, secret = key.split('.')
+        self.assertEqual(token.prefix, prefix)
+        self.assertEqual(token.device, 'phone')
+        self.assertNotIn(secret, token.digest)
+        self.assertTrue(token.matches(secret))
+        self.assertEqual(self.get_me(key).status_code, status.HTTP_200_OK)
+
+    def test_token_per_device(self):
+        """Test every login gets its own token."""
+        phone = self.login(device='phone')
+        laptop = self.login(device='laptop')
+
+        self.assertNotEqual(phone, laptop)
+        self.assertEqual(self.get_me(phone).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_me(laptop).status_code, status.HTTP_200_OK)
+
+    def test_token_replaced_per_device(self):
+        """Test logging in again from a device revokes its old token."""
+        first = self.login(device='phone')
+        laptop = self.login(device='laptop')
+
+        second = self.login(device='phone')
+
+        self.assertEqual(self.get_me(first).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get_me(second).status_code, status.HTTP_200_OK)
+        self.assertEqual(self.get_me(laptop).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            AuthToken.objects.filter(user=self.user, device='phone').count(),
+            1,
+        )
+
+    def test_prefix_collision(self):
+        """Test a prefix already in use is drawn again."""
+        taken = self.login().split('.')[0]
+
+        with patch('core.models.secrets.token_hex',
+                   side_effect=[taken, 'f00dcafe']):
+            key = self.login()
+
+        self.assertEqual(key.split('.')[0], 'f00dcafe')
+        self.assertEqual(self.get_me(key).status_code, status.HTTP_200_OK)
+
+    @override_settings(AUTH_TOKEN_MAX_PER_USER=2)
+    def test_oldest_tokens_removed(self):
+        """Test users keep at most AUTH_TOKEN_MAX_PER_USER tokens."""
+        first = self.login()
+        self.login()
+        self.login()
+
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(self.get_me(first).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    def test_expired_token(self):
+        """Test expired tokens are refused."""
+        key = self.login()
+        AuthToken.objects.update(expires=timezone.now())
+
+        res = self.get_me(key)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_wrong_secret(self):
+        """Test a wrong secret does not lock out the real token."""
+        key = self.login()
+        prefix = key.split('.')[0]
+
+        res = self.get_me(f'{prefix}.wrong')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get_me(key).status_code, status.HTTP_200_OK)
+
+    def test_malformed_token(self):
+        """Test malformed tokens are refused."""
+        res = self.get_me('not-a-token')
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh(self):
+        """Test refreshing replaces the token, keeping the device."""
+        key = self.login(device='phone')
+
+        res = APIClient(HTTP_AUTHORIZATION=f'Token {key}').post(REFRESH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res.data['token'], key)
+        self.assertIn('expires', res.data)
+        self.assertEqual(self.get_me(key).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get_me(res.data['token']).status_code,
+                         status.HTTP_200_OK)
+        self.assertEqual(AuthToken.objects.get().device, 'phone')
+
+    def test_revoke(self):
+        """Test revoking the current token only."""
+        phone = self.login(device='phone')
+        laptop = self.login(device='laptop')
+
+        res = APIClient(HTTP_AUTHORIZATION=f'Token {phone}').post(REVOKE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.get_me(phone).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.get_me(laptop).status_code, status.HTTP_200_OK)
+
+    def test_revoke_all(self):
+        """Test revoking every token of the user."""
+        phone = self.login(device='phone')
+        laptop = self.login(device='laptop')
+
+        APIClient(HTTP_AUTHORIZATION=f'Token {phone}').post(
+            REVOKE_URL, {'all': True},
+        )
+
+        self.assertFalse(AuthToken.objects.exists())
+        self.assertEqual(self.get_me(laptop).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    def test_revoked_token_no_query(self):
+        """Test a revoked token is refused without querying the database."""
+        key = self.login()
+        APIClient(HTTP_AUTHORIZATION=f'Token {key}').post(REVOKE_URL)
+
+        with self.assertNumQueries(0):
+            res = self.get_me(key)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_inactive_user(self):
+        """Test tokens of inactive users are refused."""
+        key = self.login()
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get_me(key).status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    def test_purge_tokens(self):
+        """Test the sweeper deletes expired tokens only."""
+        AuthToken.objects.create_token(self.user)
+        expired, _ = AuthToken.objects.create_token(self.user)
+        AuthToken.objects.filter(pk=expired.pk).update(
+            expires=timezone.now() - timedelta(seconds=1),
+        )
+
+        call_command('purge_tokens', batch_size=1, stdout=StringIO())
+
+        self.assertFalse(AuthToken.objects.filter(pk=expired.pk).exists())
+        self.assertEqual(AuthToken.objects.count(), 1)
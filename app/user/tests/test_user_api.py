@@ -8,16 +8,14 @@ from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from core.models import AuthToken
+from core.tests.factories import create_user
+
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
 
 
-def create_user(**params):
-    """Helper function to create new user"""
-    return get_user_model().objects.create_user(**params)
-
-
 class publicUserApiTests(TestCase):
     """Test the public features of user API"""
 
@@ -177,3 +175,58 @@ class PrivetUserApiTests(TestCase):
         self.assertEqual(res.status_code,
                          status.HTTP_200_OK)  # 200 ok status code is returned when user is updated successfully in
         # the API endpoint
+
+    def test_retrieve_profile_not_modified(self):
+        """Test a matching If-None-Match gets 304 without a body"""
+        etag = self.client.get(ME_URL)['ETag']
+
+        res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+        self.assertEqual(res['ETag'], etag)
+        self.assertIn('no-cache', res['Cache-Control'])
+
+    def test_etag_changes_on_update(self):
+        """Test the ETag changes with the profile"""
+        etag = self.client.get(ME_URL)['ETag']
+
+        res = self.client.patch(ME_URL, {'name': 'new name'})
+
+        self.assertNotEqual(res['ETag'], etag)
+        res = self.client.get(ME_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_update_if_match_failed(self):
+        """Test an update with a stale If-Match is refused"""
+        res = self.client.patch(ME_URL, {'name': 'new name'},
+                                HTTP_IF_MATCH='"stale"')
+
+        self.assertEqual(res.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Test name')
+
+    def test_update_single_write(self):
+        """Test updating the name and password saves once"""
+        with self.assertNumQueries(1):
+            self.client.patch(ME_URL, {'name': 'new name',
+                                       'password': 'newpassword123'})
+
+    def test_update_unchanged_no_write(self):
+        """Test an update changing nothing does not write"""
+        with self.assertNumQueries(0):
+            res = self.client.patch(ME_URL, {'name': 'Test name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_delete_user(self):
+        """Test deleting the account deactivates it and revokes tokens"""
+        AuthToken.objects.create_token(self.user)
+
+        res = self.client.delete(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertIsNotNone(self.user.deleted_at)
+        self.assertFalse(AuthToken.objects.filter(user=self.user).exists())
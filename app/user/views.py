@@ -1,34 +1,136 @@
 """
 Views for the user API.
 """
-from rest_framework import generics, authentication, permissions
-from rest_framework.authtoken.views import ObtainAuthToken
+import hashlib
+
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+    quote_etag,
+)
+from drf_spectacular.utils import extend_schema
+
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from core.authentication import ExpiringTokenAuthentication, revoke_tokens
+from core.models import AuthToken
+from core.throttling import LoginAccountBucketThrottle
 
 from user.serializers import (
     UserSerializer,
     AuthTokenSerializer,
+    RevokeTokenSerializer,
+    TokenSerializer,
 )
 
 
+def user_etag(user):
+    """Return the ETag of the profile representation of user."""
+    digest = hashlib.sha1(f'{user.pk}:{user.email}:{user.name}'.encode())
+    return quote_etag(digest.hexdigest())
+
+
+def token_response(user, device=''):
+    """Create a token for a device of user and return it as a response."""
+    token, key = AuthToken.objects.create_token(user, device)
+    return Response({'token': key, 'expires': token.expires})
+
+
 class CreateUserView(generics.CreateAPIView):
     """Create a new user in the system."""
     serializer_class = UserSerializer  # set the serializer class to the UserSerializer
 
 
-class CreateTokenView(ObtainAuthToken):
-    """Create a new auth token for user."""
+class CreateTokenView(generics.GenericAPIView):
+    """Create a new auth token for a device of the user."""
     serializer_class = AuthTokenSerializer  # set the serializer class to the AuthTokenSerializer
-    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES  # set the renderer classes to the default renderer classes
+    authentication_classes = ()  # credentials are in the payload
+    permission_classes = (permissions.AllowAny,)
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES + [
+        LoginAccountBucketThrottle,
+    ]  # limit per address and per account
+    throttle_scope = 'login'  # separate, lower rate limit for password checks
+
+    @extend_schema(responses=TokenSerializer)
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return token_response(
+            serializer.validated_data['user'],
+            serializer.validated_data.get('device', ''),
+        )
+
 
+class RefreshTokenView(APIView):
+    """Replace the token of the request with a new one for the same device."""
+    authentication_classes = (ExpiringTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
 
-class ManageUserView(generics.RetrieveUpdateAPIView):
+    @extend_schema(request=None, responses=TokenSerializer)
+    def post(self, request, *args, **kwargs):
+        device = request.auth.device
+        revoke_tokens(AuthToken.objects.filter(pk=request.auth.pk))
+        return token_response(request.user, device)
+
+
+class RevokeTokenView(generics.GenericAPIView):
+    """Revoke the token of the request, or every token of the user."""
+    serializer_class = RevokeTokenSerializer
+    authentication_classes = (ExpiringTokenAuthentication,)
+    permission_classes = (permissions.IsAuthenticated,)
+
+    @extend_schema(responses={status.HTTP_204_NO_CONTENT: None})
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tokens = AuthToken.objects.filter(user=request.user)
+        if not serializer.validated_data['all']:
+            tokens = tokens.filter(pk=request.auth.pk)
+        revoke_tokens(tokens)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ManageUserView(generics.RetrieveUpdateDestroyAPIView):
     """Manage the authenticated user."""
     serializer_class = UserSerializer  # set the serializer class to the UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)  # set the authentication classes to the
-    # TokenAuthentication class
+    authentication_classes = (ExpiringTokenAuthentication,)  # set the authentication classes to the
+    # ExpiringTokenAuthentication class
     permission_classes = (permissions.IsAuthenticated,)  # set the permission classes to the IsAuthenticated class
 
     def get_object(self):
         """Retrieve and return the authenticated user."""
         return self.request.user  # return the authenticated user from the request
+
+    def perform_destroy(self, instance):
+        """Deactivate the user at once, purge_deleted removes its data."""
+        instance.soft_delete()
+        revoke_tokens(AuthToken.objects.filter(user=instance))
+
+    def check_preconditions(self, request):
+        """Return a 304 or 412 response if If-None-Match or If-Match say so."""
+        return get_conditional_response(request, etag=user_etag(request.user))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.check_preconditions(request) or \
+            super().retrieve(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        return self.check_preconditions(request) or \
+            super().update(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """Add the ETag of the profile, clients must revalidate it."""
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.user.is_authenticated and response.status_code in (
+            status.HTTP_200_OK,
+            status.HTTP_304_NOT_MODIFIED,
+            status.HTTP_412_PRECONDITION_FAILED,
+        ):
+            response['ETag'] = user_etag(request.user)
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
@@ -5,9 +5,19 @@ server {
         alias /vol/static;
     }
 
+    location /api/recipe/events/ {
+        proxy_pass              http://${EVENTS_HOST}:${EVENTS_PORT};
+        proxy_http_version      1.1;
+        proxy_set_header        Connection '';
+        proxy_set_header        X-Forwarded-For $remote_addr;
+        proxy_buffering         off;
+        proxy_read_timeout      1h;
+    }
+
     location / {
         uwsgi_pass              ${APP_HOST}:${APP_PORT};
         include                 /etc/nginx/uwsgi_params;
+        uwsgi_param             HTTP_X_FORWARDED_FOR $remote_addr;
         client_max_body_size    10M;
     }
 }
\ No newline at end of file
@@ -0,0 +1,51 @@
+#!/bin/sh
+#
+# Compare uWSGI configurations under the benchmark suite.
+#
+# Run inside the app container against a seeded database:
+#   python manage.py seed_benchmark --users 8
+#   bench_uwsgi.sh [requests] [concurrency]
+#
+# Each profile starts uWSGI with an HTTP socket, runs run_benchmark against
+# it and writes bench-<profile>.json; the last run is compared to the first.
+
+set -e
+
+REQUESTS="${1:-500}"
+CONCURRENCY="${2:-8}"
+PORT="${BENCH_PORT:-8001}"
+
+PROFILES="
+prefork-4x1:SERVER_PROCESSES=4 SERVER_THREADS=1
+prefork-2x4:SERVER_PROCESSES=2 SERVER_THREADS=4
+lazy-4x1:SERVER_PROCESSES=4 SERVER_LAZY_APPS=true
+cheaper-2to8:SERVER_PROCESSES=8 SERVER_CHEAPER=2 SERVER_CHEAPER_INITIAL=2
+nowarmup-4x1:SERVER_PROCESSES=4 WSGI_WARMUP=0
+"
+
+# The benchmark logs in and sends requests far above the API rate limits.
+export THROTTLE_ENABLED=0
+
+FIRST=""
+echo "$PROFILES" | while IFS=: read -r NAME SETTINGS; do
+    [ -z "$NAME" ] && continue
+    echo "== $NAME ($SETTINGS)"
+    env $SETTINGS SERVER_SOCKET=/tmp/bench-uwsgi.sock \
+        run.sh --serve-only --http-socket ":$PORT" \
+        --pidfile /tmp/bench-uwsgi.pid --logto /tmp/bench-uwsgi.log &
+    START=$(date +%s)
+    until wget -q -O /dev/null "http://127.0.0.1:$PORT/api/health/live/"; do
+        sleep 0.2
+    done
+    echo "ready after $(( $(date +%s) - START ))s"
+
+    COMPARE=""
+    [ -n "$FIRST" ] && COMPARE="--compare $FIRST --threshold 1000"
+    python manage.py run_benchmark --url "http://127.0.0.1:$PORT" \
+        --requests "$REQUESTS" --concurrency "$CONCURRENCY" --users 8 \
+        --output "bench-$NAME.json" $COMPARE
+    [ -z "$FIRST" ] && FIRST="bench-$NAME.json"
+
+    uwsgi --stop /tmp/bench-uwsgi.pid
+    wait
+done
@@ -2,8 +2,37 @@
 
 set -e
 
+# uWSGI topology, see uwsgi.ini. These are not named UWSGI_* because
+# uWSGI reads such variables as options itself.
+export SERVER_SOCKET="${SERVER_SOCKET:-:9000}"
+export SERVER_LAZY_APPS="${SERVER_LAZY_APPS:-false}"
+export SERVER_PROCESSES="${SERVER_PROCESSES:-4}"
+export SERVER_THREADS="${SERVER_THREADS:-1}"
+export SERVER_LISTEN="${SERVER_LISTEN:-100}"
+export SERVER_CHEAPER_ALGO="${SERVER_CHEAPER_ALGO:-spare}"
+export SERVER_CHEAPER="${SERVER_CHEAPER:-0}"
+export SERVER_CHEAPER_INITIAL="${SERVER_CHEAPER_INITIAL:-$SERVER_PROCESSES}"
+export SERVER_CHEAPER_STEP="${SERVER_CHEAPER_STEP:-1}"
+export SERVER_MAX_REQUESTS="${SERVER_MAX_REQUESTS:-5000}"
+export SERVER_RELOAD_ON_RSS="${SERVER_RELOAD_ON_RSS:-256}"
+export SERVER_HARAKIRI="${SERVER_HARAKIRI:-30}"
+export SERVER_THROTTLE_ITEMS="${SERVER_THROTTLE_ITEMS:-100000}"
+
+# Event streams are served by the ASGI application, see recipe.events.
+if [ "$1" = "--events" ]; then
+    shift
+    exec uvicorn app.asgi:application --host 0.0.0.0 \
+        --port "${EVENTS_PORT:-9001}" --no-access-log "$@"
+fi
+
+if [ "$1" = "--serve-only" ]; then
+    shift
+    exec uwsgi --ini /scripts/uwsgi.ini "$@"
+fi
+
 python manage.py wait_for_db
 python manage.py collectstatic --noinput
 python manage.py migrate
+python manage.py build_schema
 
-uwsgi --socket :9000 --workers 4 --master --enable-threads --module app.wsgi
\ No newline at end of file
+exec uwsgi --ini /scripts/uwsgi.ini "$@"